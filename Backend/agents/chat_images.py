@@ -0,0 +1,167 @@
+"""
+Chat images stored by reference.
+
+User images are uploaded to S3 by the chat routes before the agent runs, so the
+HumanMessage written to the LangGraph checkpoint only carries an image block with
+the S3 key (and public URL when one exists):
+
+    {"type": "image", "url": ..., "mime_type": ..., "extras": {"s3_bucket": ..., "s3_key": ...}}
+
+`S3ImageResolverMiddleware` swaps those blocks for base64 blocks on the copy of
+the messages sent to the model, so the bytes never reach the checkpoint. Every
+model call re-sends the thread's images, so recently used ones are kept in an
+LRU bounded by their total base64 size (the API Lambda serves all users from
+one process).
+"""
+import asyncio
+import base64
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AnyMessage, HumanMessage
+from loguru import logger
+
+from config.settings import get_settings
+from services.clients import get_s3_client
+
+PRESIGNED_URL_EXPIRES_SECONDS = 3600
+IMAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_image_cache: "OrderedDict[tuple[str, str], str]" = OrderedDict()
+_image_cache_bytes = 0
+_image_cache_lock = threading.Lock()
+
+
+def build_image_block(
+        image_base64: Optional[str],
+        mime_type: str,
+        image_upload: Optional[dict] = None,
+) -> dict:
+    """Image content block for a user message; by S3 reference when the upload is known."""
+    if image_upload and image_upload.get("key"):
+        block = {
+            "type": "image",
+            "mime_type": image_upload.get("content_type") or mime_type,
+            "extras": {
+                "s3_bucket": image_upload.get("bucket"),
+                "s3_key": image_upload["key"],
+            },
+        }
+        if image_upload.get("url"):
+            block["url"] = image_upload["url"]
+        return block
+
+    return {
+        "type": "image",
+        "base64": image_base64,
+        "mime_type": mime_type
+    }
+
+
+def _s3_reference(block: Any) -> Optional[tuple[str, str]]:
+    if not isinstance(block, dict) or block.get("type") != "image" or block.get("base64"):
+        return None
+    extras = block.get("extras") or {}
+    if not extras.get("s3_key"):
+        return None
+    return extras.get("s3_bucket") or get_settings().AWS_S3_BUCKET, extras["s3_key"]
+
+
+def _fetch_image_base64(bucket: str, key: str) -> str:
+    global _image_cache_bytes
+    cache_key = (bucket, key)
+    with _image_cache_lock:
+        encoded = _image_cache.get(cache_key)
+        if encoded is not None:
+            _image_cache.move_to_end(cache_key)
+            return encoded
+
+    body = get_s3_client().get_object(Bucket=bucket, Key=key)["Body"].read()
+    encoded = base64.b64encode(body).decode("ascii")
+    if len(encoded) > IMAGE_CACHE_MAX_BYTES:
+        return encoded
+
+    with _image_cache_lock:
+        previous = _image_cache.pop(cache_key, None)
+        if previous is not None:
+            _image_cache_bytes -= len(previous)
+        _image_cache[cache_key] = encoded
+        _image_cache_bytes += len(encoded)
+        while _image_cache_bytes > IMAGE_CACHE_MAX_BYTES:
+            _, evicted = _image_cache.popitem(last=False)
+            _image_cache_bytes -= len(evicted)
+    return encoded
+
+
+def image_block_url(block: dict) -> Optional[str]:
+    """Displayable URL for an image block: public URL, else a presigned S3 URL."""
+    if block.get("url"):
+        return block["url"]
+    reference = _s3_reference(block)
+    if not reference:
+        return None
+    bucket, key = reference
+    try:
+        return get_s3_client().generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket, "Key": key},
+            ExpiresIn=PRESIGNED_URL_EXPIRES_SECONDS,
+        )
+    except Exception as e:
+        logger.warning(f"Could not presign chat image {key}: {e}")
+        return None
+
+
+def resolve_image_references(messages: list[AnyMessage]) -> list[AnyMessage]:
+    """Return `messages` with S3-referenced image blocks inlined as base64 (inputs untouched)."""
+    resolved = []
+    for message in messages:
+        if not isinstance(message, HumanMessage) or not isinstance(message.content, list):
+            resolved.append(message)
+            continue
+        if not any(_s3_reference(block) for block in message.content):
+            resolved.append(message)
+            continue
+
+        content = []
+        for block in message.content:
+            reference = _s3_reference(block)
+            if not reference:
+                content.append(block)
+                continue
+            bucket, key = reference
+            try:
+                content.append({
+                    "type": "image",
+                    "base64": _fetch_image_base64(bucket, key),
+                    "mime_type": block.get("mime_type", "image/jpeg"),
+                })
+            except Exception as e:
+                logger.error(f"Failed to load chat image s3://{bucket}/{key}: {e}")
+                if block.get("url"):
+                    content.append({"type": "image", "url": block["url"]})
+                else:
+                    content.append({"type": "text", "text": "[Image unavailable]"})
+        resolved.append(message.model_copy(update={"content": content}))
+    return resolved
+
+
+class S3ImageResolverMiddleware(AgentMiddleware):
+    """Inline S3-referenced chat images just before each model call."""
+
+    def wrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        return handler(request.override(messages=resolve_image_references(request.messages)))
+
+    async def awrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        messages = await asyncio.to_thread(resolve_image_references, request.messages)
+        return await handler(request.override(messages=messages))
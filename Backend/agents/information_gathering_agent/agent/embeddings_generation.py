@@ -7,6 +7,9 @@ from typing import List, Dict, Any
 import requests
 from loguru import logger
 
+from database.embedding_cache import embedding_cache
+from services.llm_transport import post_openai
+
 OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 QDRANT_URL = os.environ.get("QDRANT_URL")
@@ -55,29 +58,30 @@ def get_embeddings(texts: List[str], model: str = DEFAULT_EMBEDDING_MODEL) -> Li
     if not texts:
         return []
 
+    return embedding_cache.get_or_create(texts, model, lambda missing: _request_embeddings(missing, model))
+
+
+def _request_embeddings(texts: List[str], model: str) -> List[List[float]]:
     if not OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY not set in environment")
 
-    base_url = OPENAI_BASE_URL.rstrip("/")
-    url = f"{base_url}/v1/embeddings"
-
-    headers = {
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-        "Content-Type": "application/json",
-    }
     payload: Dict[str, Any] = {
         "model": model,
         "input": texts,
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
     try:
-        resp.raise_for_status()
+        data = post_openai(
+            "/v1/embeddings",
+            payload,
+            operation="embeddings",
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+        )
     except requests.HTTPError as e:
-        logger.error(f"OpenAI embeddings HTTP error: {e} - body: {resp.text}")
+        logger.error(f"OpenAI embeddings HTTP error: {e} - body: {e.response.text}")
         raise
 
-    data = resp.json()
     embeddings = [item["embedding"] for item in data.get("data", [])]
     return embeddings
 
@@ -1,40 +1,73 @@
 from ast import Dict
-from contextlib import contextmanager
-from typing import List, Optional
+import asyncio
+from functools import lru_cache
+from typing import Any, AsyncIterator, List, Optional, TypedDict
 from uuid import UUID
 
 from langchain.agents import create_agent
-from langchain_core.messages import HumanMessage
+from langchain.agents.middleware import ModelRequest, dynamic_prompt
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.messages.ai import add_usage
 from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.mongodb import MongoDBSaver
+from langgraph.graph.state import CompiledStateGraph
 from loguru import logger
 
+from agents.chat_images import S3ImageResolverMiddleware, build_image_block, image_block_url
 from agents.information_gathering_agent.agent.prompt_templates.v4.information_gathering_agent import \
     build_system_prompt
 from agents.information_gathering_agent.agent.tools import store_home_issue, store_summary, store_summary_preview
 from config.settings import get_settings
+from database.checkpointer import get_checkpointer
 from database.llm_consumption import record_langchain_usage
+from services.clients import get_openai_http_client
+
+PROMPT_VERSION = "v4"
+TOOLS = {tool.name: tool for tool in [store_home_issue, store_summary_preview, store_summary]}
+
+
+class InformationGatheringContext(TypedDict):
+    """Per-request runtime context; rendered into the system prompt on every model call."""
+    user_context: str
+
+
+@dynamic_prompt
+def information_gathering_system_prompt(request: ModelRequest) -> str:
+    context = request.runtime.context or {}
+    return build_system_prompt(context.get("user_context", ""))
+
+
+@lru_cache
+def get_compiled_agent(prompt_version: str = PROMPT_VERSION,
+                       tool_names: tuple = tuple(TOOLS)) -> CompiledStateGraph:
+    """
+    Build the agent graph once per (prompt version, tool set) and reuse it across
+    requests. The user context reaches the prompt through the runtime context,
+    so it does not require recompiling.
+    """
+    settings = get_settings()
+    llm = ChatOpenAI(
+        model=settings.INFORMATION_GATHERING_AGENT_MODEL,
+        max_retries=5,
+        reasoning_effort="low",
+        stream_usage=True,
+        api_key=settings.OPENAI_API_KEY,
+        http_client=get_openai_http_client()
+    )
+    logger.info(f"Compiling information gathering agent prompt_version={prompt_version} tools={tool_names}")
+    return create_agent(
+        model=llm,
+        tools=[TOOLS[name] for name in tool_names],
+        middleware=[information_gathering_system_prompt, S3ImageResolverMiddleware()],
+        context_schema=InformationGatheringContext,
+        checkpointer=get_checkpointer(),
+    )
 
 
 class InformationGatheringAgent:
     def __init__(self):
         self.settings = get_settings()
-        self.llm = ChatOpenAI(
-            model=self.settings.INFORMATION_GATHERING_AGENT_MODEL,
-            max_retries=5,
-            reasoning_effort="low",
-            api_key=self.settings.OPENAI_API_KEY
-        )
-
-    @contextmanager
-    def get_checkpointer(self):
-        """Context manager for MongoDB checkpointer."""
-        with MongoDBSaver.from_conn_string(conn_string=self.settings.MONGODB_URI,
-                                           db_name=self.settings.MYHANDYAI_AGENTS_CHECKPOINT_DATABASE,
-                                           checkpoint_collection_name=self.settings.MYHANDYAI_AGENTS_CHECKPOINT_COLLECTION_NAME,
-                                           writes_collection_name=self.settings.MYHANDYAI_AGENTS_CHECKPOINT_WRITES_COLLECTION_NAME) as checkpointer:
-            yield checkpointer
+        self.agent = get_compiled_agent()
 
     def process_text_response(
             self,
@@ -60,55 +93,45 @@ class InformationGatheringAgent:
         logger.debug(f"User message: {message}")
 
         try:
-            with self.get_checkpointer() as checkpointer:
-                # Build system prompt with user context
-                system_prompt = build_system_prompt(context)
-
-                # Create agent with checkpointer
-                agent = create_agent(
-                    model=self.llm,
-                    tools=[store_home_issue, store_summary_preview, store_summary],
-                    system_prompt=system_prompt,
-                    checkpointer=checkpointer,
-                )
-
-                config: RunnableConfig = {
-                    "configurable": {
-                        "thread_id": str(thread_id),
-                        "project_id": project_id,
-                        "recursion_limit": 20
-                    }
+            config: RunnableConfig = {
+                "configurable": {
+                    "thread_id": str(thread_id),
+                    "project_id": project_id,
+                    "recursion_limit": 20
                 }
+            }
 
-                result = agent.invoke(
-                    input={"messages": [HumanMessage(content=message)]},
-                    config=config
+            result = self.agent.invoke(
+                input={"messages": [HumanMessage(content=message)]},
+                config=config,
+                context={"user_context": context},
+            )
+
+            if result and "messages" in result:
+                last_message = result["messages"][-1]
+                record_langchain_usage(
+                    getattr(last_message, "usage_metadata", None),
+                    model=self.settings.INFORMATION_GATHERING_AGENT_MODEL,
+                    operation="information_gathering_text_response",
+                    project_id=project_id,
+                    user_id=user_id,
+                    metadata={"thread_id": str(thread_id)},
                 )
+                logger.info(f"Agent responded successfully for thread_id: {thread_id}")
+                logger.debug(f"Information Gathering Agent response: {last_message.content}")
 
-                if result and "messages" in result:
-                    last_message = result["messages"][-1]
-                    record_langchain_usage(
-                        getattr(last_message, "usage_metadata", None),
-                        model=self.settings.INFORMATION_GATHERING_AGENT_MODEL,
-                        operation="information_gathering_text_response",
-                        project_id=project_id,
-                        user_id=user_id,
-                        metadata={"thread_id": str(thread_id)},
-                    )
-                    logger.info(f"Agent responded successfully for thread_id: {thread_id}")
-                    logger.debug(f"Information Gathering Agent response: {last_message.content}")
-
-                    return last_message.content
-                else:
-                    logger.error("No response from agent")
-                    return "I apologize, but I encountered an issue processing your request."
+                return last_message.content
+            else:
+                logger.error("No response from agent")
+                return "I apologize, but I encountered an issue processing your request."
 
         except Exception as e:
             logger.error(f"Error in process_text_response: {e}")
             return "I apologize, but I'm having trouble processing your request right now. Please try again."
 
     def process_image_response(self, text: Optional[str], image_base64: str, mime_type: str, thread_id: UUID,
-                               project_id: str, context: str = "", user_id: Optional[str] = None) -> str:
+                               project_id: str, context: str = "", user_id: Optional[str] = None,
+                               image_upload: Optional[dict] = None) -> str:
         """
         Process a message with an image from the user.
         
@@ -119,6 +142,8 @@ class InformationGatheringAgent:
             thread_id: Conversation thread ID for persistence
             project_id: Project ID to associate with this conversation
             context: User context string to inject into system prompt
+            image_upload: S3 upload of the image; when given, the checkpointed message
+                references it instead of embedding the base64 data
             
         Returns:
             Agent's response text
@@ -127,137 +152,191 @@ class InformationGatheringAgent:
         logger.debug(f"Image MIME type: {mime_type}, has text: {text is not None}")
 
         try:
-            with self.get_checkpointer() as checkpointer:
-                # Build system prompt with user context
-                system_prompt = build_system_prompt(context)
-                
-                # Create agent with checkpointer
-                agent = create_agent(
-                    model=self.llm,
-                    tools=[store_home_issue, store_summary_preview, store_summary],
-                    system_prompt=system_prompt,
-                    checkpointer=checkpointer,
-                )
+            # Create message with image
+            content = []
+            if text:
+                content.append({"type": "text", "text": text})
+                logger.debug(f"Accompanying text: {text}")
 
-                # Create message with image
-                content = []
-                if text:
-                    content.append({"type": "text", "text": text})
-                    logger.debug(f"Accompanying text: {text}")
-
-                content.append({
-                    "type": "image",
-                    "base64": image_base64,
-                    "mime_type": mime_type
-                })
-
-                config: RunnableConfig = {
-                    "configurable": {
-                        "thread_id": str(thread_id),
-                        "project_id": project_id,
-                        "recursion_limit": 20
-                    }
+            content.append(build_image_block(image_base64, mime_type, image_upload))
+
+            config: RunnableConfig = {
+                "configurable": {
+                    "thread_id": str(thread_id),
+                    "project_id": project_id,
+                    "recursion_limit": 20
                 }
+            }
+
+            result = self.agent.invoke(
+                input={"messages": [HumanMessage(content=content)]},
+                config=config,
+                context={"user_context": context},
+            )
 
-                result = agent.invoke(
-                    input={"messages": [HumanMessage(content=content)]},
-                    config=config
+            if result and "messages" in result:
+                last_message = result["messages"][-1]
+                record_langchain_usage(
+                    getattr(last_message, "usage_metadata", None),
+                    model=self.settings.INFORMATION_GATHERING_AGENT_MODEL,
+                    operation="information_gathering_image_response",
+                    project_id=project_id,
+                    user_id=user_id,
+                    metadata={"thread_id": str(thread_id)},
                 )
+                logger.info(f"Agent responded successfully to image for thread_id: {thread_id}")
+                logger.debug(f"Information Gathering Agent response: {last_message.content}")
 
-                if result and "messages" in result:
-                    last_message = result["messages"][-1]
-                    record_langchain_usage(
-                        getattr(last_message, "usage_metadata", None),
-                        model=self.settings.INFORMATION_GATHERING_AGENT_MODEL,
-                        operation="information_gathering_image_response",
-                        project_id=project_id,
-                        user_id=user_id,
-                        metadata={"thread_id": str(thread_id)},
-                    )
-                    logger.info(f"Agent responded successfully to image for thread_id: {thread_id}")
-                    logger.debug(f"Information Gathering Agent response: {last_message.content}")
-
-                    return last_message.content
-                else:
-                    logger.error("No response from agent")
-                    return "I apologize, but I encountered an issue processing your request."
+                return last_message.content
+            else:
+                logger.error("No response from agent")
+                return "I apologize, but I encountered an issue processing your request."
 
         except Exception as e:
             logger.error(f"Error in process_image_response: {e}")
             return "I apologize, but I'm having trouble processing your image. Please try again."
 
-    def get_history(self, thread_id: UUID) -> List[Dict]:
-        """
-        Read conversation history for a thread using LangGraph's get_state.
-        Extracts text content from messages, handling both string and multimodal content.
+    async def astream_response(
+            self,
+            text: Optional[str],
+            thread_id: UUID,
+            project_id: str,
+            context: str = "",
+            user_id: Optional[str] = None,
+            image_base64: Optional[str] = None,
+            mime_type: str = "image/jpeg",
+            image_upload: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
         """
-        with self.get_checkpointer() as checkpointer:
-            # Use empty context for history retrieval (context doesn't affect history)
-            system_prompt = build_system_prompt("")
-
-            agent = create_agent(
-                model=self.llm,
-                tools=[store_home_issue, store_summary_preview, store_summary],
-                system_prompt=system_prompt,
-                checkpointer=checkpointer,
-            )
+        Stream the agent's reply token by token (LangGraph stream_mode="messages").
 
-            config: RunnableConfig = {
-                "configurable": {
-                    "thread_id": str(thread_id),
-                }
+        The checkpoint is written by the graph as usual; token usage of every model
+        call in the turn is summed and recorded once the stream completes.
+        """
+        logger.info(f"Streaming response for thread_id: {thread_id}, project_id: {project_id}")
+
+        if image_base64 or image_upload:
+            content = []
+            if text:
+                content.append({"type": "text", "text": text})
+            content.append(build_image_block(image_base64, mime_type, image_upload))
+            operation = "information_gathering_image_response"
+        else:
+            content = text
+            operation = "information_gathering_text_response"
+
+        config: RunnableConfig = {
+            "configurable": {
+                "thread_id": str(thread_id),
+                "project_id": project_id,
+                "recursion_limit": 20
             }
+        }
 
-            # LangGraph handles Mongo + msgpack for you here
-            snapshot = agent.get_state(config)
+        usage = None
+        try:
+            async for chunk, metadata in self.agent.astream(
+                    {"messages": [HumanMessage(content=content)]},
+                    config=config,
+                    context={"user_context": context},
+                    stream_mode="messages",
+            ):
+                if metadata.get("langgraph_node") != "model" or not isinstance(chunk, AIMessageChunk):
+                    continue
+                if chunk.usage_metadata:
+                    usage = add_usage(usage, chunk.usage_metadata)
+                token = chunk.text
+                if token:
+                    yield token
+        except Exception as e:
+            # The route turns this into an SSE `error` event
+            logger.error(f"Error in astream_response: {e}")
+            raise
 
-            # snapshot.values is your graph state; in your case it should contain "messages"
-            messages = snapshot.values.get("messages", [])
+        await asyncio.to_thread(
+            record_langchain_usage,
+            usage,
+            model=self.settings.INFORMATION_GATHERING_AGENT_MODEL,
+            operation=operation,
+            project_id=project_id,
+            user_id=user_id,
+            metadata={"thread_id": str(thread_id), "streamed": True},
+        )
+        logger.info(f"Agent finished streaming for thread_id: {thread_id}")
 
-            history: List[Dict] = []
-            for m in messages:
-                # Skip tool messages as they're not part of user-facing conversation
-                msg_type = getattr(m, "type", None) or m.__class__.__name__.lower()
-                if msg_type == "tool":
-                    continue
+    def get_last_response(self, thread_id: UUID) -> Optional[Any]:
+        """
+        Content of the last message in the thread's checkpoint: the turn's final
+        answer, as returned by the blocking endpoint (text streamed before tool
+        calls is not part of it).
+        """
+        config: RunnableConfig = {"configurable": {"thread_id": str(thread_id)}}
+        messages = self.agent.get_state(config).values.get("messages", [])
+        if not messages or getattr(messages[-1], "type", None) != "ai":
+            return None
+        return messages[-1].content
 
-                # Map message type to role
-                role = {
-                    "human": "user",
-                    "ai": "assistant",
-                    "system": "system",
-                }.get(msg_type, "user")
-
-                # Extract text content - handle both string and list (multimodal) content
-                content = m.content
-                if isinstance(content, str):
-                    text_content = content
-                elif isinstance(content, list):
-                    # Extract text from content blocks (multimodal messages)
-                    text_parts = []
-                    for item in content:
-                        if isinstance(item, dict):
-                            if item.get("type") == "text" and "text" in item:
-                                text_parts.append(item["text"])
-                            elif item.get("type") == "image":
-                                # Extract base64 content from image block
-                                base64_data = item.get("base64")
-                                mime_type = item.get("mime_type", "image/jpeg")
-                                if base64_data:
-                                    # Format as data URI for easy use in frontend
-                                    text_parts.append(f"data:{mime_type};base64,{base64_data}")
-                                elif item.get("url"):
-                                    # Fallback to URL if base64 not available
-                                    text_parts.append(f"[Image URL: {item.get('url')}]")
-                                else:
-                                    text_parts.append("[Image attached]")
-                        elif isinstance(item, str):
-                            text_parts.append(item)
-                    text_content = " ".join(text_parts) if text_parts else ""
-                else:
-                    # Fallback: convert to string
-                    text_content = str(content) if content else ""
-
-                history.append({"role": role, "content": text_content})
-
-            return history
+    def get_history(self, thread_id: UUID) -> List[Dict]:
+        """
+        Read conversation history for a thread using LangGraph's get_state.
+        Extracts text content from messages, handling both string and multimodal content.
+        """
+        config: RunnableConfig = {
+            "configurable": {
+                "thread_id": str(thread_id),
+            }
+        }
+
+        # LangGraph handles Mongo + msgpack for you here
+        snapshot = self.agent.get_state(config)
+
+        # snapshot.values is your graph state; in your case it should contain "messages"
+        messages = snapshot.values.get("messages", [])
+
+        history: List[Dict] = []
+        for m in messages:
+            # Skip tool messages as they're not part of user-facing conversation
+            msg_type = getattr(m, "type", None) or m.__class__.__name__.lower()
+            if msg_type == "tool":
+                continue
+
+            # Map message type to role
+            role = {
+                "human": "user",
+                "ai": "assistant",
+                "system": "system",
+            }.get(msg_type, "user")
+
+            # Extract text content - handle both string and list (multimodal) content
+            content = m.content
+            if isinstance(content, str):
+                text_content = content
+            elif isinstance(content, list):
+                # Extract text from content blocks (multimodal messages)
+                text_parts = []
+                for item in content:
+                    if isinstance(item, dict):
+                        if item.get("type") == "text" and "text" in item:
+                            text_parts.append(item["text"])
+                        elif item.get("type") == "image":
+                            # Images are stored by S3 reference; older threads still embed base64
+                            image_url = image_block_url(item)
+                            base64_data = item.get("base64")
+                            mime_type = item.get("mime_type", "image/jpeg")
+                            if image_url:
+                                text_parts.append(image_url)
+                            elif base64_data:
+                                # Format as data URI for easy use in frontend
+                                text_parts.append(f"data:{mime_type};base64,{base64_data}")
+                            else:
+                                text_parts.append("[Image attached]")
+                    elif isinstance(item, str):
+                        text_parts.append(item)
+                text_content = " ".join(text_parts) if text_parts else ""
+            else:
+                # Fallback: convert to string
+                text_content = str(content) if content else ""
+
+            history.append({"role": role, "content": text_content})
+
+        return history
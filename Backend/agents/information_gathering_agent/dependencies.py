@@ -1,12 +1,16 @@
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 from fastapi import Depends
 
-from agents.information_gathering_agent.agent.information_gathering_agent import InformationGatheringAgent
-from agents.information_gathering_agent.services.information_gathering_agent_service import \
-    InformationGatheringAgentService
 from database.mongodb import mongodb, MongoDB
 
+# The agent modules pull in LangChain/LangGraph; they are imported on the first
+# request that needs them instead of when the API starts.
+if TYPE_CHECKING:
+    from agents.information_gathering_agent.agent.information_gathering_agent import InformationGatheringAgent
+    from agents.information_gathering_agent.services.information_gathering_agent_service import \
+        InformationGatheringAgentService
+
 
 # =============================================================================
 # DATABASE DEPENDENCIES
@@ -19,8 +23,10 @@ def get_mongodb() -> MongoDB:
 # =============================================================================
 # AGENT DEPENDENCIES
 # =============================================================================
-def get_information_gathering_agent() -> InformationGatheringAgent:
+def get_information_gathering_agent() -> "InformationGatheringAgent":
     """Provide a configured InformationGatheringAgent instance."""
+    from agents.information_gathering_agent.agent.information_gathering_agent import InformationGatheringAgent
+
     return InformationGatheringAgent()
 
 
@@ -30,9 +36,12 @@ def get_information_gathering_agent() -> InformationGatheringAgent:
 
 def get_information_gathering_agent_service(
         information_gathering_agent: Annotated[
-            InformationGatheringAgent, Depends(get_information_gathering_agent)],
-        mongodb_instance: Annotated[MongoDB, Depends(get_mongodb)]) -> InformationGatheringAgentService:
+            "InformationGatheringAgent", Depends(get_information_gathering_agent)],
+        mongodb_instance: Annotated[MongoDB, Depends(get_mongodb)]) -> "InformationGatheringAgentService":
     """Provide a configured OrchestratorService instance."""
+    from agents.information_gathering_agent.services.information_gathering_agent_service import \
+        InformationGatheringAgentService
+
     return InformationGatheringAgentService(information_gathering_agent, mongodb_instance)
 
 
@@ -41,7 +50,7 @@ def get_information_gathering_agent_service(
 # =============================================================================
 
 InformationGatheringAgentServiceDependency = Annotated[
-    InformationGatheringAgentService, Depends(get_information_gathering_agent_service)]
+    "InformationGatheringAgentService", Depends(get_information_gathering_agent_service)]
 
 # Agent Dependencies    
-InformationGatheringAgentDependency = Annotated[InformationGatheringAgent, Depends(get_information_gathering_agent)]
+InformationGatheringAgentDependency = Annotated["InformationGatheringAgent", Depends(get_information_gathering_agent)]
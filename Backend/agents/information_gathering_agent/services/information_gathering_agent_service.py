@@ -1,4 +1,5 @@
-from typing import Dict, List, Tuple
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from uuid import UUID
 
 from bson import ObjectId
@@ -69,7 +70,8 @@ class InformationGatheringAgentService:
             project_id: str,
             text: str = None,
             image_base64: str = None,
-            image_mime_type: str = None
+            image_mime_type: str = None,
+            image_upload: Optional[dict] = None
     ) -> Tuple[str, str]:
         """
         Process a message from the user (text, image, or both).
@@ -88,10 +90,7 @@ class InformationGatheringAgentService:
         logger.debug(f"Has text: {text is not None}, has image: {image_base64 is not None}")
 
         try:
-            # Build user context
-            context = self._build_context(project_id)
-            project = self.project_collection.find_one({"_id": ObjectId(project_id)})
-            user_id = str(project.get("userId")) if project and project.get("userId") else None
+            context, user_id = self._prepare_message(project_id)
 
             if image_base64:
                 # Process image with optional text
@@ -103,7 +102,8 @@ class InformationGatheringAgentService:
                     thread_id=thread_id,
                     project_id=project_id,
                     context=context,
-                    user_id=user_id
+                    user_id=user_id,
+                    image_upload=image_upload
                 )
             elif text:
                 # Process text only
@@ -130,6 +130,38 @@ class InformationGatheringAgentService:
             logger.error(f"Error processing message: {e}")
             raise
 
+    async def stream_message(
+            self,
+            thread_id: UUID,
+            project_id: str,
+            text: Optional[str] = None,
+            image_base64: Optional[str] = None,
+            image_mime_type: Optional[str] = None,
+            image_upload: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of `process_message`: yields the agent's response
+        tokens. Read the conversation status with `get_conversation_status` once
+        the stream is exhausted.
+        """
+        if not text and not image_base64:
+            raise ValueError("Either text or image must be provided")
+
+        logger.info(f"Orchestrator streaming message for thread_id: {thread_id}, project_id: {project_id}")
+        context, user_id = await asyncio.to_thread(self._prepare_message, project_id)
+
+        async for token in self.information_gathering_agent.astream_response(
+                text=text,
+                thread_id=thread_id,
+                project_id=project_id,
+                context=context,
+                user_id=user_id,
+                image_base64=image_base64,
+                mime_type=image_mime_type or "image/jpeg",
+                image_upload=image_upload,
+        ):
+            yield token
+
     def get_conversation_status(self, project_id: str) -> str:
         """
         Get the current conversation status for a project.
@@ -147,6 +179,10 @@ class InformationGatheringAgentService:
         return project.get("information_gathering_conversation_status",
                            InformationGatheringConversationStatus.PENDING.value)
 
+    def get_last_response(self, thread_id: UUID):
+        """Final agent answer of the thread's latest turn (None if it has none)."""
+        return self.information_gathering_agent.get_last_response(thread_id)
+
     def get_history(self, thread_id: UUID) -> List[Dict]:
         return self.information_gathering_agent.get_history(thread_id)
 
@@ -179,6 +215,13 @@ class InformationGatheringAgentService:
             "conversation_status": conversation_status
         }
 
+    def _prepare_message(self, project_id: str) -> Tuple[str, Optional[str]]:
+        """Return (user context, owning user id) for a message on this project."""
+        context = self._build_context(project_id)
+        project = self.project_collection.find_one({"_id": ObjectId(project_id)}, {"userId": 1})
+        user_id = str(project.get("userId")) if project and project.get("userId") else None
+        return context, user_id
+
     def _build_context(self, project_id: str) -> str:
         """
         Build formatted context string from user data.
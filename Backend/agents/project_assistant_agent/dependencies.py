@@ -1,12 +1,16 @@
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 from fastapi import Depends
 
-from agents.project_assistant_agent.agent.project_assistant_agent import ProjectAssistantAgent
-from agents.project_assistant_agent.services.project_assistant_agent_service import \
-    ProjectAssistantAgentService
 from database.mongodb import mongodb, MongoDB
 
+# The agent modules pull in LangChain/LangGraph; they are imported on the first
+# request that needs them instead of when the API starts.
+if TYPE_CHECKING:
+    from agents.project_assistant_agent.agent.project_assistant_agent import ProjectAssistantAgent
+    from agents.project_assistant_agent.services.project_assistant_agent_service import \
+        ProjectAssistantAgentService
+
 
 # =============================================================================
 # DATABASE DEPENDENCIES
@@ -19,8 +23,10 @@ def get_mongodb() -> MongoDB:
 # =============================================================================
 # AGENT DEPENDENCIES
 # =============================================================================
-def get_project_assistant_agent() -> ProjectAssistantAgent:
+def get_project_assistant_agent() -> "ProjectAssistantAgent":
     """Provide a configured ProjectAssistantAgent instance."""
+    from agents.project_assistant_agent.agent.project_assistant_agent import ProjectAssistantAgent
+
     return ProjectAssistantAgent()
 
 
@@ -30,9 +36,12 @@ def get_project_assistant_agent() -> ProjectAssistantAgent:
 
 def get_project_assistant_agent_service(
         project_assistant_agent: Annotated[
-            ProjectAssistantAgent, Depends(get_project_assistant_agent)],
-        mongodb_instance: Annotated[MongoDB, Depends(get_mongodb)]) -> ProjectAssistantAgentService:
+            "ProjectAssistantAgent", Depends(get_project_assistant_agent)],
+        mongodb_instance: Annotated[MongoDB, Depends(get_mongodb)]) -> "ProjectAssistantAgentService":
     """Provide a configured ProjectAssistantAgentService instance."""
+    from agents.project_assistant_agent.services.project_assistant_agent_service import \
+        ProjectAssistantAgentService
+
     return ProjectAssistantAgentService(project_assistant_agent, mongodb_instance)
 
 
@@ -41,7 +50,7 @@ def get_project_assistant_agent_service(
 # =============================================================================
 
 ProjectAssistantAgentServiceDependency = Annotated[
-    ProjectAssistantAgentService, Depends(get_project_assistant_agent_service)]
+    "ProjectAssistantAgentService", Depends(get_project_assistant_agent_service)]
 
 # Agent Dependencies    
-ProjectAssistantAgentDependency = Annotated[ProjectAssistantAgent, Depends(get_project_assistant_agent)]
+ProjectAssistantAgentDependency = Annotated["ProjectAssistantAgent", Depends(get_project_assistant_agent)]
@@ -1,4 +1,5 @@
-from typing import Dict, List, Tuple, Optional
+import asyncio
+from typing import AsyncIterator, Dict, List, Tuple, Optional
 from uuid import UUID
 
 from bson import ObjectId
@@ -269,6 +270,7 @@ class ProjectAssistantAgentService:
             text: str = None,
             image_base64: str = None,
             image_mime_type: str = None,
+            image_upload: Optional[dict] = None,
             step_number: Optional[int] = None
     ) -> Tuple[str, str]:
         """
@@ -280,6 +282,7 @@ class ProjectAssistantAgentService:
             text: Optional text message
             image_base64: Optional base64-encoded image
             image_mime_type: Optional image MIME type
+            image_upload: S3 upload of the image (stored in the thread by reference)
             step_number: Current step number (-1 for overview, 0 for tools, >=1 for specific step)
             
         Returns:
@@ -290,10 +293,7 @@ class ProjectAssistantAgentService:
         logger.debug(f"Has text: {text is not None}, has image: {image_base64 is not None}")
 
         try:
-            # Build context for the agent
-            context = self._build_context(project_id, step_number)
-            project = self.project_collection.find_one({"_id": ObjectId(project_id)})
-            user_id = str(project.get("userId")) if project and project.get("userId") else None
+            context, user_id = self._prepare_message(project_id, step_number)
 
             if image_base64:
                 # Process image with optional text
@@ -305,7 +305,8 @@ class ProjectAssistantAgentService:
                     thread_id=thread_id,
                     project_id=project_id,
                     context=context,
-                    user_id=user_id
+                    user_id=user_id,
+                    image_upload=image_upload
                 )
             elif text:
                 # Process text only
@@ -328,6 +329,47 @@ class ProjectAssistantAgentService:
             logger.error(f"Error processing message: {e}")
             raise
 
+    async def stream_message(
+            self,
+            thread_id: UUID,
+            project_id: str,
+            text: Optional[str] = None,
+            image_base64: Optional[str] = None,
+            image_mime_type: Optional[str] = None,
+            image_upload: Optional[dict] = None,
+            step_number: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Streaming counterpart of `process_message`: yields the agent's response tokens."""
+        if not text and not image_base64:
+            raise ValueError("Either text or image must be provided")
+
+        logger.info(
+            f"Streaming message for thread_id: {thread_id}, project_id: {project_id}, step_number: {step_number}")
+        context, user_id = await asyncio.to_thread(self._prepare_message, project_id, step_number)
+
+        async for token in self.project_assistant_agent.astream_response(
+                text=text,
+                thread_id=thread_id,
+                project_id=project_id,
+                context=context,
+                user_id=user_id,
+                image_base64=image_base64,
+                mime_type=image_mime_type or "image/jpeg",
+                image_upload=image_upload,
+        ):
+            yield token
+
+    def _prepare_message(self, project_id: str, step_number: Optional[int]) -> Tuple[str, Optional[str]]:
+        """Return (project/step context, owning user id) for a message on this project."""
+        context = self._build_context(project_id, step_number)
+        project = self.project_collection.find_one({"_id": ObjectId(project_id)}, {"userId": 1})
+        user_id = str(project.get("userId")) if project and project.get("userId") else None
+        return context, user_id
+
+    def get_last_response(self, thread_id: UUID):
+        """Final agent answer of the thread's latest turn (None if it has none)."""
+        return self.project_assistant_agent.get_last_response(thread_id)
+
     def get_history(self, thread_id: UUID) -> List[Dict]:
         """Get conversation history for a thread."""
         return self.project_assistant_agent.get_history(thread_id)
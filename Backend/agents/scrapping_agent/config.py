@@ -62,6 +62,17 @@ OPENAI_MODEL_CLASSIFIER = os.getenv("OPENAI_MODEL_CLASSIFIER", "gpt-5-nano")
 MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "myhandyai_kb")
 
+# Same pool knobs as the Backend's MONGODB_* settings
+MONGO_CLIENT_OPTIONS = {
+    "appname": "myhandyai-scraper",
+    "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", "10")),
+    "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+    "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "120000")),
+    "compressors": os.getenv("MONGODB_COMPRESSORS", "zlib"),
+    "readPreference": os.getenv("MONGODB_READ_PREFERENCE", "primary"),
+    "retryWrites": os.getenv("MONGODB_RETRY_WRITES", "true").lower() == "true",
+}
+
 COL_DISCOVERED = "discovered_urls"
 COL_DOCS = "kb_documents"
 COL_STATE = "source_discovery_state"
\ No newline at end of file
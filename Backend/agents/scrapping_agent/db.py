@@ -3,7 +3,7 @@ from typing import Any, Optional
 from typing import Dict
 from pymongo import MongoClient, UpdateOne
 
-from config import MONGO_URI, DB_NAME, COL_DISCOVERED, COL_DOCS, COL_STATE
+from config import MONGO_URI, MONGO_CLIENT_OPTIONS, DB_NAME, COL_DISCOVERED, COL_DOCS, COL_STATE
 from utils import utc_now
 
 @dataclass
@@ -13,7 +13,7 @@ class Stores:
     state: Any
 
 def init_db() -> Stores:
-    client = MongoClient(MONGO_URI)
+    client = MongoClient(MONGO_URI, **MONGO_CLIENT_OPTIONS)
     db = client[DB_NAME]
 
     discovered = db[COL_DISCOVERED]
@@ -1,14 +1,15 @@
 import io
 import time
 import urllib.request
-from typing import Optional
+from typing import Optional, Union
 
 import PIL.Image
-from google import genai
 from google.genai.types import GenerateContentConfig, ImageConfig
 from loguru import logger
 
+from agents.solution_generation_multi_agent.image_generation_agent.reference_cache import ReferenceImage
 from config.settings import get_settings
+from services.clients import get_genai_client
 
 # Model that accepts image inputs AND generates images natively
 GEMINI_IMAGE_MODEL = "gemini-3-pro-image-preview"
@@ -19,7 +20,7 @@ class ImageGenerationAgent:
     def __init__(self, model: Optional[str] = None):
         self.settings = get_settings()
         self.model = GEMINI_IMAGE_MODEL
-        self.client = genai.Client(api_key=self.settings.GOOGLE_API_KEY)
+        self.client = get_genai_client()
         logger.info(f"ImageGenerationAgent ready — model: {self.model}")
 
     @staticmethod
@@ -38,7 +39,7 @@ class ImageGenerationAgent:
     def generate_image(
         self,
         prompt: str,
-        reference_images: Optional[list[PIL.Image.Image]] = None,
+        reference_images: Optional[list[Union[PIL.Image.Image, ReferenceImage]]] = None,
         aspect_ratio: str = "16:9",
         output_mime_type: str = "image/png",
         max_retries: int = 2,
@@ -105,8 +106,11 @@ class ImageGenerationAgent:
         raise ValueError(f"Image generation failed after {max_retries + 1} attempts")
 
     @staticmethod
-    def _pil_to_part(img: PIL.Image.Image):
+    def _pil_to_part(img: Union[PIL.Image.Image, ReferenceImage]):
         from google.genai import types
+        if isinstance(img, ReferenceImage):
+            # Cached references carry their PNG encoding already
+            return types.Part.from_bytes(data=img.png_bytes, mime_type="image/png")
         buf = io.BytesIO()
         img.save(buf, format="PNG")
         return types.Part.from_bytes(data=buf.getvalue(), mime_type="image/png")
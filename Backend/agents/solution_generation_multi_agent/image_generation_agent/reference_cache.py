@@ -0,0 +1,216 @@
+"""
+Reference-image cache for step image generation.
+
+Every step image is generated with the project's context images and the prior
+step images as references, so without a cache step N downloads and re-encodes
+N images. References are immutable S3 objects (every generated image gets a
+fresh key), so they are cached by S3 key with no invalidation, in two tiers
+shared by everything running in the worker container:
+
+1. an in-process LRU of decoded images plus their PNG encoding, bounded by the
+   memory both take (decoded pixels + PNG bytes)
+2. PNG files under /tmp (survives across warm invocations of the same container)
+
+Misses are read with `s3.get_object`; a public URL is only used when the image
+has no S3 key. Callers pass the REFERENCE_MAX_PX rendition when one exists, and
+larger images are downscaled to that size on load.
+"""
+import hashlib
+import io
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import PIL.Image
+from loguru import logger
+
+from agents.solution_generation_multi_agent.image_generation_agent.utils import REFERENCE_MAX_PX, make_thumbnail
+from config.settings import get_settings
+
+DEFAULT_MAX_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 384 * 1024 * 1024
+DEFAULT_CACHE_DIR = "/tmp/reference-images"
+
+
+@dataclass(frozen=True)
+class ReferenceImage:
+    """A reference image decoded once, with the PNG bytes sent to the model."""
+    key: str
+    image: PIL.Image.Image
+    png_bytes: bytes
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate RSS of the entry: decoded pixel buffer (e.g. 3 bytes/px for RGB) plus the PNG."""
+        width, height = self.image.size
+        return width * height * len(self.image.getbands()) + len(self.png_bytes)
+
+
+def _encode_png(image: PIL.Image.Image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class ReferenceImageCache:
+    """
+    Returns None when the image cannot be loaded so callers can degrade
+    gracefully; disk-tier failures are logged and treated as misses.
+    """
+
+    def __init__(
+            self,
+            max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+            max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+            cache_dir: str = DEFAULT_CACHE_DIR,
+    ):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = cache_dir
+        self._lru: "OrderedDict[str, ReferenceImage]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "failures": 0}
+
+    def get(self, s3_client, s3_key: Optional[str] = None, url: Optional[str] = None) -> Optional[ReferenceImage]:
+        if s3_key and s3_key.startswith(("http://", "https://")):
+            # Legacy records store the URL in s3_key when no public base was configured
+            s3_key, url = None, url or s3_key
+        cache_key = s3_key or url
+        if not cache_key:
+            return None
+
+        with self._lock:
+            ref = self._lru.get(cache_key)
+            if ref is not None:
+                self._lru.move_to_end(cache_key)
+                self._stats["memory_hits"] += 1
+                return ref
+
+        png_bytes = self._read_disk(cache_key)
+        if png_bytes is not None:
+            try:
+                ref = ReferenceImage(
+                    key=cache_key,
+                    image=PIL.Image.open(io.BytesIO(png_bytes)).convert("RGB"),
+                    png_bytes=png_bytes,
+                )
+                self._count("disk_hits")
+                self._remember(ref)
+                return ref
+            except Exception as e:
+                logger.warning(f"Discarding unreadable cached reference image {cache_key}: {e}")
+
+        try:
+            raw = self._download(s3_client, s3_key, url)
+            image = PIL.Image.open(io.BytesIO(raw)).convert("RGB")
+            if max(image.size) > REFERENCE_MAX_PX:
+                # Images without a reference rendition (user uploads, older steps)
+                image = make_thumbnail(image, REFERENCE_MAX_PX)
+        except Exception as e:
+            self._count("failures")
+            logger.warning(f"Could not load reference image {cache_key}: {e}")
+            return None
+
+        self._count("misses")
+        ref = ReferenceImage(key=cache_key, image=image, png_bytes=_encode_png(image))
+        self._remember(ref)
+        self._write_disk(cache_key, ref.png_bytes)
+        return ref
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._lru)
+            stats["memory_bytes"] = self._memory_bytes
+        return stats
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._memory_bytes = 0
+
+    # ─── Tiers ────────────────────────────────────────────────────────────────
+
+    def _download(self, s3_client, s3_key: Optional[str], url: Optional[str]) -> bytes:
+        if s3_key:
+            response = s3_client.get_object(Bucket=get_settings().AWS_S3_BUCKET, Key=s3_key)
+            return response["Body"].read()
+        with urllib.request.urlopen(url, timeout=10) as resp:
+            return resp.read()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, ref: ReferenceImage) -> None:
+        size = ref.memory_bytes
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._lru.pop(ref.key, None)
+            if previous is not None:
+                self._memory_bytes -= previous.memory_bytes
+            self._lru[ref.key] = ref
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._lru.popitem(last=False)
+                self._memory_bytes -= evicted.memory_bytes
+
+    def _disk_path(self, cache_key: str) -> str:
+        digest = hashlib.sha256(cache_key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def _read_disk(self, cache_key: str) -> Optional[bytes]:
+        path = self._disk_path(cache_key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # LRU order for disk eviction
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Reference image disk cache read failed: {e}")
+            return None
+
+    def _write_disk(self, cache_key: str, png_bytes: bytes) -> None:
+        if len(png_bytes) > self.max_disk_bytes:
+            return
+        path = self._disk_path(cache_key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(png_bytes)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Reference image disk cache write failed: {e}")
+
+    def _evict_disk(self) -> None:
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+
+reference_image_cache = ReferenceImageCache()
+
+
+def get_reference_image_cache_stats() -> dict:
+    return reference_image_cache.get_stats()
@@ -8,6 +8,7 @@ class AnchorObject(BaseModel):
     description: str                 # what was prompted
     s3_key: str
     url: Optional[str] = None
+    reference_s3_key: Optional[str] = None   # REFERENCE_MAX_PX rendition for model inputs
     status: str = "complete"
 
 
@@ -40,6 +41,11 @@ class ImageGenerationResult(BaseModel):
     project_id: str
     s3_key: str
     url: Optional[str] = None
+    thumbnail_url: Optional[str] = None    # small WebP for step lists
+    webp_url: Optional[str] = None
+    avif_url: Optional[str] = None
+    reference_s3_key: Optional[str] = None  # REFERENCE_MAX_PX rendition for model inputs
+    reference_url: Optional[str] = None
     size: str
     model: str
     prompt_preview: Optional[str] = None
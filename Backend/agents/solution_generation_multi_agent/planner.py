@@ -11,7 +11,8 @@ from pydantic import BaseModel, Field, ValidationError
 load_dotenv()
 
 from config.settings import get_settings
-from database.llm_consumption import record_langchain_usage, record_openai_response_usage
+from database.llm_consumption import record_langchain_usage
+from services.llm_transport import post_openai
 
 settings = get_settings()
 
@@ -198,24 +199,19 @@ Project summary:
         return s
 
     def _post_openai(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        url = f"{self.base_url}/responses"
-        headers = {
-            "Authorization": f"Bearer {self.openai_api_key}",
-            "Content-Type": "application/json",
-        }
-        r = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
-        if r.status_code >= 400:
-            raise RuntimeError(f"OpenAI API error {r.status_code}: {r.text}")
-        response_json = r.json()
-        record_openai_response_usage(
-            response_json,
-            model=self.model,
-            operation="tools_generation",
-            project_id=self.project_id,
-            user_id=self.user_id,
-            endpoint="/responses",
-        )
-        return response_json
+        try:
+            return post_openai(
+                "/responses",
+                payload,
+                operation="tools_generation",
+                project_id=self.project_id,
+                user_id=self.user_id,
+                timeout=self.timeout,
+                api_key=self.openai_api_key,
+                base_url=self.base_url,
+            )
+        except requests.HTTPError as e:
+            raise RuntimeError(f"OpenAI API error {e.response.status_code}: {e.response.text}")
 
     @staticmethod
     def _extract_output_text(resp: Dict[str, Any]) -> str:
@@ -385,11 +381,6 @@ class StepsAgentJSON:
     def __init__(self, new_summary: Optional[str] = None, matched_summary: Optional[str] = None,
                  matched_tools: Optional[Any] = None, matched_steps: Optional[Any] = None):
         self.api_key = settings.OPENAI_API_KEY
-        self.api_url = "https://api.openai.com/v1/chat/completions"
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
         self.new_summary = new_summary
         self.matched_summary = matched_summary
         self.matched_tools = matched_tools
@@ -721,10 +712,16 @@ class StepsAgentJSON:
                 "reasoning_effort": "low"
             }
 
-            r = requests.post(self.api_url, headers=self.headers, json=payload)
-            if r.status_code == 200:
-                print(r.json())
-                content = r.json()["choices"][0]["message"]["content"].strip()
+            try:
+                data = post_openai("/chat/completions", payload, operation="steps_generation", api_key=self.api_key)
+            except requests.HTTPError as he:
+                print(f"❌ API Error {he.response.status_code}")
+                print(f"Response: {he.response.text}")
+                raise HTTPException(status_code=he.response.status_code,
+                                    detail=f"LLM API error: {he.response.status_code}")
+            else:
+                print(data)
+                content = data["choices"][0]["message"]["content"].strip()
                 print(f"✅ LLM Response received, length: {len(content)} characters")
 
                 try:
@@ -738,10 +735,6 @@ class StepsAgentJSON:
                 except Exception as pe:
                     print(f"❌ Unexpected parsing error: {str(pe)}")
                     raise HTTPException(status_code=500, detail=f"Unexpected error during parsing: {str(pe)}")
-            else:
-                print(f"❌ API Error {r.status_code}")
-                print(f"Response: {r.text}")
-                raise HTTPException(status_code=r.status_code, detail=f"LLM API error: {r.status_code}")
 
         except requests.exceptions.Timeout:
             print("❌ Request timeout")
@@ -796,11 +789,6 @@ class EstimationAgent:
 
     def __init__(self, project_id: Optional[str] = None, user_id: Optional[str] = None):
         self.api_key = settings.OPENAI_API_KEY
-        self.api_url = "https://api.openai.com/v1/chat/completions"
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
         self.project_id = project_id
         self.user_id = user_id
 
@@ -869,20 +857,13 @@ class EstimationAgent:
                 "verbosity": "low"
             }
 
-            r = requests.post(
-                self.api_url,
-                headers={**self.headers},
-                json=payload, timeout=30
-            )
-            r.raise_for_status()
-            data = r.json()
-            record_openai_response_usage(
-                data,
-                model=payload["model"],
+            data = post_openai(
+                "/chat/completions",
+                payload,
                 operation="estimation_complexity_assessment",
                 project_id=self.project_id,
                 user_id=self.user_id,
-                endpoint="/v1/chat/completions",
+                api_key=self.api_key,
             )
             content = data["choices"][0]["message"]["content"]
             print(content)
@@ -1,10 +1,12 @@
 import json
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from typing import Optional
+from uuid import uuid4
 
 import PIL.Image
-import requests
 from bson.objectid import ObjectId
 from loguru import logger
 from pymongo.collection import Collection
@@ -12,16 +14,23 @@ from pymongo.collection import Collection
 from agents.solution_generation_multi_agent.image_generation_agent.image_generation_agent import (
     ImageGenerationAgent,
 )
+from agents.solution_generation_multi_agent.image_generation_agent.reference_cache import (
+    ReferenceImage,
+    reference_image_cache,
+)
 from agents.solution_generation_multi_agent.image_generation_agent.schemas import (
     ImageGenerationResult,
     AnchorObject,
     AnchorObjectsResult,
 )
 from agents.solution_generation_multi_agent.image_generation_agent.utils import (
+    REFERENCE_MAX_PX,
+    ImageOutputs,
+    build_image_outputs,
     map_size_to_aspect,
-    png_to_bytes_ensure_rgba,
     generate_s3_key,
     get_public_url,
+    variant_s3_key,
 )
 from agents.solution_generation_multi_agent.prompt_templates.v1.image_generation_agent import (
     IMAGE_GENERATION_PROMPT,
@@ -34,13 +43,18 @@ from agents.solution_generation_multi_agent.prompt_templates.v1.image_generation
     HAND_RULES,
 )
 from config.settings import get_settings
-from database.llm_consumption import record_google_image_generation, record_openai_response_usage
+from database.llm_consumption import record_google_image_generation
+from database.user_uploads import list_project_uploads
+from services.llm_transport import post_openai
 
 GEMINI_IMAGE_MODEL_FLASH = "gemini-3-pro-image-preview"
 
 REFERENCE_IMAGE_BUDGET = 8
 MAX_CONTEXT_IMAGES = 3
 MAX_PRIOR_STEP_REFS = 5
+CONTEXT_IMAGE_WORKERS = 3
+# Generated image keys are unique per generation, so CDNs/browsers may cache forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 _NEGATIVE_SUFFIX = (
     " Photorealistic, 4K HDR, sharp focus, professional photography. "
@@ -51,12 +65,16 @@ _NEGATIVE_SUFFIX = (
 
 
 def _call_openai(
-        api_key: str,
         system: str,
         user: str,
+        *,
+        operation: str,
         max_tokens: int = 1200,
-        retries: int = 2,
+        project_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        metadata: Optional[dict] = None,
 ) -> Optional[str]:
+    """JSON-mode chat completion; None on failure so callers fall back to defaults."""
     payload = {
         "model": "gpt-4o-mini",
         "messages": [
@@ -67,32 +85,26 @@ def _call_openai(
         "temperature": 0.3,
         "response_format": {"type": "json_object"},
     }
-    for attempt in range(1, retries + 2):
-        try:
-            r = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {api_key}"},
-                json=payload,
-                timeout=40,
-            )
-            r.raise_for_status()
-            data = r.json()
-            logger.debug(f"OpenAI response (attempt {attempt}): {json.dumps(data)[:400]}")
-            choices = data.get("choices", [])
-            if not choices:
-                logger.warning(f"OpenAI attempt {attempt}: empty choices")
-                continue
-            content = choices[0].get("message", {}).get("content", "").strip()
-            if not content:
-                logger.warning(f"OpenAI attempt {attempt}: empty content")
-                continue
-            return content
-        except Exception as e:
-            logger.warning(f"OpenAI attempt {attempt} failed: {e}")
-        if attempt <= retries:
-            time.sleep(1.5 * attempt)
-    logger.error("All OpenAI attempts failed")
-    return None
+    try:
+        data = post_openai(
+            "/chat/completions",
+            payload,
+            operation=operation,
+            project_id=project_id,
+            user_id=user_id,
+            metadata=metadata,
+        )
+    except Exception as e:
+        logger.error(f"OpenAI {operation} failed: {e}")
+        return None
+
+    logger.debug(f"OpenAI response: {json.dumps(data)[:400]}")
+    choices = data.get("choices", [])
+    content = (choices[0].get("message", {}).get("content") or "").strip() if choices else ""
+    if not content:
+        logger.warning(f"OpenAI {operation}: empty content")
+        return None
+    return content
 
 
 def _parse_json_safe(content: str, context: str = "") -> Optional[dict]:
@@ -130,11 +142,18 @@ class ImageGenerationAgentService:
             logger.warning(f"get_visual_dna failed: {e}")
             return None
 
-    def save_visual_dna(self, project_id: str, dna: dict) -> None:
+    def save_visual_dna(self, project_id: str, dna: dict, source: Optional[dict] = None) -> None:
+        """
+        `source` records where the DNA came from ({"type": "generated"} or
+        {"type": "cache", "project_id": ..., "score": ...}) for cache telemetry.
+        """
+        update = {"image_visual_dna": dna}
+        if source is not None:
+            update["image_visual_dna_source"] = {**source, "createdAt": datetime.utcnow()}
         try:
             self.project_collection.update_one(
                 {"_id": ObjectId(project_id)},
-                {"$set": {"image_visual_dna": dna}},
+                {"$set": update},
             )
             logger.info(f"Visual DNA saved — domain: {dna.get('domain')}")
         except Exception as e:
@@ -143,9 +162,9 @@ class ImageGenerationAgentService:
     def generate_visual_dna(self, summary_text: str) -> dict:
         logger.info("Generating Visual DNA")
         content = _call_openai(
-            api_key=self.settings.OPENAI_API_KEY,
             system=VISUAL_DNA_PROMPT,
             user=summary_text,
+            operation="visual_dna_generation",
             max_tokens=1000,
         )
         if content:
@@ -177,32 +196,14 @@ class ImageGenerationAgentService:
 
     def fetch_user_uploaded_image_urls(self, project_id: str) -> list[str]:
         """
-        List all user-uploaded images for this project from S3.
-        Path pattern: user-uploads/*/projects/{project_id}/*
-        Returns public URLs ordered by LastModified ascending (oldest first).
+        List all user-uploaded images for this project from the upload index
+        (written by store_user_uploaded_image, backfilled for older objects).
+        Returns public URLs ordered by upload time ascending (oldest first).
         """
         try:
-            prefix = f"user-uploads/"
-            paginator = self.s3_client.get_paginator("list_objects_v2")
-            all_objects = []
-
-            # S3 doesn't support mid-path wildcards — list broad prefix and filter
-            for page in paginator.paginate(
-                Bucket=self.settings.AWS_S3_BUCKET,
-                Prefix=prefix,
-            ):
-                for obj in page.get("Contents", []):
-                    key = obj["Key"]
-                    # Match: user-uploads/{user_id}/projects/{project_id}/...
-                    if f"/projects/{project_id}/" in key:
-                        all_objects.append(obj)
-
-            # Sort oldest → newest so context images are in chronological order
-            all_objects.sort(key=lambda o: o["LastModified"])
-
             urls = []
-            for obj in all_objects:
-                url = get_public_url(obj["Key"], self.settings.AWS_S3_PUBLIC_BASE)
+            for upload in list_project_uploads(project_id):
+                url = upload.get("url") or get_public_url(upload["key"], self.settings.AWS_S3_PUBLIC_BASE)
                 if url:
                     urls.append(url)
 
@@ -215,21 +216,33 @@ class ImageGenerationAgentService:
             logger.warning(f"fetch_user_uploaded_image_urls failed: {e}")
             return []
 
-    def load_user_uploaded_images(self, project_id: str) -> list[PIL.Image.Image]:
+    def load_user_uploaded_images(
+            self,
+            project_id: str,
+            urls: Optional[list[str]] = None,
+    ) -> list[PIL.Image.Image]:
         """
         Load all user-uploaded images for this project as PIL images.
+        Pass `urls` when already fetched to skip the index lookup.
         Returns empty list if none found or loading fails.
         """
-        urls = self.fetch_user_uploaded_image_urls(project_id)
+        if urls is None:
+            urls = self.fetch_user_uploaded_image_urls(project_id)
         images = []
         for url in urls:
-            pil = self.image_generation_agent.load_image_from_url(url)
-            if pil:
-                images.append(pil)
+            ref = reference_image_cache.get(self.s3_client, s3_key=self._s3_key_from_url(url), url=url)
+            if ref:
+                images.append(ref.image)
                 logger.info(f"Loaded user image: {url.split('/')[-1]}")
         logger.info(f"User images loaded as PIL: {len(images)}/{len(urls)}")
         return images
 
+    def _s3_key_from_url(self, url: str) -> Optional[str]:
+        public_base = self.settings.AWS_S3_PUBLIC_BASE
+        if public_base and url.startswith(public_base.rstrip("/") + "/"):
+            return url[len(public_base.rstrip("/")) + 1:]
+        return None
+
     # ─── Context image planning — smart merge with user uploads ───────────────
 
     def _plan_needed_context_images(
@@ -246,7 +259,6 @@ class ImageGenerationAgentService:
         object_colors = dna.get("object_colors", {})
 
         content = _call_openai(
-            api_key=self.settings.OPENAI_API_KEY,
             system=CONTEXT_IMAGE_PLANNER_PROMPT,
             user=json.dumps({
                 "summary": summary_text,
@@ -254,6 +266,7 @@ class ImageGenerationAgentService:
                 "object_colors": object_colors,
                 "scene_prefix": dna.get("scene_prefix", ""),
             }),
+            operation="context_image_planning",
             max_tokens=1000,
         )
 
@@ -265,6 +278,30 @@ class ImageGenerationAgentService:
         logger.warning("Context image planning returned no plans")
         return []
 
+    def get_context_plan(self, project_id: str) -> Optional[list[dict]]:
+        try:
+            doc = self.project_collection.find_one(
+                {"_id": ObjectId(project_id)},
+                {"image_context_plan": 1}
+            )
+            return doc.get("image_context_plan") if doc else None
+        except Exception as e:
+            logger.warning(f"get_context_plan failed: {e}")
+            return None
+
+    def save_context_plan(self, project_id: str, image_plans: list[dict], user_image_count: int) -> None:
+        try:
+            self.project_collection.update_one(
+                {"_id": ObjectId(project_id)},
+                {"$set": {
+                    "image_context_plan": image_plans,
+                    # The plan is only valid for a project with as many user uploads
+                    "image_context_plan_user_images": user_image_count,
+                }},
+            )
+        except Exception as e:
+            logger.warning(f"save_context_plan failed: {e}")
+
     def get_context_images(self, project_id: str) -> Optional[AnchorObjectsResult]:
         try:
             doc = self.project_collection.find_one(
@@ -293,6 +330,8 @@ class ImageGenerationAgentService:
             project_id: str,
             summary_text: str,
             dna: dict,
+            image_plans: Optional[list[dict]] = None,
+            plan_user_image_count: Optional[int] = None,
     ) -> AnchorObjectsResult:
         """
         Smart context image builder — three cases:
@@ -308,21 +347,37 @@ class ImageGenerationAgentService:
               generate only the remaining slots.
 
         All results (user + generated) are stored in MongoDB as image_context_images
-        so fetch_context_pil_images() works identically regardless of case.
+        so fetch_context_reference_images() works identically regardless of case.
+
+        Pass `image_plans` (e.g. reused from a similar project) to skip planning,
+        with `plan_user_image_count` the number of user images it was planned
+        for; it is only reused when that matches this project's uploads. The plan
+        used is stored as image_context_plan.
         """
         logger.info(f"Building context images for project {project_id}")
 
         # 1. Load user uploads
-        user_images_pil = self.load_user_uploaded_images(project_id)
         user_image_urls = self.fetch_user_uploaded_image_urls(project_id)
+        user_images_pil = self.load_user_uploaded_images(project_id, urls=user_image_urls)
         user_count = len(user_images_pil)
 
         # 2. Plan what context images are needed
-        image_plans = self._plan_needed_context_images(
-            summary_text=summary_text,
-            dna=dna,
-            user_image_count=user_count,
-        )
+        if image_plans is not None and plan_user_image_count != user_count:
+            logger.info(
+                f"Not reusing context image plan: planned for {plan_user_image_count} "
+                f"user images, project has {user_count}"
+            )
+            image_plans = None
+        if image_plans is None:
+            image_plans = self._plan_needed_context_images(
+                summary_text=summary_text,
+                dna=dna,
+                user_image_count=user_count,
+            )
+        else:
+            logger.info(f"Reusing context image plan ({len(image_plans)} slots)")
+        if image_plans:
+            self.save_context_plan(project_id, image_plans, user_count)
         planned_count = len(image_plans)
 
         logger.info(
@@ -353,7 +408,10 @@ class ImageGenerationAgentService:
         # ── Case 1 or 3: generate missing slots ──────────────────────────────
         flash_agent = ImageGenerationAgent(model=GEMINI_IMAGE_MODEL_FLASH)
 
-        # Fill slots with user images first (Case 3), then generate the rest
+        # Fill slots with user images first (Case 3); the rest are generated
+        # concurrently. `slots` keeps plan order regardless of finish order.
+        slots: list[Optional[AnchorObject]] = []
+        pending: list[tuple[int, str, dict, str]] = []
         user_slots_used = 0
         for i, plan in enumerate(image_plans[:MAX_CONTEXT_IMAGES]):
             name = plan.get("name", f"context_{i + 1}")
@@ -365,7 +423,7 @@ class ImageGenerationAgentService:
                     f"Slot {i + 1} ('{name}'): using user-provided image "
                     f"{url.split('/')[-1]}"
                 )
-                results.append(AnchorObject(
+                slots.append(AnchorObject(
                     name=name,
                     description=plan.get("purpose", "User provided image"),
                     s3_key=url.replace(
@@ -378,57 +436,36 @@ class ImageGenerationAgentService:
                 continue
 
             # No user image available — generate this slot
+            slots.append(None)
             prompt = plan.get("prompt", "")
-            if not prompt:
-                continue
-
-            full_prompt = (
-                f"{prompt} "
-                f"No people, no hands. Static scene only. "
-                f"Photorealistic, 4K HDR, professional photography. "
-                f"No text, no labels, no watermarks."
-            )
-
-            logger.info(
-                f"Slot {i + 1} ('{name}'): generating — "
-                f"{plan.get('angle', '')} shot"
-            )
-            try:
-                raw_bytes = flash_agent.generate_image(
-                    prompt=full_prompt,
-                    reference_images=None,
-                    aspect_ratio="16:9",
-                    output_mime_type="image/png",
-                )
-                png_bytes = png_to_bytes_ensure_rgba(raw_bytes)
-                s3_key = (
-                    f"project_{project_id}/context/"
-                    f"{name}_{int(time.time())}.png"
-                )
-                self.s3_client.put_object(
-                    Bucket=self.settings.AWS_S3_BUCKET,
-                    Key=s3_key,
-                    Body=png_bytes,
-                    ContentType="image/png",
-                    Metadata={
-                        "project_id": project_id,
-                        "context_name": name,
-                        "angle": plan.get("angle", ""),
-                        "type": "context_image_generated",
-                    },
-                )
-                url = get_public_url(s3_key, self.settings.AWS_S3_PUBLIC_BASE)
-                results.append(AnchorObject(
-                    name=name,
-                    description=plan.get("purpose", prompt[:100]),
-                    s3_key=s3_key,
-                    url=url,
-                    status="complete",
-                ))
-                logger.info(f"Generated context image '{name}': {s3_key}")
-            except Exception as e:
-                logger.error(f"Failed to generate context image '{name}': {e}")
-                continue
+            if prompt:
+                pending.append((i, name, plan, prompt))
+
+        if pending:
+            with ThreadPoolExecutor(
+                    max_workers=min(CONTEXT_IMAGE_WORKERS, len(pending)),
+                    thread_name_prefix="context-image",
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        self._generate_context_image, flash_agent, project_id, i, name, plan, prompt,
+                    ): (i, name)
+                    for i, name, plan, prompt in pending
+                }
+                for future in as_completed(futures):
+                    i, name = futures[future]
+                    try:
+                        slots[i] = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to generate context image '{name}': {e}")
+                        continue
+                    # Persist progress per slot, still in slot order
+                    self.save_context_images(project_id, AnchorObjectsResult(
+                        objects=[obj for obj in slots if obj],
+                        status="in-progress",
+                    ))
+
+        results = [obj for obj in slots if obj]
 
         # Case 1 with no plans at all — fall back to user images directly
         if not results and user_count > 0:
@@ -452,17 +489,78 @@ class ImageGenerationAgentService:
         )
         return result
 
-    def fetch_context_pil_images(self, project_id: str) -> list[PIL.Image.Image]:
-        """Load context PIL images from stored URLs for passing to Gemini."""
+    def _generate_context_image(
+            self,
+            flash_agent: ImageGenerationAgent,
+            project_id: str,
+            slot_index: int,
+            name: str,
+            plan: dict,
+            prompt: str,
+    ) -> AnchorObject:
+        """Generate and upload one context image slot (runs on the context-image pool)."""
+        full_prompt = (
+            f"{prompt} "
+            f"No people, no hands. Static scene only. "
+            f"Photorealistic, 4K HDR, professional photography. "
+            f"No text, no labels, no watermarks."
+        )
+
+        logger.info(
+            f"Slot {slot_index + 1} ('{name}'): generating — "
+            f"{plan.get('angle', '')} shot"
+        )
+        raw_bytes = flash_agent.generate_image(
+            prompt=full_prompt,
+            reference_images=None,
+            aspect_ratio="16:9",
+            output_mime_type="image/png",
+        )
+        outputs = build_image_outputs(raw_bytes, variant_formats=(), thumbnail=False)
+        # Unique per generation, so the object (and its renditions) never change
+        s3_key = (
+            f"project_{project_id}/context/"
+            f"{name}_{int(time.time())}_{uuid4().hex[:8]}.png"
+        )
+        metadata = {
+            "project_id": project_id,
+            "context_name": name,
+            "angle": plan.get("angle", ""),
+            "type": "context_image_generated",
+        }
+        self.s3_client.put_object(
+            Bucket=self.settings.AWS_S3_BUCKET,
+            Key=s3_key,
+            Body=outputs.png,
+            ContentType="image/png",
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+            Metadata=metadata,
+        )
+        url = get_public_url(s3_key, self.settings.AWS_S3_PUBLIC_BASE)
+        renditions = self._upload_image_variants(s3_key, outputs, metadata)
+        logger.info(f"Generated context image '{name}': {s3_key}")
+        return AnchorObject(
+            name=name,
+            description=plan.get("purpose", prompt[:100]),
+            s3_key=s3_key,
+            url=url,
+            reference_s3_key=renditions.get("reference", {}).get("s3_key"),
+            status="complete",
+        )
+
+    def fetch_context_reference_images(self, project_id: str) -> list[ReferenceImage]:
+        """Load context images (via the reference cache) for passing to Gemini."""
         ctx = self.get_context_images(project_id)
         if not ctx or not ctx.objects:
             return []
         images = []
         for obj in ctx.objects:
-            if obj.url and obj.status == "complete":
-                pil = self.image_generation_agent.load_image_from_url(obj.url)
-                if pil:
-                    images.append(pil)
+            if (obj.s3_key or obj.url) and obj.status == "complete":
+                ref = reference_image_cache.get(
+                    self.s3_client, s3_key=obj.reference_s3_key or obj.s3_key, url=obj.url,
+                )
+                if ref:
+                    images.append(ref)
                     logger.info(f"Loaded context image: {obj.name}")
         return images
 
@@ -500,7 +598,7 @@ class ImageGenerationAgentService:
             project_id: str,
             current_step_id: str,
             budget: int,
-    ) -> list[PIL.Image.Image]:
+    ) -> list[ReferenceImage]:
         try:
             doc = self.project_collection.find_one(
                 {"_id": ObjectId(project_id)},
@@ -510,18 +608,27 @@ class ImageGenerationAgentService:
                 return []
             steps = doc.get("step_generation", {}).get("steps", [])
             current_idx = int(current_step_id) - 1
-            images = []
+            # Only the newest `budget` images are used, so only those are loaded
+            completed = []
             for step in steps[:current_idx]:
                 img_meta = step.get("image", {})
                 if not isinstance(img_meta, dict):
                     continue
-                url = img_meta.get("url")
-                status = img_meta.get("status")
-                if url and status == "complete":
-                    pil = self.image_generation_agent.load_image_from_url(url)
-                    if pil:
-                        images.append(pil)
-            result = images[-budget:]
+                if (img_meta.get("s3_key") or img_meta.get("url")) and img_meta.get("status") == "complete":
+                    completed.append(img_meta)
+            images = []
+            for img_meta in reversed(completed):
+                if len(images) >= budget:
+                    break
+                # Prefer the small reference rendition; older steps only have the full PNG
+                ref = reference_image_cache.get(
+                    self.s3_client,
+                    s3_key=img_meta.get("reference_s3_key") or img_meta.get("s3_key"),
+                    url=img_meta.get("reference_url") or img_meta.get("url"),
+                )
+                if ref:
+                    images.append(ref)
+            result = images[::-1]
             logger.info(f"Prior step images: {len(result)} loaded (budget={budget})")
             return result
         except Exception as e:
@@ -563,22 +670,16 @@ class ImageGenerationAgentService:
         }, indent=2)
 
         content = _call_openai(
-            api_key=self.settings.OPENAI_API_KEY,
             system=STEP_PLANNER_PROMPT,
             user=user_content,
+            operation="step_image_planning",
             max_tokens=800,
+            project_id=project_id,
+            user_id=user_id,
+            metadata={"step_id": step_id, "step_text": step_text[:100]},
         )
 
         if content:
-            record_openai_response_usage(
-                {"choices": [{"message": {"content": content}}]},
-                model="gpt-4o-mini",
-                operation="step_image_planning",
-                project_id=project_id,
-                user_id=user_id,
-                endpoint="/v1/chat/completions",
-                metadata={"step_id": step_id, "step_text": step_text[:100]},
-            )
             parsed = _parse_json_safe(content, f"step_planner_{step_id}")
             if parsed:
                 imagen_prompt = parsed.get("imagen_prompt", "")
@@ -608,6 +709,36 @@ class ImageGenerationAgentService:
             f"{_NEGATIVE_SUFFIX}"
         ), ""
 
+    def _upload_image_variants(self, s3_key: str, outputs: ImageOutputs, metadata: dict) -> dict[str, dict]:
+        """
+        Upload the rendition set next to the PNG (`<key>.webp`, `<key>_thumb.webp`,
+        `<key>_ref768.png`, ...) and return {name: {"s3_key", "url"}}.
+        Renditions are optional: a failed upload is logged and left out.
+        """
+        uploads = [(fmt, variant_s3_key(s3_key, fmt), data, f"image/{fmt}") for fmt, data in outputs.variants.items()]
+        if outputs.thumbnail:
+            uploads.append(("thumbnail", variant_s3_key(s3_key, "webp", "thumb"), outputs.thumbnail, "image/webp"))
+        if outputs.reference:
+            uploads.append((
+                "reference", variant_s3_key(s3_key, "png", f"ref{REFERENCE_MAX_PX}"), outputs.reference, "image/png",
+            ))
+
+        renditions: dict[str, dict] = {}
+        for name, key, data, content_type in uploads:
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.settings.AWS_S3_BUCKET,
+                    Key=key,
+                    Body=data,
+                    ContentType=content_type,
+                    CacheControl=IMMUTABLE_CACHE_CONTROL,
+                    Metadata={**metadata, "variant": name},
+                )
+                renditions[name] = {"s3_key": key, "url": get_public_url(key, self.settings.AWS_S3_PUBLIC_BASE)}
+            except Exception as e:
+                logger.warning(f"Variant upload failed ({name}, {key}): {e}")
+        return renditions
+
     # ─── Main entry ───────────────────────────────────────────────────────────
 
     def generate_step_image(
@@ -618,7 +749,12 @@ class ImageGenerationAgentService:
             size: str = "1536x1024",
             project_id: Optional[str] = None,
             user_id: Optional[str] = None,
+            use_prior_steps: bool = True,
     ) -> ImageGenerationResult:
+        """
+        `use_prior_steps=False` (a step scheduled as independent) skips the prior
+        step memory, which isn't complete when such a step starts.
+        """
         logger.info(f"Generating image for step {step_id}")
 
         try:
@@ -632,21 +768,21 @@ class ImageGenerationAgentService:
                     self.save_visual_dna(project_id, dna)
 
             # 2. Context images (user uploads + generated — set by preflight)
-            context_images: list[PIL.Image.Image] = []
+            context_images: list[ReferenceImage] = []
             if project_id:
-                context_images = self.fetch_context_pil_images(project_id)
+                context_images = self.fetch_context_reference_images(project_id)
                 logger.info(f"Context images loaded: {len(context_images)}")
 
             # 3. Prior step states — text memory
             prior_states: list[dict] = []
-            if project_id:
+            if project_id and use_prior_steps:
                 prior_states = self.fetch_prior_step_states(project_id, step_id)
                 logger.info(f"Prior step states: {len(prior_states)}")
 
             # 4. Prior step images — visual memory
             prior_image_budget = max(1, REFERENCE_IMAGE_BUDGET - len(context_images))
-            prior_step_images: list[PIL.Image.Image] = []
-            if project_id:
+            prior_step_images: list[ReferenceImage] = []
+            if project_id and use_prior_steps:
                 prior_step_images = self.fetch_prior_step_images(
                     project_id, step_id, budget=prior_image_budget,
                 )
@@ -696,24 +832,30 @@ class ImageGenerationAgentService:
                 },
             )
 
-            # 8. Upload
-            png_bytes = png_to_bytes_ensure_rgba(raw_bytes)
+            # 8. Upload — PNG plus WebP variant and thumbnail for the frontend
+            variant_formats = tuple(
+                fmt.strip().lower() for fmt in self.settings.STEP_IMAGE_VARIANT_FORMATS.split(",") if fmt.strip()
+            )
+            outputs = build_image_outputs(raw_bytes, variant_formats=variant_formats)
             s3_key = generate_s3_key(step_id, project_id)
+            metadata = {
+                "step_id": step_id,
+                "project_id": project_id or "",
+                "size": size,
+                "model": self.image_generation_agent.model,
+                "context_count": str(len(context_images)),
+            }
             self.s3_client.put_object(
                 Bucket=self.settings.AWS_S3_BUCKET,
                 Key=s3_key,
-                Body=png_bytes,
+                Body=outputs.png,
                 ContentType="image/png",
-                Metadata={
-                    "step_id": step_id,
-                    "project_id": project_id or "",
-                    "size": size,
-                    "model": self.image_generation_agent.model,
-                    "context_count": str(len(context_images)),
-                },
+                CacheControl=IMMUTABLE_CACHE_CONTROL,
+                Metadata=metadata,
             )
             url = get_public_url(s3_key, self.settings.AWS_S3_PUBLIC_BASE)
-            logger.info(f"Step {step_id} uploaded: {s3_key}")
+            renditions = self._upload_image_variants(s3_key, outputs, metadata)
+            logger.info(f"Step {step_id} uploaded: {s3_key} (+{len(renditions)} renditions)")
 
             return ImageGenerationResult(
                 message="ok",
@@ -721,6 +863,11 @@ class ImageGenerationAgentService:
                 project_id=project_id or "",
                 s3_key=s3_key,
                 url=url,
+                thumbnail_url=renditions.get("thumbnail", {}).get("url"),
+                webp_url=renditions.get("webp", {}).get("url"),
+                avif_url=renditions.get("avif", {}).get("url"),
+                reference_s3_key=renditions.get("reference", {}).get("s3_key"),
+                reference_url=renditions.get("reference", {}).get("url"),
                 size=size,
                 model=self.image_generation_agent.model,
                 prompt_preview=planned_prompt,
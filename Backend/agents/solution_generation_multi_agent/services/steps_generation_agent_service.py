@@ -184,6 +184,7 @@ class StepsGenerationAgentService:
                 "tools_needed": step.tools_needed,
                 "safety_warnings": step.safety_warnings,
                 "tips": step.tips,
+                "builds_on_previous_step": step.builds_on_previous_step,
                 "completed": False
             })
 
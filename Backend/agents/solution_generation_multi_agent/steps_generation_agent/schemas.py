@@ -14,6 +14,11 @@ class Step(BaseModel):
     safety_warnings: List[str] = Field(default=[],
                                        description="List of safety considerations and precautions for this step")
     tips: List[str] = Field(default=[], description="List of helpful tips and tricks for this step")
+    builds_on_previous_step: bool = Field(
+        default=True,
+        description="Whether a picture of this step must show the result of earlier steps; false for steps "
+                    "that stand on their own visually (e.g. gathering tools, safety preparation)",
+    )
 
 
 class StepsPlan(BaseModel):
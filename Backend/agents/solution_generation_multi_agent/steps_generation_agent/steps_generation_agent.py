@@ -6,6 +6,7 @@ from loguru import logger
 from agents.solution_generation_multi_agent.steps_generation_agent.schemas import StepsPlan
 from config.settings import get_settings
 from database.llm_consumption import record_langchain_usage
+from services.clients import get_openai_http_client
 
 
 class StepsGenerationAgent:
@@ -23,7 +24,8 @@ class StepsGenerationAgent:
             model=model,
             max_retries=5,
             reasoning_effort="low",
-            api_key=self.settings.OPENAI_API_KEY
+            api_key=self.settings.OPENAI_API_KEY,
+            http_client=get_openai_http_client()
         )
 
     def generate_project_steps(
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Backfill / repair of the UserUploads index from the objects in S3.
+
+Uploads made before the index existed are only discoverable by scanning the
+bucket, so this script does that scan once:
+1. List every object under `user-uploads/`
+2. Parse user / project / source / thread from the key layout
+3. Upsert one index document per object (safe to re-run)
+"""
+
+import sys
+from mimetypes import guess_type
+from typing import Optional
+
+from config.settings import get_settings
+from database.user_uploads import record_user_upload
+from services.clients import get_s3_client
+
+UPLOAD_PREFIX = "user-uploads/"
+
+
+def parse_upload_key(key: str) -> Optional[dict]:
+    """
+    Split `user-uploads/{user}/projects/{project}/{source}/threads/{thread}/{file}`
+    into its parts. Returns None for keys that don't follow the layout.
+    """
+    parts = key.split("/")
+    if len(parts) < 8 or parts[0] != "user-uploads" or parts[2] != "projects" or parts[5] != "threads":
+        return None
+    return {
+        "user_id": parts[1],
+        "project_id": parts[3],
+        "source": parts[4],
+        "thread_id": parts[6],
+    }
+
+
+def backfill_user_upload_index(dry_run: bool = False) -> dict:
+    settings = get_settings()
+    s3 = get_s3_client()
+    paginator = s3.get_paginator("list_objects_v2")
+    public_base = settings.AWS_S3_PUBLIC_BASE.rstrip("/") if settings.AWS_S3_PUBLIC_BASE else None
+
+    stats = {"scanned": 0, "indexed": 0, "skipped": 0, "failed": 0}
+    for page in paginator.paginate(Bucket=settings.AWS_S3_BUCKET, Prefix=UPLOAD_PREFIX):
+        for obj in page.get("Contents", []):
+            stats["scanned"] += 1
+            key = obj["Key"]
+            parsed = parse_upload_key(key)
+            if not parsed:
+                stats["skipped"] += 1
+                print(f"⚠️ Skipping key outside the upload layout: {key}")
+                continue
+
+            if not dry_run:
+                try:
+                    record_user_upload(
+                        {
+                            "bucket": settings.AWS_S3_BUCKET,
+                            "key": key,
+                            "url": f"{public_base}/{key}" if public_base else None,
+                            "content_type": guess_type(key)[0],
+                            "size_bytes": obj.get("Size"),
+                        },
+                        created_at=obj["LastModified"],
+                        **parsed,
+                    )
+                except Exception:
+                    # Already logged; re-running the backfill picks it up
+                    stats["failed"] += 1
+                    continue
+            stats["indexed"] += 1
+
+    return stats
+
+
+if __name__ == "__main__":
+    dry_run = "--dry-run" in sys.argv
+    print(f"🚀 Backfilling UserUploads index{' (dry run)' if dry_run else ''}...")
+    result = backfill_user_upload_index(dry_run=dry_run)
+    print(f"✅ Scanned {result['scanned']} objects, indexed {result['indexed']}, skipped {result['skipped']}, failed {result['failed']}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the step-image output pipeline (image_generation_agent/utils.py).
+
+Compares encode time and output size of:
+1. the old path: decode -> RGBA -> PNG with optimize=True
+2. png_to_bytes_ensure_rgba on a conformant PNG (no re-encode) and on a JPEG
+3. WebP / AVIF variants and the thumbnail rendition
+
+Without an image a synthetic 1536x1024 photo-like image is used; pass a real
+Gemini output for representative sizes.
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image, ImageFilter
+
+from agents.solution_generation_multi_agent.image_generation_agent.utils import (
+    avif_supported,
+    encode_image,
+    make_thumbnail,
+    png_to_bytes_ensure_rgba,
+)
+
+
+def synthetic_image(width: int = 1536, height: int = 1024) -> Image.Image:
+    noise = Image.effect_noise((width, height), 64).filter(ImageFilter.GaussianBlur(2))
+    gradient = Image.linear_gradient("L").resize((width, height))
+    return Image.merge("RGB", (noise, gradient, noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+
+
+def legacy_png_to_bytes_ensure_rgba(raw_bytes: bytes) -> bytes:
+    im = Image.open(io.BytesIO(raw_bytes)).convert("RGBA")
+    out = io.BytesIO()
+    im.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def bench(label: str, fn, runs: int) -> None:
+    timings = []
+    output = b""
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<38} {statistics.median(timings):>9.1f} ms {len(output) / 1024:>10.1f} KiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image_path", nargs="?")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    runs = args.runs
+
+    image = Image.open(args.image_path).convert("RGB") if args.image_path else synthetic_image()
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    png_input = buf.getvalue()
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=92)
+    jpeg_input = buf.getvalue()
+
+    print(f"Input {image.width}x{image.height}, median of {runs} runs")
+    print(f"{'case':<38} {'time':>12} {'size':>13}")
+    bench("legacy PNG (optimize=True)", lambda: legacy_png_to_bytes_ensure_rgba(png_input), runs)
+    bench("ensure_rgba, conformant PNG (skip)", lambda: png_to_bytes_ensure_rgba(png_input), runs)
+    bench("legacy PNG from JPEG", lambda: legacy_png_to_bytes_ensure_rgba(jpeg_input), runs)
+    bench("ensure_rgba from JPEG", lambda: png_to_bytes_ensure_rgba(jpeg_input), runs)
+    bench("WebP variant", lambda: encode_image(image, "webp"), runs)
+    if avif_supported():
+        bench("AVIF variant", lambda: encode_image(image, "avif"), runs)
+    else:
+        print("AVIF variant                           skipped (Pillow built without AVIF)")
+    bench("thumbnail (WebP)", lambda: encode_image(make_thumbnail(image), "webp"), runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ class Settings(BaseSettings):
     # OpenAI settings
     OPENAI_API_KEY: str
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_CACHE_TTL_DAYS: int = 90
 
     # LangSmith settings
     LANGSMITH_TRACING: str
@@ -38,6 +39,13 @@ class Settings(BaseSettings):
     # MongoDB settings
     MONGODB_URI: str
     MONGODB_DATABASE: str
+    MONGODB_MAX_POOL_SIZE: int = 50
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = 120_000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGODB_COMPRESSORS: str = "zstd,snappy,zlib"  # in preference order; unavailable ones are skipped
+    MONGODB_READ_PREFERENCE: str = "primary"
+    MONGODB_RETRY_WRITES: bool = True
 
     # SerpAPI settings
     SERPAPI_API_KEY: str
@@ -54,8 +62,23 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: str
     GOOGLE_IMAGE_MODEL: str
 
+    # Step image generation settings
+    STEP_IMAGE_DEPENDENCY_MODE: str = "chained"  # "chained" | "independent"
+    # Extra encodings uploaded with every step image, comma-separated ("webp", "avif");
+    # avif is skipped when Pillow can't encode it
+    STEP_IMAGE_VARIANT_FORMATS: str = "webp"
+    # A released step image not finished after this long is treated as failed.
+    # Unset: the worker Lambda's timeout times STEP_IMAGE_MAX_ATTEMPTS (the image
+    # queue's maxReceiveCount), i.e. once every delivery of the message has run out.
+    STEP_IMAGE_STALL_TIMEOUT_SECONDS: Optional[int] = None
+    STEP_IMAGE_MAX_ATTEMPTS: int = 2
+    STEP_IMAGE_SWEEP_INTERVAL_SECONDS: int = 300
+
     # YouTube settings
     YOUTUBE_API_KEY: str
+    YOUTUBE_VIDEO_CACHE_TTL_DAYS: int = 30
+    YOUTUBE_SEARCH_CACHE_TTL_HOURS: int = 168
+    YOUTUBE_DAILY_QUOTA_BUDGET: int = 9000  # of the API's 10,000 units/day
 
     # Step guidance agent settings
     PROJECT_ASSISTANT_AGENT_MODEL: str
@@ -72,6 +95,13 @@ class Settings(BaseSettings):
     COGNITO_REGION: Optional[str] = None
     COGNITO_USER_POOL_ID: Optional[str] = None
     COGNITO_APP_CLIENT_ID: Optional[str] = None
+    COGNITO_USER_CACHE_TTL_SECONDS: int = 300
+    COGNITO_USER_CACHE_MAX_ENTRIES: int = 10_000
+    COGNITO_USER_TOUCH_INTERVAL_SECONDS: int = 900
+    COGNITO_JWKS_TTL_SECONDS: int = 3600
+    COGNITO_JWKS_MIN_REFRESH_INTERVAL_SECONDS: int = 30
+    # Cognito group whose members may read the operational stats / metrics routes
+    COGNITO_ADMIN_GROUP: str = "admin"
 
     class Config:
         env_file = get_env_filename()
@@ -18,6 +18,8 @@ from qdrant_client import QdrantClient
 from qdrant_client.models import PointStruct, VectorParams, Distance
 from qdrant_client.http.exceptions import UnexpectedResponse
 
+from database.embedding_cache import embedding_cache
+
 # Load environment variables
 load_dotenv()
 
@@ -66,9 +68,14 @@ def create_embeddings_for_texts(texts: List[str], model: str = "text-embedding-3
         return []
     
     print(f"Creating embeddings for {len(texts)} text chunks using model {model}")
-    resp = client.embeddings.create(model=model, input=texts)
-    
-    return [item.embedding for item in resp.data]
+
+    def _embed(missing: List[str]) -> List[List[float]]:
+        resp = client.embeddings.create(model=model, input=missing)
+        return [item.embedding for item in resp.data]
+
+    embeddings = embedding_cache.get_or_create(texts, model, _embed)
+    print(f"Embedding cache: {embedding_cache.get_stats()}")
+    return embeddings
 
 def upsert_embeddings_to_qdrant(
         file_id: str,
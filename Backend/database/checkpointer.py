@@ -0,0 +1,24 @@
+"""
+Long-lived LangGraph checkpointer shared by the conversational agents.
+
+The saver reuses the application's MongoClient, so chat turns no longer open
+(and tear down) a dedicated Mongo connection each time.
+"""
+from functools import lru_cache
+
+from langgraph.checkpoint.mongodb import MongoDBSaver
+
+from config.settings import get_settings
+from database.mongodb import mongodb
+
+
+@lru_cache
+def get_checkpointer() -> MongoDBSaver:
+    """Return the process-wide MongoDB checkpointer."""
+    settings = get_settings()
+    return MongoDBSaver(
+        client=mongodb.get_client(),
+        db_name=settings.MYHANDYAI_AGENTS_CHECKPOINT_DATABASE,
+        checkpoint_collection_name=settings.MYHANDYAI_AGENTS_CHECKPOINT_COLLECTION_NAME,
+        writes_collection_name=settings.MYHANDYAI_AGENTS_CHECKPOINT_WRITES_COLLECTION_NAME,
+    )
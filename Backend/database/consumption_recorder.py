@@ -0,0 +1,186 @@
+"""
+Write-behind recorder for accounting rows (LLM consumption).
+
+Rows are appended to an in-memory buffer and written with one `insert_many`
+when the buffer reaches `batch_size` or every `flush_interval_seconds`, by a
+background thread, so recording never adds a Mongo round trip to a model call.
+
+Durability:
+1. every row gets its `_id` up front, so re-inserting a batch is idempotent
+   (duplicate-key errors are ignored)
+2. a batch that cannot be written (Mongo unavailable) is appended to a local
+   JSON-lines spill file and replayed before the next successful flush
+3. `flush()` is called on FastAPI lifespan shutdown, at the end of every Lambda
+   invocation (the background thread is frozen between invocations) and at
+   interpreter exit
+
+A flush is a single `insert_many` (plus the spill replay, if any): it runs in the
+finally of every Lambda invocation, so nothing else is done on that path.
+"""
+import atexit
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from bson import json_util
+from loguru import logger
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL_SECONDS = 2.0
+DEFAULT_MAX_BUFFERED = 10_000
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ConsumptionRecorder:
+    """Buffers rows in memory and writes them to `collection` in batches."""
+
+    def __init__(
+            self,
+            collection: Collection,
+            spill_path: str,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+            max_buffered: int = DEFAULT_MAX_BUFFERED,
+    ):
+        self.collection = collection
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffered = max_buffered
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_lock = threading.Lock()
+        # Serializes flushes so the spill file is only touched by one writer
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"recorded": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0, "dropped": 0}
+        atexit.register(self.flush)
+
+    def record(self, document: Dict[str, Any]) -> None:
+        """Buffer one row (must already carry its `_id`)."""
+        with self._buffer_lock:
+            self._buffer.append(document)
+            self._stats["recorded"] += 1
+            size = len(self._buffer)
+        self._ensure_thread()
+        if size >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write everything buffered (and any spilled rows) now. Never raises."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                batch, self._buffer = self._buffer, []
+            try:
+                spilled = self._read_spill()
+                if spilled and self._write(spilled, replay=True):
+                    self._clear_spill()
+                if batch and not self._write(batch):
+                    self._spill(batch)
+            except Exception as e:
+                logger.error(f"Consumption flush failed: {e}")
+                if batch:
+                    self._spill(batch)
+
+    def close(self) -> None:
+        """Stop the background thread and flush what is left."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_seconds + 5)
+        self.flush()
+
+    def get_stats(self) -> dict:
+        with self._buffer_lock:
+            stats = dict(self._stats)
+            stats["buffered"] = len(self._buffer)
+        stats["spill_file_bytes"] = os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0
+        return stats
+
+    # ─── Internals ────────────────────────────────────────────────────────────
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._buffer_lock:
+            if self._stopped or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="consumption-recorder", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def _write(self, documents: List[Dict[str, Any]], replay: bool = False) -> bool:
+        """insert_many `documents`; False when they should be kept for later."""
+        if not documents:
+            return True
+        try:
+            self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            failed = [err for err in write_errors if err.get("code") != DUPLICATE_KEY_ERROR]
+            if failed:
+                # Rejected by the server itself: retrying would fail the same way
+                logger.error(f"Dropping {len(failed)} consumption rows rejected by Mongo: {failed[0].get('errmsg')}")
+                self._count("dropped", len(failed))
+        except Exception as e:
+            logger.warning(f"Consumption batch of {len(documents)} not written, keeping for retry: {e}")
+            return False
+
+        self._count("replayed" if replay else "written", len(documents))
+        self._count("batches", 1)
+        return True
+
+    def _count(self, name: str, amount: int) -> None:
+        with self._buffer_lock:
+            self._stats[name] += amount
+
+    def _spill(self, documents: List[Dict[str, Any]]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for document in documents:
+                    f.write(json_util.dumps(document) + "\n")
+            self._count("spilled", len(documents))
+        except OSError as e:
+            # Last resort: keep them in memory for the next flush, within bounds
+            logger.error(f"Consumption spill failed, re-buffering {len(documents)} rows: {e}")
+            with self._buffer_lock:
+                room = max(0, self.max_buffered - len(self._buffer))
+                self._buffer[:0] = documents[:room]
+                self._stats["dropped"] += len(documents) - room
+
+    def _read_spill(self) -> Optional[List[Dict[str, Any]]]:
+        """Spilled rows; None when the file exists but cannot be read (it is then left alone)."""
+        documents = []
+        try:
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        documents.append(json_util.loads(line))
+                    except ValueError:
+                        # A line cut short by a crash mid-append
+                        logger.error(f"Skipping malformed consumption spill line: {line[:200]}")
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            logger.error(f"Consumption spill file unreadable, leaving it in place: {e}")
+            return None
+        return documents
+
+    def _clear_spill(self) -> None:
+        try:
+            os.remove(self.spill_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove consumption spill file: {e}")
@@ -0,0 +1,175 @@
+"""
+Content-addressed cache for text embeddings.
+
+Embeddings are deterministic for a given (model, text), so every vector is keyed
+by the model name and the SHA-256 of the text. Lookups go through two tiers:
+
+1. an in-process LRU (survives across requests / warm Lambda invocations)
+2. the `EmbeddingCache` Mongo collection (survives across processes); entries
+   expire EMBEDDING_CACHE_TTL_DAYS after they are written, through a TTL index on
+   `created_at`, so the collection only holds recently used texts
+
+Only the texts missing from both tiers are sent to the embedding provider, in a
+single batched call, and the fresh vectors are written back to both tiers.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from loguru import logger
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
+
+from config.settings import get_settings
+from database.mongodb import mongodb
+
+EMBEDDING_CACHE_COLLECTION = "EmbeddingCache"
+DEFAULT_MAX_ENTRIES = 4096
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+def ensure_indexes() -> None:
+    ttl_seconds = get_settings().EMBEDDING_CACHE_TTL_DAYS * 24 * 3600
+    mongodb.get_collection(EMBEDDING_CACHE_COLLECTION).create_index(
+        [("created_at", ASCENDING)],
+        expireAfterSeconds=ttl_seconds,
+        name="created_at_ttl",
+    )
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """Return the cache key for `text` embedded with `model`."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+class EmbeddingCache:
+    """
+    `embed_fn` receives the list of texts that missed both tiers (deduplicated,
+    original order) and must return one vector per text. Failures of the
+    persistent tier are logged and treated as misses; they never fail the call.
+    """
+
+    def __init__(
+            self,
+            collection_name: str = EMBEDDING_CACHE_COLLECTION,
+            max_entries: int = DEFAULT_MAX_ENTRIES,
+            persistent: bool = True,
+    ):
+        self.collection_name = collection_name
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0}
+
+    def get_or_create(self, texts: List[str], model: str, embed_fn: EmbedFn) -> List[List[float]]:
+        """Return one embedding per text, calling `embed_fn` only for uncached texts."""
+        if not texts:
+            return []
+
+        keys = [embedding_cache_key(model, text) for text in texts]
+        found: Dict[str, List[float]] = {}
+
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vector
+            self._stats["memory_hits"] += len(found)
+
+        pending = [key for key in dict.fromkeys(keys) if key not in found]
+        if pending and self.persistent:
+            stored = self._load_persistent(pending)
+            if stored:
+                found.update(stored)
+                self._remember(stored)
+                with self._lock:
+                    self._stats["persistent_hits"] += len(stored)
+
+        missing_texts: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing_texts:
+                missing_texts[key] = text
+
+        if missing_texts:
+            with self._lock:
+                self._stats["misses"] += len(missing_texts)
+            vectors = embed_fn(list(missing_texts.values()))
+            if len(vectors) != len(missing_texts):
+                raise ValueError(
+                    f"Embedding provider returned {len(vectors)} vectors for {len(missing_texts)} texts"
+                )
+            fresh = dict(zip(missing_texts.keys(), vectors))
+            found.update(fresh)
+            self._remember(fresh)
+            if self.persistent:
+                self._store_persistent(model, fresh)
+
+        return [found[key] for key in keys]
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters since process start (counted per unique text)."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._lru)
+        lookups = stats["memory_hits"] + stats["persistent_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    # ─── Tiers ────────────────────────────────────────────────────────────────
+
+    def _remember(self, entries: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in entries.items():
+                self._lru[key] = vector
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _collection(self) -> Collection:
+        return mongodb.get_collection(self.collection_name)
+
+    def _load_persistent(self, keys: List[str]) -> Dict[str, List[float]]:
+        try:
+            cursor = self._collection().find(
+                {"_id": {"$in": keys}},
+                {"embedding": 1},
+            )
+            return {doc["_id"]: doc["embedding"] for doc in cursor if doc.get("embedding")}
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed, treating as miss: {e}")
+            return {}
+
+    def _store_persistent(self, model: str, entries: Dict[str, List[float]]) -> None:
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": {"model": model, "embedding": vector, "created_at": now}},
+                upsert=True,
+            )
+            for key, vector in entries.items()
+        ]
+        try:
+            self._collection().bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+
+embedding_cache = EmbeddingCache()
+
+
+def get_embedding_cache_stats() -> dict:
+    return embedding_cache.get_stats()
+
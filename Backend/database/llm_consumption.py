@@ -1,14 +1,36 @@
+from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from pymongo import DESCENDING
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 from pymongo.collection import Collection
 from pymongo.database import Database
 
+from database.consumption_recorder import ConsumptionRecorder
 from database.mongodb import mongodb
 
 database: Database = mongodb.get_database()
 llm_consumption_collection: Collection = database.get_collection("LLMConsumption")
+llm_consumption_rollups_collection: Collection = database.get_collection("LLMConsumptionRollups")
+
+LLM_CONSUMPTION_SPILL_PATH = "/tmp/llm-consumption.spill.jsonl"
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+ROLLUP_DIMENSIONS = ("projectId", "userId", "model", "operation")
+# Set on every raw row until it has been added to the rollups
+ROLLUP_PENDING_FIELD = "rollupPending"
+ROLLUP_COMPACTION_BATCH_SIZE = 5000
+
+RAW_ROW_PROJECTION = {
+    "projectId": 1,
+    "userId": 1,
+    "model": 1,
+    "operation": 1,
+    "usage": 1,
+    "estimatedCostUsd": 1,
+    "createdAt": 1,
+}
 
 OPENAI_PRICING_PER_1M_TOKENS = {
     "gpt-5": {"input": 1.25, "output": 10.0},
@@ -33,9 +55,120 @@ def ensure_indexes() -> None:
     llm_consumption_collection.create_index([("projectId", DESCENDING), ("createdAt", DESCENDING)])
     llm_consumption_collection.create_index([("userId", DESCENDING), ("createdAt", DESCENDING)])
     llm_consumption_collection.create_index([("model", DESCENDING), ("createdAt", DESCENDING)])
+    llm_consumption_collection.create_index([(ROLLUP_PENDING_FIELD, ASCENDING)], sparse=True)
+    llm_consumption_rollups_collection.create_index(
+        [("granularity", ASCENDING), ("bucketStart", ASCENDING)] + [(d, ASCENDING) for d in ROLLUP_DIMENSIONS],
+        unique=True,
+    )
+    llm_consumption_rollups_collection.create_index(
+        [("granularity", ASCENDING), ("projectId", ASCENDING), ("bucketStart", ASCENDING)]
+    )
+    llm_consumption_rollups_collection.create_index(
+        [("granularity", ASCENDING), ("userId", ASCENDING), ("bucketStart", ASCENDING)]
+    )
+
+
+# ─── Rollups ─────────────────────────────────────────────────────────────────
+# LLMConsumptionRollups holds one document per (granularity, bucketStart,
+# projectId, userId, model, operation) with summed requests/tokens/cost, so
+# dashboards read a bounded number of buckets instead of scanning every raw row.
+# Buckets are UTC hours and days, like `createdAt`.
+#
+# Rollups are not updated when rows are written: that flush runs at the end of
+# every API request, so it is kept to one insert_many. Rows are inserted with
+# `rollupPending: true` and `compact_llm_consumption_rollups` adds them to their
+# buckets later: the worker runs it after every invocation and drains the
+# backlog on its 5-minute EventBridge schedule, which bounds how stale the
+# rollups (and /llm-consumption/summary) can get.
+
+def rollup_bucket_start(created_at: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return created_at.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"requests": 0, "inputTokens": 0, "outputTokens": 0, "totalTokens": 0, "estimatedCostUsd": 0.0}
+
+
+def aggregate_rollups(documents: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+    """Sum raw consumption rows into {(granularity, bucketStart, *dimensions): totals}."""
+    totals: Dict[tuple, Dict[str, Any]] = defaultdict(_empty_totals)
+    for doc in documents:
+        usage = doc.get("usage") or {}
+        dimensions = tuple(doc.get(d) for d in ROLLUP_DIMENSIONS)
+        for granularity in ROLLUP_GRANULARITIES:
+            bucket = totals[(granularity, rollup_bucket_start(doc["createdAt"], granularity)) + dimensions]
+            bucket["requests"] += 1
+            bucket["inputTokens"] += usage.get("input_tokens", 0)
+            bucket["outputTokens"] += usage.get("output_tokens", 0)
+            bucket["totalTokens"] += usage.get("total_tokens", 0)
+            bucket["estimatedCostUsd"] += doc.get("estimatedCostUsd") or 0.0
+    return totals
+
+
+def rollup_filter(key: tuple) -> Dict[str, Any]:
+    granularity, bucket_start, *dimensions = key
+    return {"granularity": granularity, "bucketStart": bucket_start, **dict(zip(ROLLUP_DIMENSIONS, dimensions))}
+
+
+def apply_rollups(documents: List[Dict[str, Any]]) -> None:
+    """Add raw rows to their hourly and daily rollups (one bulk write)."""
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            rollup_filter(key),
+            {"$inc": totals, "$set": {"updatedAt": now}},
+            upsert=True,
+        )
+        for key, totals in aggregate_rollups(documents).items()
+    ]
+    if operations:
+        llm_consumption_rollups_collection.bulk_write(operations, ordered=False)
+
+
+def compact_llm_consumption_rollups(batch_size: int = ROLLUP_COMPACTION_BATCH_SIZE) -> int:
+    """
+    Add up to `batch_size` pending raw rows to the rollups and clear their flag.
+    Returns the number of rows rolled up.
+
+    Rows are first claimed with a per-run token so concurrent compactions never
+    count a row twice. Rows claimed by a run that died before clearing them stay
+    out of the rollups until rebuild_llm_consumption_rollups.py recomputes the day.
+    """
+    pending_ids = [
+        doc["_id"]
+        for doc in llm_consumption_collection.find({ROLLUP_PENDING_FIELD: True}, {"_id": 1}).limit(batch_size)
+    ]
+    if not pending_ids:
+        return 0
+
+    claim = ObjectId()
+    llm_consumption_collection.update_many(
+        {"_id": {"$in": pending_ids}, ROLLUP_PENDING_FIELD: True},
+        {"$set": {ROLLUP_PENDING_FIELD: claim}},
+    )
+    rows = list(llm_consumption_collection.find({ROLLUP_PENDING_FIELD: claim}, RAW_ROW_PROJECTION))
+    apply_rollups(rows)
+    llm_consumption_collection.update_many(
+        {ROLLUP_PENDING_FIELD: claim},
+        {"$unset": {ROLLUP_PENDING_FIELD: ""}},
+    )
+    return len(rows)
+
+
+# Rows are written in batches off the request path; see database/consumption_recorder.py
+llm_consumption_recorder = ConsumptionRecorder(
+    llm_consumption_collection,
+    spill_path=LLM_CONSUMPTION_SPILL_PATH,
+)
 
 
-ensure_indexes()
+def flush_llm_consumption() -> None:
+    """Write all buffered consumption rows now (end of a Lambda invocation / shutdown)."""
+    llm_consumption_recorder.flush()
 
 
 def normalize_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, int]:
@@ -100,8 +233,10 @@ def insert_llm_consumption(
             normalized_usage["output_tokens"],
         )
 
-    result = llm_consumption_collection.insert_one(
+    document_id = ObjectId()
+    llm_consumption_recorder.record(
         {
+            "_id": document_id,
             "provider": provider,
             "model": model,
             "operation": operation,
@@ -112,9 +247,10 @@ def insert_llm_consumption(
             "estimatedCostUsd": estimated_cost_usd,
             "metadata": metadata or {},
             "createdAt": datetime.utcnow(),
+            ROLLUP_PENDING_FIELD: True,
         }
     )
-    return str(result.inserted_id)
+    return str(document_id)
 
 
 def record_openai_response_usage(
@@ -1,39 +1,132 @@
-from typing import Optional
+"""
+The application's MongoDB clients.
+
+Every client (API, LangGraph checkpointer, worker) is built by
+`create_mongo_client`, so pool sizing, compression, read preference and retryable
+writes come from one place (the MONGODB_* settings) and every pool reports its
+metrics through a `PoolMetricsListener`.
+"""
+import threading
+from importlib.util import find_spec
+from typing import Optional, Union
 
 from loguru import logger
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.database import Database
 from pymongo.errors import ConnectionFailure
 
 from config.settings import get_settings
+from database.pool_metrics import PoolMetricsListener
 
 settings = get_settings()
 
+# Wire compressors that need an optional module; zlib ships with Python
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy"}
+
+
+def available_compressors(preferred: str) -> list[str]:
+    """`preferred` (comma-separated, in preference order) minus those whose module isn't installed."""
+    names = [name.strip() for name in preferred.split(",") if name.strip()]
+    return [name for name in names if name not in COMPRESSOR_MODULES or find_spec(COMPRESSOR_MODULES[name])]
+
+
+def mongo_client_options() -> dict:
+    """Keyword options shared by every MongoClient / AsyncMongoClient."""
+    options = {
+        "appname": settings.APP_NAME,
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "readPreference": settings.MONGODB_READ_PREFERENCE,
+        "retryWrites": settings.MONGODB_RETRY_WRITES,
+    }
+    if settings.MONGODB_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGODB_MAX_IDLE_TIME_MS
+    if settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+    compressors = available_compressors(settings.MONGODB_COMPRESSORS)
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def create_mongo_client(
+        uri: Optional[str] = None,
+        *,
+        asynchronous: bool = False,
+        listener: Optional[PoolMetricsListener] = None,
+) -> Union[MongoClient, AsyncMongoClient]:
+    """Build a client with the configured pool options; `listener` receives its pool events."""
+    options = mongo_client_options()
+    if listener is not None:
+        options["event_listeners"] = [listener]
+    client_class = AsyncMongoClient if asynchronous else MongoClient
+    return client_class(uri or settings.MONGODB_URI, **options)
+
 
 class MongoDB:
     def __init__(self):
         self._client: Optional[MongoClient] = None
         self._db: Optional[Database] = None
+        self._async_client: Optional[AsyncMongoClient] = None
+        self._async_db: Optional[AsyncDatabase] = None
+        self._pool_metrics = PoolMetricsListener(settings.MONGODB_MAX_POOL_SIZE, name="sync")
+        self._async_pool_metrics = PoolMetricsListener(settings.MONGODB_MAX_POOL_SIZE, name="async")
+        self._init_lock = threading.Lock()
 
     def initialize(self):
-        """Initialize the MongoDB client and database."""
-        try:
-            uri = settings.MONGODB_URI
-            db_name = settings.MONGODB_DATABASE
-            
-            self._client = MongoClient(uri)
-            self._db = self._client.get_database(db_name)
-        except ConnectionFailure as e:
-            raise RuntimeError(f"Connection Failure: {str(e)}")
+        """
+        Initialize the MongoDB client and database. A no-op once the client
+        exists: modules reach it at import time, before the lifespan runs.
+        """
+        with self._init_lock:
+            if self._client is not None:
+                return
+            try:
+                db_name = settings.MONGODB_DATABASE
+
+                self._client = create_mongo_client(listener=self._pool_metrics)
+                self._db = self._client.get_database(db_name)
+            except ConnectionFailure as e:
+                raise RuntimeError(f"Connection Failure: {str(e)}")
 
         logger.info(f"MongoDB connection initialized. Database: {db_name}")
 
+    def initialize_async(self):
+        """Initialize the asyncio MongoDB client used by async routes (once)."""
+        with self._init_lock:
+            if self._async_client is not None:
+                return
+            db_name = settings.MONGODB_DATABASE
+
+            self._async_client = create_mongo_client(asynchronous=True, listener=self._async_pool_metrics)
+            self._async_db = self._async_client.get_database(db_name)
+
+        logger.info(f"Async MongoDB client initialized. Database: {db_name}")
+
     def close(self):
         """Close the MongoDB client."""
         if self._client:
             self._client.close()
+            self._client = None
+            self._db = None
             logger.info("MongoDB connection closed.")
 
+    async def aclose(self):
+        """Close the asyncio MongoDB client."""
+        if self._async_client:
+            await self._async_client.close()
+            self._async_client = None
+            self._async_db = None
+            logger.info("Async MongoDB connection closed.")
+
+    def get_client(self) -> MongoClient:
+        """Retrieve the shared MongoClient (and its connection pool)."""
+        if self._client is None:
+            self.initialize()
+        return self._client
+
     def get_database(self) -> Database:
         """Retrieve the database instance."""
         if self._db is None:
@@ -47,5 +140,22 @@ class MongoDB:
             self.initialize()
         return self._db[collection_name]
 
+    def get_async_database(self) -> AsyncDatabase:
+        """Retrieve the asyncio database instance (for `async def` routes)."""
+        if self._async_db is None:
+            self.initialize_async()
+        return self._async_db
+
+    def get_async_collection(self, collection_name: str) -> AsyncCollection:
+        """Retrieve an asyncio collection; operations on it must be awaited."""
+        return self.get_async_database()[collection_name]
+
+    def get_pool_metrics(self) -> dict:
+        """Connection pool metrics of the sync and async clients (zeros for one not yet created)."""
+        return {
+            "sync": self._pool_metrics.snapshot(),
+            "async": self._async_pool_metrics.snapshot(),
+        }
+
 
 mongodb = MongoDB()
@@ -0,0 +1,149 @@
+"""
+Connection pool metrics for the shared Mongo clients.
+
+A `PoolMetricsListener` is registered on every client built by
+`create_mongo_client`, and counts pool events as pymongo emits them:
+1. connections open / created / closed, per server address
+2. connections checked out right now, the peak, and saturation
+   (checked out / maxPoolSize) of the busiest server
+3. checkouts, failed checkouts by reason (e.g. "timeout" when the wait queue
+   timed out) and how long callers waited for a connection
+
+Listener callbacks run on the thread doing the checkout, so they only update
+counters under a lock and never do I/O.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+from pymongo import monitoring
+
+# Upper bounds (ms) of the checkout-wait histogram buckets; the last one is open
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def _address_key(address) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Counts one client's pool events; `snapshot()` returns the current metrics."""
+
+    def __init__(self, max_pool_size: int, name: str = "sync"):
+        self.max_pool_size = max_pool_size
+        self.name = name
+        self._lock = threading.Lock()
+        self._open: Dict[str, int] = defaultdict(int)
+        self._in_use: Dict[str, int] = defaultdict(int)
+        self._counters = {
+            "poolsCleared": 0,
+            "connectionsCreated": 0,
+            "connectionsClosed": 0,
+            "checkouts": 0,
+            "checkoutsFailed": 0,
+        }
+        self._failures_by_reason: Dict[str, int] = defaultdict(int)
+        self._peak_in_use = 0
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._wait_histogram = [0] * (len(CHECKOUT_WAIT_BUCKETS_MS) + 1)
+
+    # ─── Pool events ──────────────────────────────────────────────────────────
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        with self._lock:
+            self._counters["poolsCleared"] += 1
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        key = _address_key(event.address)
+        with self._lock:
+            self._open.pop(key, None)
+            self._in_use.pop(key, None)
+
+    # ─── Connection events ────────────────────────────────────────────────────
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        with self._lock:
+            self._open[_address_key(event.address)] += 1
+            self._counters["connectionsCreated"] += 1
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        key = _address_key(event.address)
+        with self._lock:
+            self._open[key] = max(0, self._open[key] - 1)
+            self._counters["connectionsClosed"] += 1
+
+    # ─── Checkout events ──────────────────────────────────────────────────────
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        pass
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        with self._lock:
+            self._counters["checkoutsFailed"] += 1
+            self._failures_by_reason[str(event.reason)] += 1
+            self._observe_wait(event.duration)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        key = _address_key(event.address)
+        with self._lock:
+            self._counters["checkouts"] += 1
+            self._in_use[key] += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use[key])
+            self._observe_wait(event.duration)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        key = _address_key(event.address)
+        with self._lock:
+            self._in_use[key] = max(0, self._in_use[key] - 1)
+
+    # ─── Reporting ────────────────────────────────────────────────────────────
+
+    def _observe_wait(self, duration_seconds: Optional[float]) -> None:
+        """Record one checkout wait; caller holds the lock."""
+        if duration_seconds is None:
+            return
+        wait_ms = duration_seconds * 1000
+        self._wait_total_ms += wait_ms
+        self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+        bucket = next(
+            (i for i, bound in enumerate(CHECKOUT_WAIT_BUCKETS_MS) if wait_ms <= bound),
+            len(CHECKOUT_WAIT_BUCKETS_MS),
+        )
+        self._wait_histogram[bucket] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            in_use = sum(self._in_use.values())
+            busiest = max(self._in_use.values(), default=0)
+            waits = self._counters["checkouts"] + self._counters["checkoutsFailed"]
+            labels = [f"<={bound}ms" for bound in CHECKOUT_WAIT_BUCKETS_MS]
+            labels.append(f">{CHECKOUT_WAIT_BUCKETS_MS[-1]}ms")
+            return {
+                "client": self.name,
+                "maxPoolSize": self.max_pool_size,
+                "open": sum(self._open.values()),
+                "inUse": in_use,
+                "peakInUse": self._peak_in_use,
+                "saturation": round(busiest / self.max_pool_size, 4) if self.max_pool_size else None,
+                "peakSaturation": round(self._peak_in_use / self.max_pool_size, 4) if self.max_pool_size else None,
+                "byServer": {
+                    key: {"open": self._open.get(key, 0), "inUse": self._in_use.get(key, 0)}
+                    for key in sorted(set(self._open) | set(self._in_use))
+                },
+                **self._counters,
+                "checkoutFailuresByReason": dict(self._failures_by_reason),
+                "checkoutWaitAvgMs": round(self._wait_total_ms / waits, 3) if waits else 0.0,
+                "checkoutWaitMaxMs": round(self._wait_max_ms, 3),
+                "checkoutWaitHistogram": dict(zip(labels, self._wait_histogram)),
+            }
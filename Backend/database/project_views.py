@@ -0,0 +1,112 @@
+"""
+Lightweight read views of `Project` documents.
+
+A generated project carries its steps (with image metadata), tools, estimation,
+visual DNA, context images, feedback and Q&A; list and status endpoints need
+none of that. The projections below make Mongo return only the fields each view
+reads, and the full document is loaded only by the project detail route:
+1. `PROJECT_SUMMARY_PROJECTION` / `project_summary()`: one row of the project list
+   (id, title, createdAt, lastActivity, statuses, preview image URL, step progress)
+2. `GENERATION_STATUS_PROJECTION`: the three generation statuses
+3. `OWNER_PROJECTION`: just `userId`, for ownership checks
+
+Project lists can be paginated by `_id` (newest first): the cursor is the id of
+the last project returned, so a page never shifts when projects are added.
+"""
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from database.mongodb import mongodb
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+OWNER_PROJECTION = {"userId": 1}
+
+GENERATION_STATUS_PROJECTION = {
+    "userId": 1,
+    "generation_status": 1,
+    "tool_generation.status": 1,
+    "step_generation.status": 1,
+    "estimation_generation.status": 1,
+}
+
+PROJECT_SUMMARY_PROJECTION = {
+    **GENERATION_STATUS_PROJECTION,
+    "projectTitle": 1,
+    "createdAt": 1,
+    "lastActivity": 1,
+    "completed": 1,
+    "result_preview_image.status": 1,
+    "result_preview_image.url": 1,
+    # Only the flag of each step, for progress
+    "step_generation.steps.completed": 1,
+}
+
+database: Database = mongodb.get_database()
+project_collection: Collection = database.get_collection("Project")
+
+
+def ensure_indexes() -> None:
+    project_collection.create_index([("userId", ASCENDING), ("_id", DESCENDING)])
+    # Stalled step image schedules (worker/image_scheduler.py sweep_stalled)
+    project_collection.create_index(
+        [("image_schedule.updated_at", ASCENDING)],
+        name="image_schedule_open",
+        partialFilterExpression={"image_schedule.completed": False},
+    )
+
+
+def step_progress(project: dict) -> float:
+    """Fraction of steps marked completed (0 when steps aren't generated)."""
+    steps = (project.get("step_generation") or {}).get("steps") or []
+    if not steps:
+        return 0
+    return sum(1 for s in steps if s.get("completed") is True) / len(steps)
+
+
+def generation_statuses(project: dict) -> dict:
+    """Status of each generation stage, "Not started" when a stage has none."""
+    statuses = {}
+    for name, field in (("tools", "tool_generation"), ("steps", "step_generation"), ("estimation", "estimation_generation")):
+        stage = project.get(field)
+        statuses[name] = stage.get("status", "Not started") if isinstance(stage, dict) else "Not started"
+    return statuses
+
+
+def project_summary(project: dict) -> dict:
+    """List row for a project fetched with PROJECT_SUMMARY_PROJECTION."""
+    preview = project.get("result_preview_image")
+    preview = preview if isinstance(preview, dict) else {}
+    return {
+        "_id": str(project["_id"]),
+        "projectTitle": project.get("projectTitle"),
+        "userId": str(project.get("userId")) if project.get("userId") else None,
+        "createdAt": project.get("createdAt"),
+        "lastActivity": project.get("lastActivity"),
+        "completed": project.get("completed", False),
+        "generation_status": project.get("generation_status"),
+        **generation_statuses(project),
+        "previewImageUrl": preview.get("url") or None,
+        "previewImageStatus": preview.get("status"),
+        "progress": step_progress(project),
+    }
+
+
+def user_projects_page_query(user_id: str, cursor: Optional[str] = None) -> dict:
+    """Filter for one page of a user's projects; raises ValueError on a malformed cursor."""
+    query = {"userId": user_id}
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        query["_id"] = {"$lt": ObjectId(cursor)}
+    return query
+
+
+def next_page_cursor(rows: List[dict], limit: int) -> Optional[str]:
+    """Cursor for the page after `rows` (None when `rows` was the last page)."""
+    return str(rows[limit - 1]["_id"]) if len(rows) > limit else None
@@ -5,28 +5,19 @@ Centralized Qdrant client and operations for embeddings and vector search.
 import uuid
 from typing import List, Any, Optional
 
-from openai import OpenAI
 from qdrant_client import QdrantClient
 from qdrant_client.http.exceptions import UnexpectedResponse
-from qdrant_client.models import PointStruct, VectorParams, Distance
+from qdrant_client.models import PointStruct, VectorParams, Distance, QueryRequest
 
 from config.settings import get_settings
+from database.embedding_cache import embedding_cache
+from services.clients import get_openai_client
 
 settings = get_settings()
 
-# Initialize OpenAI client for embeddings
-_client: Optional[OpenAI] = None
 _qdrant_client: Optional[QdrantClient] = None
 
 
-def _get_openai_client() -> OpenAI:
-    """Get or create OpenAI client for embeddings."""
-    global _client
-    if _client is None:
-        _client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    return _client
-
-
 def get_qdrant_client() -> QdrantClient:
     """Get or create Qdrant client instance."""
     global _qdrant_client
@@ -45,13 +36,17 @@ def create_embeddings_for_texts(texts: List[str], model: str = "text-embedding-3
     """
     Creates embeddings via OpenAI for a list of strings (batched).
     Returns list of embedding vectors in same order as texts.
+    Texts already embedded with `model` are served from the embedding cache.
     """
     if not texts:
         return []
 
-    client = _get_openai_client()
-    resp = client.embeddings.create(model=model, input=texts)
-    return [item.embedding for item in resp.data]
+    def _embed(missing: List[str]) -> List[List[float]]:
+        client = get_openai_client()
+        resp = client.embeddings.create(model=model, input=missing)
+        return [item.embedding for item in resp.data]
+
+    return embedding_cache.get_or_create(texts, model, _embed)
 
 
 def upsert_embeddings_to_qdrant(
@@ -154,3 +149,46 @@ def search_similar_vectors(
     except Exception as e:
         print(f"Error searching Qdrant collection {collection_name}: {e}")
         return []
+
+
+def search_similar_vectors_batch(
+        query_vectors: List[List[float]],
+        collection_name: str,
+        limit: int = 5,
+        score_threshold: Optional[float] = None
+) -> List[List[Any]]:
+    """
+    Search for similar vectors for several queries in a single Qdrant round trip.
+
+    Uses query_batch_points(). Falls back to returning an empty result list per
+    query and logging on any error.
+
+    Args:
+        query_vectors: Query embedding vectors
+        collection_name: Qdrant collection name
+        limit: Maximum number of results per query
+        score_threshold: Minimum similarity score (optional)
+
+    Returns:
+        One list of ScoredPoint results per query vector, in the same order
+    """
+    if not query_vectors:
+        return []
+
+    qclient = get_qdrant_client()
+
+    try:
+        requests = []
+        for query_vector in query_vectors:
+            kwargs = dict(query=query_vector, limit=limit, with_payload=True)
+            # score_threshold is only passed when explicitly set to avoid filtering everything
+            if score_threshold is not None:
+                kwargs["score_threshold"] = score_threshold
+            requests.append(QueryRequest(**kwargs))
+
+        responses = qclient.query_batch_points(collection_name=collection_name, requests=requests)
+        return [list(response.points) for response in responses]
+
+    except Exception as e:
+        print(f"Error batch searching Qdrant collection {collection_name}: {e}")
+        return [[] for _ in query_vectors]
@@ -0,0 +1,78 @@
+"""
+Index of user-uploaded images stored in S3.
+
+S3 keys look like `user-uploads/{user}/projects/{project}/{source}/threads/{thread}/{file}`
+and S3 cannot list by a mid-path segment, so every upload is also recorded here
+(one document per object, `_id` = S3 key) and per-project lookups use the
+`project_id` index instead of scanning the bucket.
+"""
+from datetime import datetime
+from typing import Optional
+
+from loguru import logger
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from database.mongodb import mongodb
+
+database: Database = mongodb.get_database()
+user_uploads_collection: Collection = database.get_collection("UserUploads")
+
+
+def ensure_indexes() -> None:
+    user_uploads_collection.create_index([("project_id", ASCENDING), ("created_at", ASCENDING)])
+    user_uploads_collection.create_index([("user_id", ASCENDING), ("created_at", ASCENDING)])
+
+
+def record_user_upload(
+        upload: dict,
+        *,
+        user_id: Optional[str],
+        project_id: str,
+        thread_id: Optional[str],
+        source: str,
+        step_number: Optional[int] = None,
+        created_at: Optional[datetime] = None,
+) -> None:
+    """
+    Upsert the index entry for an uploaded object (idempotent, keyed by S3 key).
+
+    Failures are logged and re-raised: an object missing from the index is
+    invisible to `list_project_uploads`, so the upload must fail (and be retried)
+    rather than silently succeed.
+    """
+    document = {
+        "bucket": upload.get("bucket"),
+        "key": upload["key"],
+        "url": upload.get("url"),
+        "content_type": upload.get("content_type"),
+        "size_bytes": upload.get("size_bytes"),
+        "user_id": user_id,
+        "project_id": project_id,
+        "thread_id": thread_id,
+        "source": source,
+        "created_at": created_at or datetime.utcnow(),
+    }
+    if step_number is not None:
+        document["step_number"] = step_number
+
+    try:
+        user_uploads_collection.update_one(
+            {"_id": upload["key"]},
+            {"$setOnInsert": document},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.error(f"Failed to index user upload {upload['key']}: {e}")
+        raise
+
+
+def list_project_uploads(project_id: str) -> list[dict]:
+    """All indexed uploads for a project, oldest first."""
+    return list(
+        user_uploads_collection.find(
+            {"project_id": project_id},
+            {"_id": 0, "bucket": 1, "key": 1, "url": 1, "content_type": 1, "created_at": 1},
+        ).sort("created_at", ASCENDING)
+    )
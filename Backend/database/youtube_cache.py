@@ -0,0 +1,215 @@
+"""
+Cache for the YouTube tutorial lookup done for every generated project.
+
+The lookup is summary -> (LLM) search query -> YouTube search -> (LLM) chosen
+video, and the same DIY topics recur constantly, so it is cached at two levels:
+
+1. `YouTubeVideoCache`: summary -> chosen video. Keyed by the hash of the
+   normalized summary; entries also carry the project_id so a near-identical
+   summary can reuse them via its nearest neighbours in `project_summaries`.
+2. `YouTubeSearchCache`: normalized search query -> YouTube search results.
+
+Both levels expire through Mongo TTL indexes on `expires_at`. Every YouTube
+search is also counted against a daily quota budget (`YouTubeQuota`, one
+document per quota day; the API quota resets at midnight Pacific time), and
+searches are refused once the budget is spent.
+
+Cache failures are logged and treated as misses; they never fail the lookup.
+"""
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from config.settings import get_settings
+from database.mongodb import mongodb
+
+# YouTube Data API cost of one search.list call
+YOUTUBE_SEARCH_QUOTA_COST = 100
+YOUTUBE_QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+database: Database = mongodb.get_database()
+video_cache_collection: Collection = database.get_collection("YouTubeVideoCache")
+search_cache_collection: Collection = database.get_collection("YouTubeSearchCache")
+quota_collection: Collection = database.get_collection("YouTubeQuota")
+
+
+def ensure_indexes() -> None:
+    video_cache_collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+    video_cache_collection.create_index([("project_id", ASCENDING)])
+    search_cache_collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip punctuation/quotes and collapse whitespace."""
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def summary_cache_key(summary: str) -> str:
+    return hashlib.sha256(normalize_text(summary).encode("utf-8")).hexdigest()
+
+
+# ─── Level one: summary -> video ─────────────────────────────────────────────
+
+def get_cached_video(summary: str) -> Optional[dict]:
+    try:
+        doc = video_cache_collection.find_one(
+            {"_id": summary_cache_key(summary), "expires_at": {"$gt": datetime.utcnow()}},
+        )
+    except Exception as e:
+        logger.warning(f"YouTube video cache lookup failed, treating as miss: {e}")
+        return None
+    return doc
+
+
+def get_cached_video_for_projects(project_ids: List[str]) -> Optional[dict]:
+    """First unexpired cached video among `project_ids` (in the given order)."""
+    if not project_ids:
+        return None
+    try:
+        docs = {
+            doc["project_id"]: doc
+            for doc in video_cache_collection.find(
+                {"project_id": {"$in": project_ids}, "expires_at": {"$gt": datetime.utcnow()}},
+            )
+        }
+    except Exception as e:
+        logger.warning(f"YouTube video cache lookup failed, treating as miss: {e}")
+        return None
+    return next((docs[pid] for pid in project_ids if pid in docs), None)
+
+
+def store_cached_video(
+        summary: str,
+        video_url: str,
+        *,
+        project_id: Optional[str] = None,
+        query: Optional[str] = None,
+        source: str = "search",
+        expires_at: Optional[datetime] = None,
+) -> None:
+    """
+    Cache `video_url` for `summary` for YOUTUBE_VIDEO_CACHE_TTL_DAYS, or until
+    `expires_at` for an entry copied from another one (it must not outlive it).
+    """
+    now = datetime.utcnow()
+    expires_at = expires_at or now + timedelta(days=get_settings().YOUTUBE_VIDEO_CACHE_TTL_DAYS)
+    try:
+        video_cache_collection.update_one(
+            {"_id": summary_cache_key(summary)},
+            {"$set": {
+                "video_url": video_url,
+                "project_id": project_id,
+                "query": query,
+                "source": source,
+                "created_at": now,
+                "expires_at": expires_at,
+            }},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.warning(f"YouTube video cache write failed: {e}")
+
+
+# ─── Level two: search query -> results ──────────────────────────────────────
+
+def get_cached_search(query: str) -> Optional[List[dict]]:
+    try:
+        doc = search_cache_collection.find_one(
+            {"_id": normalize_text(query), "expires_at": {"$gt": datetime.utcnow()}},
+            {"videos": 1},
+        )
+    except Exception as e:
+        logger.warning(f"YouTube search cache lookup failed, treating as miss: {e}")
+        return None
+    return doc["videos"] if doc else None
+
+
+def store_cached_search(query: str, videos: List[dict]) -> None:
+    now = datetime.utcnow()
+    ttl = timedelta(hours=get_settings().YOUTUBE_SEARCH_CACHE_TTL_HOURS)
+    try:
+        search_cache_collection.update_one(
+            {"_id": normalize_text(query)},
+            {"$set": {"videos": videos, "created_at": now, "expires_at": now + ttl}},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.warning(f"YouTube search cache write failed: {e}")
+
+
+# ─── Quota ───────────────────────────────────────────────────────────────────
+
+def _quota_day() -> str:
+    return datetime.now(YOUTUBE_QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+
+def _try_reserve(day: str, units: int, budget: int) -> bool:
+    doc = quota_collection.find_one_and_update(
+        {"_id": day, "units": {"$lte": budget - units}},
+        {"$inc": {"units": units, "calls": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc is not None
+
+
+def reserve_youtube_quota(units: int = YOUTUBE_SEARCH_QUOTA_COST) -> bool:
+    """
+    Count `units` against today's budget. Returns False (nothing counted) when
+    the call would exceed YOUTUBE_DAILY_QUOTA_BUDGET.
+    """
+    budget = get_settings().YOUTUBE_DAILY_QUOTA_BUDGET
+    day = _quota_day()
+    try:
+        if _try_reserve(day, units, budget):
+            return True
+        # Either the budget is spent or today's counter doesn't exist yet
+        quota_collection.update_one(
+            {"_id": day},
+            {"$setOnInsert": {"units": 0, "calls": 0, "refused": 0}},
+            upsert=True,
+        )
+        if _try_reserve(day, units, budget):
+            return True
+        quota_collection.update_one({"_id": day}, {"$inc": {"refused": 1}})
+        return False
+    except Exception as e:
+        # Don't lose tutorial videos because the counter is unavailable
+        logger.warning(f"YouTube quota counter unavailable, allowing call: {e}")
+        return True
+
+
+def get_youtube_quota_usage(day: Optional[str] = None) -> dict:
+    day = day or _quota_day()
+    doc = quota_collection.find_one({"_id": day}) or {}
+    return {
+        "day": day,
+        "units": doc.get("units", 0),
+        "calls": doc.get("calls", 0),
+        "refused": doc.get("refused", 0),
+        "budget": get_settings().YOUTUBE_DAILY_QUOTA_BUDGET,
+    }
+
+
+def get_youtube_cache_stats() -> dict:
+    """Today's quota usage plus live cache entries per level (videos split by source)."""
+    now = datetime.utcnow()
+    videos_by_source = {
+        row["_id"]: row["entries"]
+        for row in video_cache_collection.aggregate([
+            {"$match": {"expires_at": {"$gt": now}}},
+            {"$group": {"_id": "$source", "entries": {"$sum": 1}}},
+        ])
+    }
+    return {
+        "quota": get_youtube_quota_usage(),
+        "videoEntries": videos_by_source,
+        "searchEntries": search_cache_collection.count_documents({"expires_at": {"$gt": now}}),
+    }
@@ -1,4 +1,5 @@
 # Backend/main.py
+import json
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
@@ -8,6 +9,7 @@ from mangum import Mangum
 
 from config.logger import setup_logging
 from config.settings import get_settings
+from database.llm_consumption import flush_llm_consumption, llm_consumption_recorder
 from database.mongodb import mongodb
 
 load_dotenv()
@@ -28,6 +30,7 @@ from routes import (
     feedback,
     llm_consumption,
     logs,
+    metrics,
     information_gathering_agent,
     project_assistant_agent
 )
@@ -40,6 +43,9 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    llm_consumption_recorder.close()
+    await mongodb.aclose()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -86,6 +92,7 @@ app.include_router(generation.router, tags=["Generation"])
 app.include_router(feedback.router, tags=["Feedback"])
 app.include_router(llm_consumption.router, tags=["LLM Consumption"])
 app.include_router(logs.router, tags=["Logs"])
+app.include_router(metrics.router, tags=["Metrics"])
 app.include_router(information_gathering_agent.router, prefix="/api/v1", tags=["Information Gathering Agent"])
 app.include_router(project_assistant_agent.router, prefix="/api/v1", tags=["Project Assistant Agent"])
 
@@ -93,6 +100,12 @@ asgi_handler = Mangum(app, lifespan="off")
 
 
 def handler(event, context):
+    if event.get("task") == "migrate_indexes":
+        # Direct invocation by the deploy workflow, after the code update
+        from migrate_indexes import migrate_indexes
+
+        return {"statusCode": 200, "body": json.dumps({"indexes": migrate_indexes(only=event.get("only"))})}
+
     method = (
         event.get("requestContext", {}).get("http", {}).get("method")
         or event.get("httpMethod")
@@ -117,4 +130,9 @@ def handler(event, context):
             "body": "",
         }
 
-    return asgi_handler(event, context)
+    try:
+        return asgi_handler(event, context)
+    finally:
+        # The Lambda environment is frozen after returning, so nothing may stay buffered.
+        # This is one insert_many; rollups are compacted later by the worker.
+        flush_llm_consumption()
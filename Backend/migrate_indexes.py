@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Create the MongoDB indexes the application relies on.
+
+Index creation used to run at import time in every module that owns a
+collection, which cost several `createIndexes` round trips on every API and
+worker cold start. It now runs once per deploy (or whenever a new index is
+added), through this command:
+1. Import each module that declares indexes
+2. Call its `ensure_indexes()` (idempotent: existing indexes are left as-is)
+
+The endpoint deploy workflows run it inside the freshly deployed Lambda, which
+has the Mongo settings, by invoking it with `{"task": "migrate_indexes"}`
+(see main.handler).
+"""
+
+import argparse
+import time
+from importlib import import_module
+
+# name -> module defining ensure_indexes()
+INDEX_MODULES = {
+    "user_uploads": "database.user_uploads",
+    "llm_consumption": "database.llm_consumption",
+    "youtube_cache": "database.youtube_cache",
+    "embedding_cache": "database.embedding_cache",
+    "project_views": "database.project_views",
+    "logs": "routes.logs",
+}
+
+
+def migrate_indexes(only: list[str] | None = None) -> list[str]:
+    names = only or list(INDEX_MODULES)
+    unknown = set(names) - set(INDEX_MODULES)
+    if unknown:
+        raise SystemExit(f"Unknown index module(s): {', '.join(sorted(unknown))}")
+
+    for name in names:
+        started = time.perf_counter()
+        import_module(INDEX_MODULES[name]).ensure_indexes()
+        print(f"✅ {name}: indexes ensured in {time.perf_counter() - started:.2f}s")
+    return names
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create MongoDB indexes.")
+    parser.add_argument("--only", type=lambda value: [v.strip() for v in value.split(",") if v.strip()],
+                        default=None, help=f"comma-separated subset of: {', '.join(INDEX_MODULES)}")
+    args = parser.parse_args()
+
+    print("🚀 Ensuring MongoDB indexes...")
+    migrate_indexes(only=args.only)
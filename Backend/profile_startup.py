@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Cold-start import profiler for the API (`main`) and the worker (`worker_lambda`).
+
+Runs `python -X importtime -c "import <target>"` in a fresh interpreter (so
+nothing is already cached in sys.modules) and reports:
+1. total wall time of the import
+2. the slowest modules by cumulative import time
+3. cumulative time per top-level package (fastapi, langchain, boto3, ...)
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TARGETS = {
+    "main": (BACKEND_DIR, "main"),
+    # The worker is packaged flat (helper.py, pipeline.py next to worker_lambda.py)
+    "worker": (os.path.join(BACKEND_DIR, "worker"), "worker_lambda"),
+}
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def run_importtime(target: str) -> tuple[float, list[tuple[int, int, int, str]]]:
+    """Import `target` once in a subprocess; returns (wall seconds, [(self_us, cumulative_us, depth, module)])."""
+    cwd, module = TARGETS[target]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")]))}
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-15:])
+        raise SystemExit(f"❌ import {module} failed:\n{tail}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return wall, rows
+
+
+def summarize(rows: list[tuple[int, int, int, str]], top: int) -> None:
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    print(f"\n🐢 Slowest {len(slowest)} modules (cumulative):")
+    for self_us, cumulative_us, _, name in slowest:
+        print(f"  {cumulative_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {name}")
+
+    # Top-level entries (depth 0) are the imports made directly by the target's import chain
+    by_package: dict[str, int] = defaultdict(int)
+    for _, cumulative_us, depth, name in rows:
+        if depth == 0:
+            by_package[name.split(".")[0]] += cumulative_us
+    print("\n📦 Cumulative time per top-level package:")
+    for package, cumulative_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {package}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile cold-start import time.")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--runs", type=int, default=3, help="report the fastest of N runs (filters disk-cache noise)")
+    args = parser.parse_args()
+
+    print(f"🚀 Profiling cold import of {args.target} ({args.runs} runs)...")
+    results = [run_importtime(args.target) for _ in range(max(1, args.runs))]
+    for i, (wall, _) in enumerate(results, 1):
+        print(f"  run {i}: {wall * 1000:.0f} ms")
+    best_wall, best_rows = min(results, key=lambda result: result[0])
+    print(f"✅ Fastest cold import: {best_wall * 1000:.0f} ms (includes interpreter start-up)")
+    summarize(best_rows, args.top)
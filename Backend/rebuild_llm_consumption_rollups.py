@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Rebuild LLMConsumptionRollups from the raw LLMConsumption rows.
+
+Rollups are maintained by compact_llm_consumption_rollups; this job backfills
+rows written before rollups existed and repairs buckets if a compaction was
+ever lost:
+1. Walk the range one UTC day at a time
+2. Re-aggregate that day's raw rows into hourly and daily buckets
+3. Replace the day's rollup documents with the recomputed ones and clear the
+   rows' pending flag, since they are now counted
+
+Only run it over closed days (the default range ends at the start of today, UTC):
+increments written to a day while it is being rebuilt would be overwritten.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ASCENDING
+
+from database.llm_consumption import (
+    RAW_ROW_PROJECTION,
+    ROLLUP_GRANULARITIES,
+    ROLLUP_PENDING_FIELD,
+    aggregate_rollups,
+    llm_consumption_collection,
+    llm_consumption_rollups_collection,
+    rollup_bucket_start,
+    rollup_filter,
+)
+
+def rebuild_day(day: datetime, dry_run: bool = False) -> dict:
+    next_day = day + timedelta(days=1)
+    rows = list(
+        llm_consumption_collection.find(
+            {"createdAt": {"$gte": day, "$lt": next_day}},
+            RAW_ROW_PROJECTION,
+        )
+    )
+    rollups = [
+        {**rollup_filter(key), **totals, "updatedAt": datetime.utcnow()}
+        for key, totals in aggregate_rollups(rows).items()
+    ]
+
+    if not dry_run:
+        llm_consumption_rollups_collection.delete_many({
+            "granularity": {"$in": list(ROLLUP_GRANULARITIES)},
+            "bucketStart": {"$gte": day, "$lt": next_day},
+        })
+        if rollups:
+            llm_consumption_rollups_collection.insert_many(rollups, ordered=False)
+        llm_consumption_collection.update_many(
+            {"createdAt": {"$gte": day, "$lt": next_day}, ROLLUP_PENDING_FIELD: {"$exists": True}},
+            {"$unset": {ROLLUP_PENDING_FIELD: ""}},
+        )
+
+    return {"rows": len(rows), "rollups": len(rollups)}
+
+
+def rebuild_llm_consumption_rollups(
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        dry_run: bool = False,
+) -> dict:
+    until = rollup_bucket_start(until or datetime.utcnow(), "day")
+    if since is None:
+        first = llm_consumption_collection.find_one({}, {"createdAt": 1}, sort=[("createdAt", ASCENDING)])
+        if not first:
+            return {"days": 0, "rows": 0, "rollups": 0}
+        since = first["createdAt"]
+    day = rollup_bucket_start(since, "day")
+
+    stats = {"days": 0, "rows": 0, "rollups": 0}
+    while day < until:
+        result = rebuild_day(day, dry_run=dry_run)
+        print(f"📅 {day:%Y-%m-%d}: {result['rows']} rows -> {result['rollups']} rollups")
+        stats["days"] += 1
+        stats["rows"] += result["rows"]
+        stats["rollups"] += result["rollups"]
+        day += timedelta(days=1)
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild LLM consumption rollups from raw rows.")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="first UTC day to rebuild (default: oldest raw row)")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None,
+                        help="UTC day to stop before (default: today)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    print(f"🚀 Rebuilding LLM consumption rollups{' (dry run)' if args.dry_run else ''}...")
+    result = rebuild_llm_consumption_rollups(since=args.since, until=args.until, dry_run=args.dry_run)
+    print(f"✅ Rebuilt {result['days']} days: {result['rows']} rows -> {result['rollups']} rollups")
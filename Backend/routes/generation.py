@@ -3,38 +3,36 @@ import os
 # Import tools reuse functions from chatbot
 import sys
 
-import boto3
 from bson import ObjectId
 from fastapi import APIRouter, HTTPException
 from fastapi import Depends
-from pymongo.collection import Collection
-from pymongo.database import Database
+from fastapi.concurrency import run_in_threadpool
+from pymongo.asynchronous.collection import AsyncCollection
 
 from config.settings import get_settings
 from database.mongodb import mongodb
-from routes.logs import insert_log_event
-from security.current_user import get_current_app_user, require_user_match
+from database.project_views import GENERATION_STATUS_PROJECTION, OWNER_PROJECTION, generation_statuses
+from database.youtube_cache import get_youtube_cache_stats
+from routes.logs import insert_log_event_async
+from security.current_user import get_current_admin_user, get_current_app_user, require_user_match
+from services.clients import get_sqs_client
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 router = APIRouter(prefix="/generation")
 settings = get_settings()
 
-sqs = boto3.client("sqs", region_name=settings.AWS_REGION)
-database: Database = mongodb.get_database()
-project_collection: Collection = database.get_collection("Project")
-steps_collection: Collection = database.get_collection("ProjectSteps")
+project_collection: AsyncCollection = mongodb.get_async_collection("Project")
 
 
 # Pydantic models for request/response
 
 @router.get("/tools/{project_id}")
 async def get_generated_tools(project_id: str, current_user: dict = Depends(get_current_app_user)):
-    doc = project_collection.find_one({"_id": ObjectId(project_id)}, {"tool_generation": 1})
+    doc = await project_collection.find_one({"_id": ObjectId(project_id)}, {**OWNER_PROJECTION, "tool_generation": 1})
     if not doc:
         raise HTTPException(status_code=404, detail="Project not found")
-    full_doc = project_collection.find_one({"_id": ObjectId(project_id)}, {"userId": 1})
-    require_user_match(str(full_doc.get("userId")), current_user)
+    require_user_match(str(doc.get("userId")), current_user)
     if "tool_generation" not in doc or doc["tool_generation"] is None:
         raise HTTPException(status_code=404, detail="Tools not generated yet")
     return {"project_id": project_id, "tools_data": doc["tool_generation"]}
@@ -42,11 +40,10 @@ async def get_generated_tools(project_id: str, current_user: dict = Depends(get_
 
 @router.get("/steps/{project_id}")
 async def get_generated_steps(project_id: str, current_user: dict = Depends(get_current_app_user)):
-    doc = project_collection.find_one({"_id": ObjectId(project_id)}, {"step_generation": 1})
+    doc = await project_collection.find_one({"_id": ObjectId(project_id)}, {**OWNER_PROJECTION, "step_generation": 1})
     if not doc:
         raise HTTPException(status_code=404, detail="Project not found")
-    full_doc = project_collection.find_one({"_id": ObjectId(project_id)}, {"userId": 1})
-    require_user_match(str(full_doc.get("userId")), current_user)
+    require_user_match(str(doc.get("userId")), current_user)
     steps_payload = doc.get("step_generation")
     if not steps_payload:
         raise HTTPException(status_code=404, detail="Steps not generated yet")
@@ -55,11 +52,10 @@ async def get_generated_steps(project_id: str, current_user: dict = Depends(get_
 
 @router.get("/estimation/{project_id}")
 async def get_generated_estimation(project_id: str, current_user: dict = Depends(get_current_app_user)):
-    doc = project_collection.find_one({"_id": ObjectId(project_id)}, {"estimation_generation": 1})
+    doc = await project_collection.find_one({"_id": ObjectId(project_id)}, {**OWNER_PROJECTION, "estimation_generation": 1})
     if not doc:
         raise HTTPException(status_code=404, detail="Project not found")
-    full_doc = project_collection.find_one({"_id": ObjectId(project_id)}, {"userId": 1})
-    require_user_match(str(full_doc.get("userId")), current_user)
+    require_user_match(str(doc.get("userId")), current_user)
     if "estimation_generation" not in doc or doc["estimation_generation"] is None:
         raise HTTPException(status_code=404, detail="Estimation not generated yet")
     return {"project_id": project_id, "estimation_data": doc["estimation_generation"]}
@@ -68,7 +64,7 @@ async def get_generated_estimation(project_id: str, current_user: dict = Depends
 @router.post("/all/{project}")
 async def generate(project, current_user: dict = Depends(get_current_app_user)):
     try:
-        cursor = project_collection.find_one({"_id": ObjectId(project)})
+        cursor = await project_collection.find_one({"_id": ObjectId(project)}, OWNER_PROJECTION)
         if not cursor:
             print("Project not found")
             return {"message": "Project not found"}
@@ -77,11 +73,11 @@ async def generate(project, current_user: dict = Depends(get_current_app_user)):
             "project": project
         }
 
-        project_collection.update_one(
+        await project_collection.update_one(
             {"_id": cursor["_id"]},
             {"$set": {"generation_status": "in-progress"}}
         )
-        insert_log_event(
+        await insert_log_event_async(
             "solution_generation_started",
             user_id=str(cursor.get("userId")) if cursor.get("userId") else None,
             project_id=project,
@@ -97,7 +93,8 @@ async def generate(project, current_user: dict = Depends(get_current_app_user)):
         # return {"message": "Generation completed (local test)"}
 
         # PRODUCTION: Use SQS
-        sqs.send_message(
+        await run_in_threadpool(
+            get_sqs_client().send_message,
             QueueUrl=settings.AWS_SQS_URL,
             MessageBody=json.dumps(message)
         )
@@ -111,7 +108,7 @@ async def generate(project, current_user: dict = Depends(get_current_app_user)):
 
 @router.get("/status/{project}")
 async def status(project, current_user: dict = Depends(get_current_app_user)):
-    cursor = project_collection.find_one({"_id": ObjectId(project)})
+    cursor = await project_collection.find_one({"_id": ObjectId(project)}, GENERATION_STATUS_PROJECTION)
     if not cursor:
         print("Project not found")
         return {"message": "Project not found"}
@@ -120,31 +117,47 @@ async def status(project, current_user: dict = Depends(get_current_app_user)):
     if not "generation_status" in cursor:
         return {"message": "Generation not started"}
 
-    if "tool_generation" in cursor and "status" in cursor["tool_generation"]:
-        tools = cursor["tool_generation"]["status"]
-    else:
-        tools = "Not started"
-
-    if "step_generation" in cursor and "status" in cursor["step_generation"]:
-        steps = cursor["step_generation"]["status"]
-    else:
-        steps = "Not started"
-
-    if "estimation_generation" in cursor and "status" in cursor["estimation_generation"]:
-        estimation = cursor["estimation_generation"]["status"]
-    else:
-        estimation = "Not started"
-
     if cursor["generation_status"] == "complete":
-        return {"message": "generation completed",
-                "tools": tools,
-                "steps": steps,
-                "estimation": estimation}
+        return {"message": "generation completed", **generation_statuses(cursor)}
 
     if cursor["generation_status"] == "in-progress":
-        return {"message": "generation in progress",
-                "tools": tools,
-                "steps": steps,
-                "estimation": estimation}
+        return {"message": "generation in progress", **generation_statuses(cursor)}
 
     return {"message": "Something went wrong"}
+
+
+@router.get("/visual-dna-cache/stats")
+async def visual_dna_cache_stats(current_user: dict = Depends(get_current_admin_user)):
+    """
+    Visual DNA reuse telemetry: projects whose DNA was reused from a similar
+    project ("cache") vs generated, with the feedback those projects received
+    so image quality of reused DNA can be compared.
+    """
+    pipeline = [
+        {"$match": {"image_visual_dna_source.type": {"$exists": True}}},
+        {
+            "$group": {
+                "_id": "$image_visual_dna_source.type",
+                "projects": {"$sum": 1},
+                "avgSimilarity": {"$avg": "$image_visual_dna_source.score"},
+                "avgProjectRating": {"$avg": {"$avg": "$feedback.rating"}},
+                "avgStepFeedback": {"$avg": {"$avg": "$step_generation.steps.feedback"}},
+            }
+        },
+    ]
+    cursor = await project_collection.aggregate(pipeline)
+    by_source = {row.pop("_id"): row async for row in cursor}
+
+    reused = by_source.get("cache", {}).get("projects", 0)
+    total = reused + by_source.get("generated", {}).get("projects", 0)
+    return {
+        "hitRate": round(reused / total, 4) if total else 0.0,
+        "projects": total,
+        "bySource": by_source,
+    }
+
+
+@router.get("/youtube-cache/stats")
+async def youtube_cache_stats(current_user: dict = Depends(get_current_admin_user)):
+    """YouTube tutorial lookup cache: today's API quota usage and live cache entries."""
+    return await run_in_threadpool(get_youtube_cache_stats)
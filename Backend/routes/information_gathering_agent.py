@@ -1,9 +1,10 @@
 import json
 from uuid import UUID
 
-import boto3
 from bson import ObjectId
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from agents.information_gathering_agent.dependencies import InformationGatheringAgentServiceDependency
@@ -11,16 +12,17 @@ from routes.schemas.request.information_gathering_agent import ChatMessageReques
 from routes.schemas.request.information_gathering_agent import InitializeConversationRequest
 from routes.schemas.response.information_gathering_agent import InitializeConversationResponse, \
     ChatMessageResponse, ConversationHistoryResponse, HistoryMessage
+from routes.streaming import format_sse_event, sse_response
 from security.current_user import get_current_app_user
 from database.enums.project import InformationGatheringConversationStatus
 from database.mongodb import mongodb
 from config.settings import get_settings
+from services.clients import get_sqs_client
 from services.user_upload_storage import store_user_uploaded_image
 
 router = APIRouter(prefix="/information-gathering-agent")
-project_collection = mongodb.get_collection("Project")
+project_collection = mongodb.get_async_collection("Project")
 settings = get_settings()
-sqs = boto3.client("sqs", region_name=settings.AWS_REGION)
 
 
 def _looks_like_summary_confirmation(response_text: str | None) -> bool:
@@ -86,8 +88,8 @@ def _preview_response(project: dict | None) -> dict:
     }
 
 
-def _enqueue_preview_generation(project_id: str, prefer_draft: bool) -> dict:
-    project = project_collection.find_one({"_id": ObjectId(project_id)})
+async def _enqueue_preview_generation(project_id: str, prefer_draft: bool) -> dict:
+    project = await project_collection.find_one({"_id": ObjectId(project_id)})
     existing = _preview_response(project)
 
     if existing.get("url") or existing.get("status") in {"queued", "in-progress"}:
@@ -104,7 +106,7 @@ def _enqueue_preview_generation(project_id: str, prefer_draft: bool) -> dict:
             "stage": "sqs_enqueue",
             "error": "AWS_SQS_URL is not configured",
         }
-        project_collection.update_one(
+        await project_collection.update_one(
             {"_id": ObjectId(project_id)},
             {"$set": {"result_preview_image": failed}},
         )
@@ -115,11 +117,12 @@ def _enqueue_preview_generation(project_id: str, prefer_draft: bool) -> dict:
         "stage": "sqs_enqueue",
         "error": None,
     }
-    project_collection.update_one(
+    await project_collection.update_one(
         {"_id": ObjectId(project_id)},
         {"$set": {"result_preview_image": queued}},
     )
-    sqs.send_message(
+    await run_in_threadpool(
+        get_sqs_client().send_message,
         QueueUrl=settings.AWS_SQS_URL,
         MessageBody=json.dumps({
             "task": "preview_image",
@@ -140,7 +143,8 @@ async def initialize_conversation(
     """Initialize a new conversation with the information gathering agent."""
     logger.info(f"initialize_conversation called for project_id: {request.project_id}")
 
-    thread_id, initial_message, conversation_status = orchestrator.initialize_conversation(
+    thread_id, initial_message, conversation_status = await run_in_threadpool(
+        orchestrator.initialize_conversation,
         project_id=request.project_id)
 
     return InitializeConversationResponse(
@@ -150,69 +154,84 @@ async def initialize_conversation(
     )
 
 
-@router.post("/chat/{thread_id}", response_model=ChatMessageResponse, status_code=status.HTTP_200_OK)
-async def chat(
-        thread_id: UUID,
-        request: ChatMessageRequest,
-        orchestrator: InformationGatheringAgentServiceDependency,
-        current_user: dict = Depends(get_current_app_user),
-) -> ChatMessageResponse:
-    """Send a chat message to the information gathering agent."""
-    logger.info(f"chat called with thread_id: {thread_id}, project_id: {request.project_id}")
-
-    if request.image_base64:
-        upload = store_user_uploaded_image(
-            image_base64=request.image_base64,
-            image_mime_type=request.image_mime_type,
-            user_id=current_user.get("id") or current_user.get("sub"),
-            project_id=request.project_id,
-            thread_id=thread_id,
-            source="information-gathering-agent",
-        )
-        logger.info(f"Stored information gathering upload: {upload['key']}")
-        project_collection.update_one(
-            {"_id": ObjectId(request.project_id)},
-            {"$push": {"information_gathering_uploads": upload}},
-        )
-
-    agent_response, conversation_status = orchestrator.process_message(
-        thread_id=thread_id,
-        project_id=request.project_id,
-        text=request.text,
+async def _store_chat_upload(request: ChatMessageRequest, thread_id: UUID, current_user: dict) -> dict:
+    upload = await run_in_threadpool(
+        store_user_uploaded_image,
         image_base64=request.image_base64,
-        image_mime_type=request.image_mime_type
+        image_mime_type=request.image_mime_type,
+        user_id=current_user.get("id") or current_user.get("sub"),
+        project_id=request.project_id,
+        thread_id=thread_id,
+        source="information-gathering-agent",
     )
-    agent_response = _remove_premature_confirmation_filler(agent_response)
+    logger.info(f"Stored information gathering upload: {upload['key']}")
+    await project_collection.update_one(
+        {"_id": ObjectId(request.project_id)},
+        {"$push": {"information_gathering_uploads": upload}},
+    )
+    return upload
+
 
+async def _chat_preview(project_id: str, conversation_status: str, agent_response: str) -> tuple[str | None, str | None]:
+    """Return (preview_image_url, preview_image_status) to attach to a chat response."""
     preview_image_url = None
     preview_image_status = None
     if conversation_status == InformationGatheringConversationStatus.COMPLETED.value:
-        project = project_collection.find_one({"_id": ObjectId(request.project_id)})
+        project = await project_collection.find_one({"_id": ObjectId(project_id)})
         preview = (project or {}).get("result_preview_image") or {}
         preview_image_url = preview.get("url") if preview else None
         preview_image_status = preview.get("status") if preview_image_url else None
         logger.info(
-            f"chat preview status project_id={request.project_id} "
+            f"chat preview status project_id={project_id} "
             f"conversation_status={conversation_status} preview_status={preview.get('status')} "
             f"has_url={bool(preview_image_url)} stage={preview.get('stage')} "
             f"generation_triggered_after_confirmation=False"
         )
     else:
-        project = project_collection.find_one({"_id": ObjectId(request.project_id)})
+        project = await project_collection.find_one({"_id": ObjectId(project_id)})
         if project and project.get("summary_preview") and _looks_like_summary_confirmation(agent_response):
             preview = project.get("result_preview_image") or {}
             preview_image_url = preview.get("url") if preview else None
             preview_image_status = preview.get("status") if preview_image_url else "generating"
             logger.info(
-                f"chat draft preview status project_id={request.project_id} "
+                f"chat draft preview status project_id={project_id} "
                 f"conversation_status={conversation_status} preview_status={preview.get('status')} "
                 f"has_url={bool(preview_image_url)} stage={preview.get('stage')}"
             )
         elif project and project.get("summary_preview"):
             logger.info(
-                f"summary_preview exists but preview not triggered yet project_id={request.project_id} "
+                f"summary_preview exists but preview not triggered yet project_id={project_id} "
                 f"reason=response_not_summary_confirmation"
             )
+    return preview_image_url, preview_image_status
+
+
+@router.post("/chat/{thread_id}", response_model=ChatMessageResponse, status_code=status.HTTP_200_OK)
+async def chat(
+        thread_id: UUID,
+        request: ChatMessageRequest,
+        orchestrator: InformationGatheringAgentServiceDependency,
+        current_user: dict = Depends(get_current_app_user),
+) -> ChatMessageResponse:
+    """Send a chat message to the information gathering agent."""
+    logger.info(f"chat called with thread_id: {thread_id}, project_id: {request.project_id}")
+
+    upload = None
+    if request.image_base64:
+        upload = await _store_chat_upload(request, thread_id, current_user)
+
+    agent_response, conversation_status = await run_in_threadpool(
+        orchestrator.process_message,
+        thread_id=thread_id,
+        project_id=request.project_id,
+        text=request.text,
+        image_base64=request.image_base64,
+        image_mime_type=request.image_mime_type,
+        image_upload=upload
+    )
+    agent_response = _remove_premature_confirmation_filler(agent_response)
+    preview_image_url, preview_image_status = await _chat_preview(
+        request.project_id, conversation_status, agent_response)
 
     return ChatMessageResponse(
         thread_id=thread_id,
@@ -223,6 +242,65 @@ async def chat(
     )
 
 
+@router.post("/chat/{thread_id}/stream", status_code=status.HTTP_200_OK)
+async def chat_stream(
+        thread_id: UUID,
+        request: ChatMessageRequest,
+        orchestrator: InformationGatheringAgentServiceDependency,
+        current_user: dict = Depends(get_current_app_user),
+) -> StreamingResponse:
+    """
+    Send a chat message and stream the agent's answer as Server-Sent Events.
+    The final `done` event carries the same fields as `ChatMessageResponse`.
+    Not streamed on Lambda: all events arrive together once the turn is done
+    (see routes/streaming.py).
+    """
+    logger.info(f"chat_stream called with thread_id: {thread_id}, project_id: {request.project_id}")
+    if not request.text and not request.image_base64:
+        raise HTTPException(status_code=400, detail="Either text or image must be provided")
+
+    upload = None
+    if request.image_base64:
+        upload = await _store_chat_upload(request, thread_id, current_user)
+
+    async def events():
+        tokens = []
+        try:
+            async for token in orchestrator.stream_message(
+                    thread_id=thread_id,
+                    project_id=request.project_id,
+                    text=request.text,
+                    image_base64=request.image_base64,
+                    image_mime_type=request.image_mime_type,
+                    image_upload=upload
+            ):
+                tokens.append(token)
+                yield format_sse_event("token", {"text": token})
+
+            # Same answer as the blocking endpoint: the turn's final message, not every streamed token
+            final_response = await run_in_threadpool(orchestrator.get_last_response, thread_id)
+            agent_response = _remove_premature_confirmation_filler(
+                final_response if final_response is not None else "".join(tokens))
+            conversation_status = await run_in_threadpool(orchestrator.get_conversation_status, request.project_id)
+            preview_image_url, preview_image_status = await _chat_preview(
+                request.project_id, conversation_status, agent_response)
+        except Exception as e:
+            logger.error(f"chat_stream failed for thread_id={thread_id}: {e}")
+            yield format_sse_event("error", {"detail": "Failed to process message"})
+            return
+
+        response = ChatMessageResponse(
+            thread_id=thread_id,
+            agent_response=agent_response,
+            conversation_status=conversation_status,
+            preview_image_url=preview_image_url,
+            preview_image_status=preview_image_status
+        )
+        yield format_sse_event("done", response.model_dump(mode="json"))
+
+    return sse_response(events())
+
+
 @router.post("/preview/{project_id}", status_code=status.HTTP_200_OK)
 async def generate_project_preview(
         project_id: str,
@@ -230,7 +308,7 @@ async def generate_project_preview(
 ) -> dict:
     """Generate or fetch the visual result preview for a project."""
     logger.info(f"generate_project_preview called for project_id: {project_id}")
-    project = project_collection.find_one({"_id": ObjectId(project_id)})
+    project = await project_collection.find_one({"_id": ObjectId(project_id)})
     if not project:
         logger.warning(f"generate_project_preview project not found project_id={project_id}")
         return {
@@ -259,7 +337,7 @@ async def generate_project_preview(
         f"has_summary_preview={bool(project.get('summary_preview'))} "
         f"existing_preview_status={(project.get('result_preview_image') or {}).get('status')}"
     )
-    preview = _enqueue_preview_generation(project_id, prefer_draft=prefer_draft)
+    preview = await _enqueue_preview_generation(project_id, prefer_draft=prefer_draft)
     return preview
 
 
@@ -269,7 +347,7 @@ async def get_project_preview(
         current_user: dict = Depends(get_current_app_user),
 ) -> dict:
     """Fetch preview generation status for a project."""
-    project = project_collection.find_one({"_id": ObjectId(project_id)})
+    project = await project_collection.find_one({"_id": ObjectId(project_id)})
     if not project:
         return {
             "status": "failed",
@@ -302,7 +380,7 @@ async def get_conversation_history(
     """
     logger.info(f"get_conversation_history called with thread_id: {thread_id}")
 
-    history_dicts = orchestrator.get_history(thread_id=thread_id)
+    history_dicts = await run_in_threadpool(orchestrator.get_history, thread_id=thread_id)
 
     messages = [HistoryMessage(**m) for m in history_dicts]
 
@@ -323,4 +401,4 @@ async def get_thread_id(
     Return existing thread_id and conversation_status for a given project_id, if any.
     """
     logger.info(f"get_thread_id called with project_id: {project_id}")
-    return orchestrator.get_thread_id(project_id)
+    return await run_in_threadpool(orchestrator.get_thread_id, project_id)
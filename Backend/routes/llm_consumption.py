@@ -1,9 +1,14 @@
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Literal, Optional
 
 from fastapi import APIRouter, Depends, Query
 from pymongo import DESCENDING
 
-from database.llm_consumption import llm_consumption_collection
+from database.llm_consumption import (
+    llm_consumption_collection,
+    llm_consumption_rollups_collection,
+    rollup_bucket_start,
+)
 from security.current_user import get_current_app_user
 
 router = APIRouter()
@@ -37,18 +42,38 @@ def list_llm_consumption(
 def llm_consumption_summary(
     project_id: Optional[str] = Query(default=None),
     user_id: Optional[str] = Query(default=None),
+    start: Optional[datetime] = Query(default=None, description="UTC, inclusive"),
+    end: Optional[datetime] = Query(default=None, description="UTC, exclusive"),
+    granularity: Optional[Literal["hour", "day"]] = Query(default=None),
     current_user: dict = Depends(get_current_app_user),
 ):
-    match: Dict[str, Any] = {}
+    """
+    Totals per (projectId, userId, model), read from the hourly/daily rollups.
+
+    Daily buckets are used when `start` and `end` fall on day boundaries (or are
+    omitted), hourly buckets otherwise; ranges are rounded down to the bucket.
+    """
+    start = _as_naive_utc(start)
+    end = _as_naive_utc(end)
+    if granularity is None:
+        day_aligned = all(t is None or t == rollup_bucket_start(t, "day") for t in (start, end))
+        granularity = "day" if day_aligned else "hour"
+
+    match: Dict[str, Any] = {"granularity": granularity}
     if project_id:
         match["projectId"] = project_id
     if user_id:
         match["userId"] = user_id
+    bucket_range: Dict[str, datetime] = {}
+    if start:
+        bucket_range["$gte"] = rollup_bucket_start(start, granularity)
+    if end:
+        bucket_range["$lt"] = end
+    if bucket_range:
+        match["bucketStart"] = bucket_range
 
-    pipeline: List[Dict[str, Any]] = []
-    if match:
-        pipeline.append({"$match": match})
-    pipeline.append(
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": match},
         {
             "$group": {
                 "_id": {
@@ -56,13 +81,20 @@ def llm_consumption_summary(
                     "userId": "$userId",
                     "model": "$model",
                 },
-                "requests": {"$sum": 1},
-                "inputTokens": {"$sum": "$usage.input_tokens"},
-                "outputTokens": {"$sum": "$usage.output_tokens"},
-                "totalTokens": {"$sum": "$usage.total_tokens"},
-                "estimatedCostUsd": {"$sum": {"$ifNull": ["$estimatedCostUsd", 0]}},
+                "requests": {"$sum": "$requests"},
+                "inputTokens": {"$sum": "$inputTokens"},
+                "outputTokens": {"$sum": "$outputTokens"},
+                "totalTokens": {"$sum": "$totalTokens"},
+                "estimatedCostUsd": {"$sum": "$estimatedCostUsd"},
             }
-        }
-    )
+        },
+    ]
+
+    return list(llm_consumption_rollups_collection.aggregate(pipeline))
+
 
-    return list(llm_consumption_collection.aggregate(pipeline))
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Rollup buckets are stored as naive UTC, like `createdAt`."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
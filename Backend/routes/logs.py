@@ -30,9 +30,6 @@ def ensure_indexes() -> None:
     logs_collection.create_index([("projectId", DESCENDING), ("createdAt", DESCENDING)])
 
 
-ensure_indexes()
-
-
 class LogEventRequest(BaseModel):
     eventType: Literal[
         "app_entered",
@@ -56,7 +53,7 @@ class LogEventResponse(BaseModel):
     message: str
 
 
-def insert_log_event(
+def _build_log_event(
     event_type: str,
     *,
     user_id: Optional[str] = None,
@@ -66,11 +63,11 @@ def insert_log_event(
     session_id: Optional[str] = None,
     visitor_id: Optional[str] = None,
     metadata: Optional[Dict[str, Any]] = None,
-) -> str:
+) -> Dict[str, Any]:
     if event_type not in LOG_EVENT_TYPES:
         raise ValueError(f"Unsupported log event type: {event_type}")
 
-    document = {
+    return {
         "eventType": event_type,
         "userId": user_id,
         "projectId": project_id,
@@ -81,7 +78,17 @@ def insert_log_event(
         "metadata": metadata or {},
         "createdAt": datetime.utcnow(),
     }
-    result = logs_collection.insert_one(document)
+
+
+def insert_log_event(event_type: str, **kwargs) -> str:
+    result = logs_collection.insert_one(_build_log_event(event_type, **kwargs))
+    return str(result.inserted_id)
+
+
+async def insert_log_event_async(event_type: str, **kwargs) -> str:
+    """`insert_log_event` for `async def` routes."""
+    collection = mongodb.get_async_collection("Logs")
+    result = await collection.insert_one(_build_log_event(event_type, **kwargs))
     return str(result.inserted_id)
 
 
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+
+from database.mongodb import mongo_client_options, mongodb
+from security.cognito import get_jwks_manager
+from security.current_user import get_current_admin_user
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get("/mongo-pool")
+def mongo_pool_metrics(current_user: dict = Depends(get_current_admin_user)):
+    """
+    Connection pool health of this instance's Mongo clients: open / checked-out
+    connections, saturation against maxPoolSize and checkout wait times.
+    """
+    return {
+        "options": mongo_client_options(),
+        "pools": mongodb.get_pool_metrics(),
+    }
+
+
+@router.get("/auth")
+def auth_metrics(current_user: dict = Depends(get_current_admin_user)):
+    """
+    Token verification on this instance: verify latency (avg / max ms), signing-key
+    cache hits and misses, JWKS refreshes and the age of the cached keys.
+    """
+    return get_jwks_manager().get_metrics()
@@ -1,14 +1,27 @@
 from datetime import datetime
+from typing import Optional
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from pymongo import DESCENDING
+from pymongo.asynchronous.collection import AsyncCollection
 from pymongo.collection import Collection
 from pymongo.database import Database
-from agents.information_gathering_agent.agent.embeddings_generation import delete_project_by_point_id
 
+from agents.information_gathering_agent.agent.embeddings_generation import delete_project_by_point_id
 from database.mongodb import mongodb
+from database.project_views import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    OWNER_PROJECTION,
+    PROJECT_SUMMARY_PROJECTION,
+    next_page_cursor,
+    project_summary,
+    step_progress,
+    user_projects_page_query,
+)
 from routes.logs import insert_log_event
 from security.current_user import get_current_app_user, require_user_match
 
@@ -18,6 +31,11 @@ project_collection: Collection = database.get_collection("Project")
 conversations_collection: Collection = database.get_collection("Conversations")
 steps_collection: Collection = database.get_collection("ProjectSteps")
 
+# Async handles for the `async def` routes below; the plain `def` routes run in
+# FastAPI's threadpool and keep using the blocking collections.
+async_project_collection: AsyncCollection = mongodb.get_async_collection("Project")
+async_conversations_collection: AsyncCollection = mongodb.get_async_collection("Conversations")
+
 
 class Project(BaseModel):
     projectTitle: str
@@ -46,36 +64,54 @@ def create_project(project: Project, current_user: dict = Depends(get_current_ap
 
 
 @router.get("/projects")
-def list_projects(user_id: str, current_user: dict = Depends(get_current_app_user)):
+async def list_projects(
+    user_id: str,
+    cursor: Optional[str] = Query(default=None, description="`next_cursor` of the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_app_user),
+):
     """
-    GET /projects?user_id=<mongo‐object‐id>
-    returns all projects for that user.
+    GET /projects?user_id=<mongo‐object‐id>[&cursor=<next_cursor>&limit=50]
+    returns that user's projects (newest first) as summaries: all of them, or one
+    page when `limit` or `cursor` is given (`limit` then defaults to 50).
+    The full document is served by GET /project/{project_id}.
     """
     require_user_match(user_id, current_user)
 
     try:
-        docs = project_collection.find({"userId": current_user["id"]})
+        query = user_projects_page_query(current_user["id"], cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-        print(docs)
+    paginated = limit is not None or cursor is not None
+    if paginated:
+        limit = limit or DEFAULT_PAGE_SIZE
 
-        results = list(docs)
-
-        if not results:
-            return {"message": "No Projects found", "projects": []}
-
-        payload = {"message": "Projects found", "projects": results}
+    try:
+        docs = async_project_collection.find(query, PROJECT_SUMMARY_PROJECTION).sort("_id", DESCENDING)
+        if paginated:
+            # One extra row tells whether another page exists
+            docs = docs.limit(limit + 1)
+        results = await docs.to_list()
+    except Exception as e:
+        print(f"❌ There was an error fetching projects for {user_id}: {e}")
+        raise HTTPException(status_code=400, detail="Projects Error")
 
-        # Convert all ObjectIds (including nested ones) to strings
-        return jsonable_encoder(payload, custom_encoder={ObjectId: str})
+    if paginated:
+        next_cursor = next_page_cursor(results, limit)
+        results = results[:limit]
+    else:
+        next_cursor = None
+    projects = [project_summary(doc) for doc in results]
+    if not projects:
+        return {"message": "No Projects found", "projects": [], "next_cursor": None}
 
-    except:
-        print(f"❌ There was an error fetching projects for {user_id}")
-        raise HTTPException(status_code=400, detail="Projects Error")
+    return {"message": "Projects found", "projects": projects, "next_cursor": next_cursor}
 
 
 @router.get("/project/{project_id}")
-def get_project(project_id: str, current_user: dict = Depends(get_current_app_user)):
-    project = project_collection.find_one({"_id": ObjectId(project_id)})
+async def get_project(project_id: str, current_user: dict = Depends(get_current_app_user)):
+    project = await async_project_collection.find_one({"_id": ObjectId(project_id)})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     require_user_match(str(project.get("userId")), current_user)
@@ -86,7 +122,7 @@ def get_project(project_id: str, current_user: dict = Depends(get_current_app_us
 
 @router.put("/projects/{project_id}")
 def update_project(project_id: str, update_data: dict, current_user: dict = Depends(get_current_app_user)):
-    project = project_collection.find_one({"_id": ObjectId(project_id)})
+    project = project_collection.find_one({"_id": ObjectId(project_id)}, OWNER_PROJECTION)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     require_user_match(str(project.get("userId")), current_user)
@@ -101,21 +137,26 @@ def update_project(project_id: str, update_data: dict, current_user: dict = Depe
 
 
 @router.delete("/projects/{project_id}")
-def delete_project(project_id: str, current_user: dict = Depends(get_current_app_user)):
+async def delete_project(project_id: str, current_user: dict = Depends(get_current_app_user)):
     project_obj_id = ObjectId(project_id)
-    project = project_collection.find_one({"_id": project_obj_id})
+    project = await async_project_collection.find_one({"_id": project_obj_id}, OWNER_PROJECTION)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     require_user_match(str(project.get("userId")), current_user)
 
-    result = project_collection.delete_one({"_id": project_obj_id})
+    result = await async_project_collection.delete_one({"_id": project_obj_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    conversations_collection.delete_many({"projectId": project_obj_id})
-    conversations_collection.delete_many({"project": str(project_obj_id)})
+    await async_conversations_collection.delete_many(
+        {"$or": [{"projectId": project_obj_id}, {"project": str(project_obj_id)}]}
+    )
 
-    delete_project_by_point_id(project_id)
+    try:
+        await run_in_threadpool(delete_project_by_point_id, project_id)
+    except Exception as e:
+        # The project is already gone from Mongo; a stale summary point only affects similarity search
+        print(f"⚠️ Failed to delete Qdrant summary point for project {project_id}: {e}")
 
     return {
         "message": "Project, associated conversations, and Qdrant embeddings deleted successfully",
@@ -124,7 +165,7 @@ def delete_project(project_id: str, current_user: dict = Depends(get_current_app
 
 @router.put("/complete-step/{project_id}/{step}")
 def complete_step(project_id: str, step: int, current_user: dict = Depends(get_current_app_user)):
-    project = project_collection.find_one({"_id": ObjectId(project_id)})
+    project = project_collection.find_one({"_id": ObjectId(project_id)}, OWNER_PROJECTION)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     require_user_match(str(project.get("userId")), current_user)
@@ -136,9 +177,10 @@ def complete_step(project_id: str, step: int, current_user: dict = Depends(get_c
     if result.matched_count == 0:
         print("Project not found")
 
-    cursor = project_collection.find({
-        "_id": ObjectId(project_id)
-    })
+    cursor = project_collection.find_one(
+        {"_id": ObjectId(project_id)},
+        {"step_generation.steps.completed": 1},
+    ) or {}
     if "step_generation" in cursor and "steps" in cursor["step_generation"]:
         steps = list(cursor["step_generation"]["steps"])
 
@@ -159,7 +201,7 @@ def complete_step(project_id: str, step: int, current_user: dict = Depends(get_c
 
 @router.put("/reset-step/{project_id}/{step}")
 def reset_step(project_id: str, step: int, current_user: dict = Depends(get_current_app_user)):
-    project = project_collection.find_one({"_id": ObjectId(project_id)})
+    project = project_collection.find_one({"_id": ObjectId(project_id)}, OWNER_PROJECTION)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     require_user_match(str(project.get("userId")), current_user)
@@ -181,7 +223,7 @@ def reset_step(project_id: str, step: int, current_user: dict = Depends(get_curr
 
 @router.put("/step-feedback/{project_id}/{step}/{feedback}")
 def step_feedback(project_id: str, step: int, feedback: int, current_user: dict = Depends(get_current_app_user)):
-    project = project_collection.find_one({"_id": ObjectId(project_id)})
+    project = project_collection.find_one({"_id": ObjectId(project_id)}, OWNER_PROJECTION)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     require_user_match(str(project.get("userId")), current_user)
@@ -197,16 +239,15 @@ def step_feedback(project_id: str, step: int, feedback: int, current_user: dict
 
 @router.put("/project/{project_id}/complete")
 def complete_all_steps(project_id, current_user: dict = Depends(get_current_app_user)):
-    cursor = project_collection.find_one({
-        "_id": ObjectId(project_id)
-    })
+    cursor = project_collection.find_one(
+        {"_id": ObjectId(project_id)},
+        {"userId": 1, "step_generation.steps.completed": 1},
+    )
     if not cursor:
         raise HTTPException(status_code=404, detail="Project not found")
     require_user_match(str(cursor.get("userId")), current_user)
 
     if "step_generation" in cursor and "steps" in cursor["step_generation"]:
-        print("there is steps")
-        print(cursor)
         project_collection.update_one(
             {"_id": ObjectId(project_id)},
             {"$set": {"step_generation.steps.$[].completed": True, "completed": True}}
@@ -225,24 +266,12 @@ def complete_all_steps(project_id, current_user: dict = Depends(get_current_app_
 
 @router.get("/project/{project_id}/progress")
 def steps_progress(project_id, current_user: dict = Depends(get_current_app_user)):
-    cursor = project_collection.find_one({
-        "_id": ObjectId(project_id)
-    })
+    cursor = project_collection.find_one(
+        {"_id": ObjectId(project_id)},
+        {"userId": 1, "step_generation.steps.completed": 1},
+    )
     if not cursor:
         raise HTTPException(status_code=404, detail="Project not found")
     require_user_match(str(cursor.get("userId")), current_user)
 
-    if "step_generation" in cursor and "steps" in cursor["step_generation"]:
-        steps = list(cursor["step_generation"]["steps"])
-
-        print("there is steps")
-        print(steps)
-
-        count = 0
-        for s in steps:
-            if "completed" in s and s["completed"] == True:
-                count += 1
-
-        return count / len(steps)
-
-    return 0
+    return step_progress(cursor)
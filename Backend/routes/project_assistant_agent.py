@@ -1,17 +1,35 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from agents.project_assistant_agent.dependencies import ProjectAssistantAgentServiceDependency
 from routes.schemas.request.project_assistant_agent import ChatMessageRequest, InitializeConversationRequest
 from routes.schemas.response.project_assistant_agent import ChatMessageResponse, ConversationHistoryResponse, HistoryMessage, InitializeConversationResponse
+from routes.streaming import format_sse_event, sse_response
 from security.current_user import get_current_app_user
 from services.user_upload_storage import store_user_uploaded_image
 
 router = APIRouter(prefix="/project-assistant-agent")
 
 
+async def _store_chat_upload(request: ChatMessageRequest, thread_id: UUID, current_user: dict) -> dict:
+    upload = await run_in_threadpool(
+        store_user_uploaded_image,
+        image_base64=request.image_base64,
+        image_mime_type=request.image_mime_type,
+        user_id=current_user.get("id") or current_user.get("sub"),
+        project_id=request.project_id,
+        thread_id=thread_id,
+        source="project-assistant-agent",
+        step_number=request.step_number,
+    )
+    logger.info(f"Stored project assistant upload: {upload['key']}")
+    return upload
+
+
 @router.post("/initialize", response_model=InitializeConversationResponse, status_code=status.HTTP_200_OK)
 async def initialize_conversation(
         request: InitializeConversationRequest,
@@ -22,7 +40,8 @@ async def initialize_conversation(
     logger.info(f"initialize_conversation called for thread_id: {request.thread_id}, project_id: {request.project_id}, step_number: {request.step_number}")
 
     thread_id = UUID(request.thread_id)
-    initial_message = orchestrator.initialize_conversation(
+    initial_message = await run_in_threadpool(
+        orchestrator.initialize_conversation,
         thread_id=thread_id,
         project_id=request.project_id,
         step_number=request.step_number
@@ -44,24 +63,18 @@ async def chat(
     """Send a chat message to the project assistant agent."""
     logger.info(f"chat called with thread_id: {thread_id}, project_id: {request.project_id}, step_number: {request.step_number}")
 
+    upload = None
     if request.image_base64:
-        upload = store_user_uploaded_image(
-            image_base64=request.image_base64,
-            image_mime_type=request.image_mime_type,
-            user_id=current_user.get("id") or current_user.get("sub"),
-            project_id=request.project_id,
-            thread_id=thread_id,
-            source="project-assistant-agent",
-            step_number=request.step_number,
-        )
-        logger.info(f"Stored project assistant upload: {upload['key']}")
+        upload = await _store_chat_upload(request, thread_id, current_user)
 
-    agent_response, _ = orchestrator.process_message(
+    agent_response, _ = await run_in_threadpool(
+        orchestrator.process_message,
         thread_id=thread_id,
         project_id=request.project_id,
         text=request.text,
         image_base64=request.image_base64,
         image_mime_type=request.image_mime_type,
+        image_upload=upload,
         step_number=request.step_number
     )
 
@@ -70,6 +83,57 @@ async def chat(
         agent_response=agent_response
     )
 
+@router.post("/chat/{thread_id}/stream", status_code=status.HTTP_200_OK)
+async def chat_stream(
+        thread_id: UUID,
+        request: ChatMessageRequest,
+        orchestrator: ProjectAssistantAgentServiceDependency,
+        current_user: dict = Depends(get_current_app_user),
+) -> StreamingResponse:
+    """
+    Send a chat message and stream the agent's answer as Server-Sent Events.
+    The final `done` event carries the same fields as `ChatMessageResponse`.
+    Not streamed on Lambda: all events arrive together once the turn is done
+    (see routes/streaming.py).
+    """
+    logger.info(f"chat_stream called with thread_id: {thread_id}, project_id: {request.project_id}, step_number: {request.step_number}")
+    if not request.text and not request.image_base64:
+        raise HTTPException(status_code=400, detail="Either text or image must be provided")
+
+    upload = None
+    if request.image_base64:
+        upload = await _store_chat_upload(request, thread_id, current_user)
+
+    async def events():
+        tokens = []
+        try:
+            async for token in orchestrator.stream_message(
+                    thread_id=thread_id,
+                    project_id=request.project_id,
+                    text=request.text,
+                    image_base64=request.image_base64,
+                    image_mime_type=request.image_mime_type,
+                    image_upload=upload,
+                    step_number=request.step_number
+            ):
+                tokens.append(token)
+                yield format_sse_event("token", {"text": token})
+
+            # Same answer as the blocking endpoint: the turn's final message, not every streamed token
+            final_response = await run_in_threadpool(orchestrator.get_last_response, thread_id)
+        except Exception as e:
+            logger.error(f"chat_stream failed for thread_id={thread_id}: {e}")
+            yield format_sse_event("error", {"detail": "Failed to process message"})
+            return
+
+        response = ChatMessageResponse(
+            thread_id=thread_id,
+            agent_response=final_response if final_response is not None else "".join(tokens)
+        )
+        yield format_sse_event("done", response.model_dump(mode="json"))
+
+    return sse_response(events())
+
 
 @router.get("/thread/{project_id}",
             status_code=status.HTTP_200_OK)
@@ -83,7 +147,7 @@ async def get_thread_id(
     Uses the same thread_id as the information gathering agent since they share the same conversation thread.
     """
     logger.info(f"get_thread_id called with project_id: {project_id}")
-    return orchestrator.get_thread_id(project_id)
+    return await run_in_threadpool(orchestrator.get_thread_id, project_id)
 
 
 @router.get("/chat/{thread_id}/history",
@@ -99,7 +163,7 @@ async def get_conversation_history(
     """
     logger.info(f"get_conversation_history called with thread_id: {thread_id}")
 
-    history_dicts = orchestrator.get_history(thread_id=thread_id)
+    history_dicts = await run_in_threadpool(orchestrator.get_history, thread_id=thread_id)
 
     messages = [HistoryMessage(**m) for m in history_dicts]
 
@@ -0,0 +1,35 @@
+"""
+Server-Sent Events helpers for the streaming chat endpoints.
+
+Events are `token` ({"text": ...}) while the agent is answering, then a single
+`done` event carrying the same payload as the non-streaming endpoint, or an
+`error` event.
+
+On Lambda the events are NOT streamed: Mangum (main.py) buffers the whole body
+and returns it when the turn is finished, so the client gets every event at
+once. Only a server that streams responses (uvicorn locally) delivers tokens as
+they are generated; responses carry `X-Response-Buffered: true` when buffered.
+"""
+import json
+import os
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+# Set by the Lambda runtime; the API then runs behind Mangum, which buffers bodies
+RESPONSE_BUFFERED = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+if RESPONSE_BUFFERED:
+    SSE_HEADERS["X-Response-Buffered"] = "true"
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
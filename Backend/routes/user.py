@@ -9,7 +9,7 @@ from pymongo.database import Database
 
 from database.mongodb import mongodb
 from routes.logs import insert_log_event
-from security.current_user import get_current_app_user, require_user_match
+from security.current_user import get_current_app_user, require_user_match, invalidate_cached_user
 
 router = APIRouter()
 database: Database = mongodb.get_database()
@@ -93,6 +93,7 @@ def get_onbording():
 def delete_user(user_id: str, current_user: dict = Depends(get_current_app_user)):
     require_user_match(user_id, current_user)
     result = users_collection.delete_one({"_id": ObjectId(user_id)})
+    invalidate_cached_user(user_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted"}
@@ -127,6 +128,7 @@ def update_user(user_id: str, update_data: dict, current_user: dict = Depends(ge
         {"_id": ObjectId(user_id)},
         {"$set": update_data}
     )
+    invalidate_cached_user(user_id)
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="User not found or no changes")
     return {"message": "User updated"}
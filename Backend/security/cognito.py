@@ -1,9 +1,13 @@
+import threading
+import time
 from functools import lru_cache
+from typing import Dict, Optional
 
-from jose import jwt
+from jose import jwk, jwt
 from jose.exceptions import JOSEError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from loguru import logger
 import requests
 
 from config.settings import get_settings
@@ -11,21 +15,139 @@ from config.settings import get_settings
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-@lru_cache
-def get_jwks() -> dict:
+def get_jwks_url() -> str:
     settings = get_settings()
 
     if not settings.COGNITO_REGION or not settings.COGNITO_USER_POOL_ID:
         raise RuntimeError("Cognito settings are not configured")
 
-    jwks_url = (
+    return (
         f"https://cognito-idp.{settings.COGNITO_REGION}.amazonaws.com/"
         f"{settings.COGNITO_USER_POOL_ID}/.well-known/jwks.json"
     )
 
-    response = requests.get(jwks_url, timeout=10)
-    response.raise_for_status()
-    return response.json()
+
+class JWKSManager:
+    """
+    Cognito signing keys, pre-parsed into a kid -> key dict.
+
+    - Keys older than `ttl_seconds` are still served while a background thread
+      refreshes them, so verification never waits on the network once warm.
+    - An unknown kid (key rotation) triggers a blocking refresh, rate-limited to
+      one per `min_refresh_interval_seconds`.
+    - Concurrent refreshes are collapsed into a single fetch.
+    """
+
+    def __init__(self, ttl_seconds: int, min_refresh_interval_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_interval_seconds = min_refresh_interval_seconds
+        self._keys: Dict[str, jwk.Key] = {}
+        self._fetched_at = 0.0
+        self._last_attempt_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._background_lock = threading.Lock()
+        self._background_refresh: Optional[threading.Thread] = None
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "key_hits": 0,
+            "key_misses": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "verifications": 0,
+            "verify_ms_total": 0.0,
+            "verify_ms_max": 0.0,
+        }
+
+    def get_key(self, kid: str) -> jwk.Key:
+        """Return the parsed key for `kid`, raising KeyError if Cognito does not know it."""
+        if not self._keys:
+            self.refresh()
+        elif (
+                time.time() - self._fetched_at > self.ttl_seconds
+                and time.time() - self._last_attempt_at >= self.min_refresh_interval_seconds
+        ):
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None:
+            self._count("key_misses")
+            if time.time() - self._last_attempt_at >= self.min_refresh_interval_seconds:
+                self.refresh()
+                key = self._keys.get(kid)
+            if key is None:
+                raise KeyError(f"Unknown signing key id: {kid}")
+        else:
+            self._count("key_hits")
+        return key
+
+    def refresh(self) -> None:
+        """Fetch the JWKS and swap in the parsed keys (single-flight)."""
+        attempt_started = time.time()
+        with self._refresh_lock:
+            # Another thread refreshed while we were waiting for the lock.
+            if self._last_attempt_at >= attempt_started:
+                return
+            self._last_attempt_at = time.time()
+            try:
+                response = requests.get(get_jwks_url(), timeout=10)
+                response.raise_for_status()
+                keys = {
+                    key_data["kid"]: jwk.construct(key_data, algorithm=key_data.get("alg", "RS256"))
+                    for key_data in response.json().get("keys", [])
+                }
+            except (requests.RequestException, JOSEError, KeyError, ValueError):
+                self._count("refresh_failures")
+                raise
+
+            self._keys = keys
+            self._fetched_at = time.time()
+            self._count("refreshes")
+            logger.info(f"Cognito JWKS refreshed: {len(keys)} keys")
+
+    def _refresh_in_background(self) -> None:
+        with self._background_lock:
+            if self._background_refresh is not None and self._background_refresh.is_alive():
+                return
+            self._background_refresh = threading.Thread(
+                target=self._safe_refresh,
+                name="jwks-refresh",
+                daemon=True,
+            )
+            self._background_refresh.start()
+
+    def _safe_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Background Cognito JWKS refresh failed, keeping current keys: {e}")
+
+    def record_verification(self, duration_ms: float) -> None:
+        with self._metrics_lock:
+            self._metrics["verifications"] += 1
+            self._metrics["verify_ms_total"] += duration_ms
+            self._metrics["verify_ms_max"] = max(self._metrics["verify_ms_max"], duration_ms)
+
+    def _count(self, name: str) -> None:
+        with self._metrics_lock:
+            self._metrics[name] += 1
+
+    def get_metrics(self) -> dict:
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        verifications = metrics["verifications"]
+        metrics["verify_ms_avg"] = round(metrics["verify_ms_total"] / verifications, 3) if verifications else 0.0
+        metrics["keys"] = len(self._keys)
+        metrics["keys_age_seconds"] = round(time.time() - self._fetched_at, 1) if self._fetched_at else None
+        return metrics
+
+
+@lru_cache
+def get_jwks_manager() -> JWKSManager:
+    settings = get_settings()
+    return JWKSManager(
+        ttl_seconds=settings.COGNITO_JWKS_TTL_SECONDS,
+        min_refresh_interval_seconds=settings.COGNITO_JWKS_MIN_REFRESH_INTERVAL_SECONDS,
+    )
 
 
 def get_cognito_issuer() -> str:
@@ -46,13 +168,11 @@ def verify_cognito_token(token: str) -> dict:
     if not settings.COGNITO_APP_CLIENT_ID:
         raise RuntimeError("COGNITO_APP_CLIENT_ID is not configured")
 
+    jwks_manager = get_jwks_manager()
+    started = time.perf_counter()
     try:
         headers = jwt.get_unverified_header(token)
-        key = next(
-            key
-            for key in get_jwks()["keys"]
-            if key["kid"] == headers["kid"]
-        )
+        key = jwks_manager.get_key(headers["kid"])
 
         claims = jwt.decode(
             token,
@@ -64,11 +184,13 @@ def verify_cognito_token(token: str) -> dict:
                 "verify_at_hash": False,
             },
         )
-    except (JOSEError, KeyError, StopIteration, requests.RequestException) as exc:
+    except (JOSEError, KeyError, requests.RequestException) as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid Cognito token: {type(exc).__name__}: {str(exc)}",
         ) from exc
+    finally:
+        jwks_manager.record_verification((time.perf_counter() - started) * 1000)
 
     if claims.get("token_use") != "id":
         raise HTTPException(
@@ -1,9 +1,29 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Optional
 
+from bson import ObjectId
 from fastapi import Depends, HTTPException, status
+from loguru import logger
+
+from config.settings import get_settings
 from database.mongodb import mongodb
 from security.cognito import get_current_cognito_user
 
+# Resolved users keyed by Cognito `sub`. An entry is served until the TTL or the
+# token's `exp` passes, whichever comes first, and only while the profile claims
+# (email / names) match the ones it was synced with. Least recently used entries
+# are evicted past COGNITO_USER_CACHE_MAX_ENTRIES, and expired ones on every write.
+_user_cache: "OrderedDict[str, dict]" = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+# `updatedAt` is bumped off the request path, at most once per touch interval.
+_touch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-touch")
+
 
 def get_users_collection():
     return mongodb.get_collection("Users")
@@ -29,6 +49,60 @@ def serialize_user(user: dict) -> dict:
     }
 
 
+def _claims_fingerprint(claims: dict) -> tuple:
+    return claims.get("email", ""), claims.get("given_name"), claims.get("family_name")
+
+
+def _cache_user(claims: dict, user: dict, touched_at: Optional[float] = None) -> dict:
+    now = time.time()
+    cached_until = now + get_settings().COGNITO_USER_CACHE_TTL_SECONDS
+    token_exp = claims.get("exp")
+    if isinstance(token_exp, (int, float)):
+        cached_until = min(cached_until, token_exp)
+
+    entry = {
+        "user": user,
+        "fingerprint": _claims_fingerprint(claims),
+        "cached_until": cached_until,
+        "touched_at": now if touched_at is None else touched_at,
+    }
+    max_entries = get_settings().COGNITO_USER_CACHE_MAX_ENTRIES
+    with _user_cache_lock:
+        for sub in [sub for sub, cached in _user_cache.items() if cached["cached_until"] <= now]:
+            del _user_cache[sub]
+        _user_cache[claims["sub"]] = entry
+        _user_cache.move_to_end(claims["sub"])
+        while len(_user_cache) > max_entries:
+            _user_cache.popitem(last=False)
+    return entry
+
+
+def _touch_user(user_id: str) -> None:
+    try:
+        get_users_collection().update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"updatedAt": datetime.utcnow()}},
+        )
+    except Exception as e:
+        logger.warning(f"Failed to update updatedAt for user {user_id}: {e}")
+
+
+def _schedule_touch(entry: dict) -> None:
+    now = time.time()
+    with _user_cache_lock:
+        if now - entry["touched_at"] < get_settings().COGNITO_USER_TOUCH_INTERVAL_SECONDS:
+            return
+        entry["touched_at"] = now
+    _touch_executor.submit(_touch_user, entry["user"]["id"])
+
+
+def invalidate_cached_user(user_id: str) -> None:
+    """Drop the cached entry for an app user (call after profile writes)."""
+    with _user_cache_lock:
+        for sub in [sub for sub, entry in _user_cache.items() if entry["user"]["id"] == user_id]:
+            del _user_cache[sub]
+
+
 def sync_cognito_user(claims: dict) -> dict:
     users_collection = get_users_collection()
     cognito_sub = claims["sub"]
@@ -62,11 +136,54 @@ def sync_cognito_user(claims: dict) -> dict:
     users_collection.update_one(user_filter, update, upsert=True)
     user = users_collection.find_one({"cognito_sub": cognito_sub})
 
-    return serialize_user(user)
+    serialized = serialize_user(user)
+    _cache_user(claims, serialized)
+    return copy.deepcopy(serialized)
+
+
+def resolve_cognito_user(claims: dict) -> dict:
+    """
+    Return the app user for verified Cognito claims.
+
+    The Users document is only upserted the first time a `sub` is seen or when its
+    profile claims change; otherwise the cached user is returned, or re-read with a
+    single lookup once the cache entry expires.
+    """
+    cognito_sub = claims["sub"]
+    with _user_cache_lock:
+        entry = _user_cache.get(cognito_sub)
+        if entry is not None:
+            _user_cache.move_to_end(cognito_sub)
+
+    if entry is None or entry["fingerprint"] != _claims_fingerprint(claims):
+        return sync_cognito_user(claims)
+
+    if time.time() < entry["cached_until"]:
+        _schedule_touch(entry)
+        # A copy, so a request mutating its user can't leak into the next one
+        return copy.deepcopy(entry["user"])
+
+    user = get_users_collection().find_one({"cognito_sub": cognito_sub})
+    if not user:
+        return sync_cognito_user(claims)
+
+    serialized = serialize_user(user)
+    _schedule_touch(_cache_user(claims, serialized, touched_at=entry["touched_at"]))
+    return copy.deepcopy(serialized)
 
 
 def get_current_app_user(claims: dict = Depends(get_current_cognito_user)) -> dict:
-    return sync_cognito_user(claims)
+    return resolve_cognito_user(claims)
+
+
+def get_current_admin_user(claims: dict = Depends(get_current_cognito_user)) -> dict:
+    """App user for a token in the COGNITO_ADMIN_GROUP group (operational endpoints)."""
+    if get_settings().COGNITO_ADMIN_GROUP not in (claims.get("cognito:groups") or []):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return resolve_cognito_user(claims)
 
 
 def require_user_match(requested_user_id: str, current_user: dict) -> None:
@@ -0,0 +1,115 @@
+"""
+Process-wide provider clients.
+
+Each getter lazily builds one client per provider/configuration and keeps it for
+the life of the process (API container or warm Lambda), so connection pools and
+TLS sessions are reused instead of being set up on every request or SQS record.
+All of these clients are thread-safe.
+
+Per-call options (e.g. a longer OpenAI timeout) should be applied with
+`client.with_options(...)`, which shares the underlying connection pool.
+
+The SDKs are imported inside the getters: boto3/botocore, google-genai and
+openai together add a large share of cold-start import time, and most API
+requests and worker tasks only need one of them.
+"""
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from config.settings import get_settings
+
+if TYPE_CHECKING:
+    import httpx
+    from botocore.client import BaseClient
+    from google import genai
+    from openai import OpenAI
+
+BOTO3_MAX_POOL_CONNECTIONS = 32
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 60.0
+OPENAI_DEFAULT_TIMEOUT_SECONDS = 120.0
+
+
+_boto3_clients: Dict[Tuple[str, Optional[str]], "BaseClient"] = {}
+_boto3_lock = threading.Lock()
+
+
+def get_boto3_client(service_name: str, region_name: Optional[str] = None) -> "BaseClient":
+    """
+    Shared boto3 client for `service_name` (e.g. "s3", "sqs").
+
+    Clients are thread-safe once built, but building one is not (boto3's default
+    session isn't), and lru_cache doesn't stop two threads from building the same
+    client on a cold start. Construction is serialised on a lock, from a session
+    owned by this module.
+    """
+    key = (service_name, region_name)
+    client = _boto3_clients.get(key)
+    if client is not None:
+        return client
+
+    with _boto3_lock:
+        client = _boto3_clients.get(key)
+        if client is None:
+            from botocore.config import Config
+
+            client = _get_boto3_session().client(
+                service_name,
+                region_name=region_name or get_settings().AWS_REGION,
+                config=Config(
+                    max_pool_connections=BOTO3_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=True,
+                    retries={"mode": "standard"},
+                ),
+            )
+            _boto3_clients[key] = client
+    return client
+
+
+@lru_cache
+def _get_boto3_session():
+    import boto3
+
+    return boto3.session.Session()
+
+
+def get_s3_client() -> "BaseClient":
+    return get_boto3_client("s3")
+
+
+def get_sqs_client() -> "BaseClient":
+    return get_boto3_client("sqs")
+
+
+@lru_cache
+def get_openai_http_client() -> "httpx.Client":
+    """Keep-alive HTTP pool shared by the OpenAI SDK and LangChain ChatOpenAI models."""
+    import httpx
+
+    return httpx.Client(
+        timeout=OPENAI_DEFAULT_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+@lru_cache
+def get_openai_client() -> "OpenAI":
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=get_settings().OPENAI_API_KEY,
+        http_client=get_openai_http_client(),
+    )
+
+
+@lru_cache
+def get_genai_client() -> "genai.Client":
+    from google import genai
+
+    return genai.Client(api_key=get_settings().GOOGLE_API_KEY)
@@ -0,0 +1,161 @@
+"""
+Shared transport for raw OpenAI REST calls.
+
+Code that talks to the REST API directly (instead of through the SDK or
+LangChain) posts through `post_openai`, which provides:
+
+1. one keep-alive `requests.Session` per process, so TLS connections are reused
+   across calls, requests and warm Lambda invocations
+2. retries on 429 / 5xx / connection errors with exponential backoff and full
+   jitter, honoring `Retry-After` when the API sends it
+3. per-operation timeouts (OPERATION_TIMEOUTS, overridable per call)
+4. automatic `record_openai_response_usage` for every successful response
+
+Errors surface as the usual `requests` exceptions (`HTTPError` with the final
+response attached, `Timeout`, `ConnectionError`), so existing handlers keep working.
+"""
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from config.settings import get_settings
+from database.llm_consumption import record_openai_response_usage
+
+OPENAI_API_BASE = "https://api.openai.com/v1"
+
+SESSION_POOL_CONNECTIONS = 10
+SESSION_POOL_MAXSIZE = 32
+
+DEFAULT_TIMEOUT_SECONDS = 60
+OPERATION_TIMEOUTS = {
+    "embeddings": 60,
+    "tools_generation": 90,
+    "steps_generation": 120,
+    "estimation_complexity_assessment": 30,
+    "youtube_search_query_generation": 30,
+    "youtube_video_selection": 30,
+    "visual_dna_generation": 40,
+    "context_image_planning": 40,
+    "step_image_planning": 40,
+}
+
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 20.0
+# A Retry-After longer than this is not worth blocking a request/worker for
+RETRY_AFTER_MAX_SECONDS = 30.0
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+@lru_cache
+def get_openai_session() -> requests.Session:
+    """Keep-alive session shared by every raw OpenAI REST call in the process."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=SESSION_POOL_CONNECTIONS, pool_maxsize=SESSION_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Parse `Retry-After` (delta-seconds or HTTP date); None when absent or invalid."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff_seconds(attempt: int, response: Optional[requests.Response] = None) -> float:
+    if response is not None and response.status_code == 429:
+        retry_after = _retry_after_seconds(response)
+        if retry_after is not None:
+            return min(retry_after, RETRY_AFTER_MAX_SECONDS)
+    # Full jitter: spread concurrent retries (e.g. parallel SQS records) apart
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def post_openai(
+        path: str,
+        payload: Dict[str, Any],
+        *,
+        operation: str,
+        project_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        api_key: Optional[str] = None,
+        base_url: str = OPENAI_API_BASE,
+        record_usage: bool = True,
+) -> Dict[str, Any]:
+    """
+    POST `payload` to `{base_url}{path}` (e.g. "/chat/completions") and return the JSON body.
+
+    Usage is recorded under `operation` with the payload's model; recording
+    failures are logged and never fail the call.
+    """
+    url = f"{base_url.rstrip('/')}{path}"
+    headers = {
+        "Authorization": f"Bearer {api_key or get_settings().OPENAI_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    if timeout is None:
+        timeout = OPERATION_TIMEOUTS.get(operation, DEFAULT_TIMEOUT_SECONDS)
+    session = get_openai_session()
+
+    attempt = 0
+    while True:
+        try:
+            response = session.post(url, headers=headers, json=payload, timeout=timeout)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            if attempt >= max_retries:
+                raise
+            delay = _backoff_seconds(attempt)
+            logger.warning(f"OpenAI {operation} {type(e).__name__}; retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+        else:
+            if response.status_code < 400:
+                break
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= max_retries:
+                logger.error(f"OpenAI {operation} failed with {response.status_code}: {response.text[:500]}")
+                response.raise_for_status()
+            delay = _backoff_seconds(attempt, response)
+            logger.warning(
+                f"OpenAI {operation} returned {response.status_code}; "
+                f"retry {attempt + 1}/{max_retries} in {delay:.1f}s"
+            )
+        time.sleep(delay)
+        attempt += 1
+
+    data = response.json()
+    if record_usage:
+        try:
+            record_openai_response_usage(
+                data,
+                model=payload.get("model"),
+                operation=operation,
+                project_id=project_id,
+                user_id=user_id,
+                endpoint=urlparse(url).path,
+                metadata=metadata,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record OpenAI usage for {operation}: {e}")
+    return data
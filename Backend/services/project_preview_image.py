@@ -4,15 +4,15 @@ from io import BytesIO
 from typing import Optional
 from uuid import uuid4
 
-import boto3
 import requests
 from bson import ObjectId
 from loguru import logger
-from openai import APITimeoutError, OpenAI, OpenAIError
+from openai import APITimeoutError, OpenAIError
 from pymongo.collection import Collection
 
 from config.settings import get_settings
 from database.mongodb import mongodb
+from services.clients import get_openai_client, get_s3_client
 
 
 MODEL = "gpt-image-2"
@@ -184,8 +184,7 @@ def ensure_project_preview_image(
         f"has_image_analysis={bool(project.get('image_analysis'))} "
         f"has_reference_images={has_reference_images}"
     )
-    client = OpenAI(
-        api_key=settings.OPENAI_API_KEY,
+    client = get_openai_client().with_options(
         timeout=timeout_seconds,
         max_retries=0,
     )
@@ -258,7 +257,7 @@ def ensure_project_preview_image(
         return preview
 
     key = f"project_{project_id}/generated-images/previews/result_preview_{int(time.time())}_{uuid4().hex}.png"
-    s3 = boto3.client("s3", region_name=settings.AWS_REGION)
+    s3 = get_s3_client()
     try:
         logger.info(
             f"Uploading preview to S3 project_id={project_id} "
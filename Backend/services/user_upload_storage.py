@@ -5,10 +5,11 @@ from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID, uuid4
 
-import boto3
 from loguru import logger
 
 from config.settings import get_settings
+from database.user_uploads import record_user_upload
+from services.clients import get_s3_client
 
 
 DATA_URL_RE = re.compile(r"^data:(?P<mime>image/[a-zA-Z0-9.+-]+);base64,(?P<data>.+)$")
@@ -85,8 +86,7 @@ def store_user_uploaded_image(
     if step_number is not None:
         metadata["step_number"] = str(step_number)
 
-    s3 = boto3.client("s3", region_name=settings.AWS_REGION)
-    s3.put_object(
+    get_s3_client().put_object(
         Bucket=settings.AWS_S3_BUCKET,
         Key=key,
         Body=image_bytes,
@@ -107,10 +107,20 @@ def store_user_uploaded_image(
         source=source_folder,
     )
 
-    return {
+    upload = {
         "bucket": settings.AWS_S3_BUCKET,
         "key": key,
         "url": url,
         "content_type": mime_type,
         "size_bytes": len(image_bytes),
     }
+    record_user_upload(
+        upload,
+        user_id=user_folder,
+        project_id=project_folder,
+        thread_id=str(thread_id),
+        source=source_folder,
+        step_number=step_number,
+        created_at=now,
+    )
+    return upload
@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
@@ -10,7 +11,8 @@ from qdrant_client.http.exceptions import UnexpectedResponse
 from config.settings import get_settings
 from database.mongodb import mongodb
 from database.qdrant import create_embeddings_for_texts, upsert_embeddings_to_qdrant, search_similar_vectors, \
-    get_qdrant_client
+    search_similar_vectors_batch, get_qdrant_client
+from database.youtube_cache import get_cached_video_for_projects
 
 settings = get_settings()
 
@@ -24,6 +26,13 @@ kb_collection: Collection = database.get_collection("kb_documents")
 KB_COLLECTION_NAME = "kb_summaries"
 KB_SIMILARITY_THRESHOLD = 0.7
 
+PROJECT_SUMMARIES_COLLECTION = "project_summaries"
+
+# Summaries this close produce interchangeable Visual DNA / context image plans
+VISUAL_DNA_REUSE_THRESHOLD = 0.9
+# Summaries this close are the same DIY task and can share a tutorial video
+YOUTUBE_REUSE_THRESHOLD = 0.9
+
 
 def store_tool_in_database(tool_data: Dict[str, Any]) -> str:
     """
@@ -76,6 +85,22 @@ def create_and_store_tool_embeddings(tool_data: Dict[str, Any], tool_id: str):
     return qresult
 
 
+def _similar_tool_info(tool_doc: Dict[str, Any], score: float) -> Dict[str, Any]:
+    return {
+        "tool_id": str(tool_doc["_id"]),
+        "name": tool_doc["name"],
+        "description": tool_doc["description"],
+        "price": tool_doc["price"],
+        "risk_factors": tool_doc["risk_factors"],
+        "safety_measures": tool_doc["safety_measures"],
+        "image_link": tool_doc.get("image_link"),
+        "amazon_link": tool_doc.get("amazon_link"),
+        "category": tool_doc.get("category"),
+        "similarity_score": score,
+        "usage_count": tool_doc.get("usage_count", 0)
+    }
+
+
 def find_similar_tools(query: str, limit: int = 5, similarity_threshold: float = 0.7) -> List[Dict[str, Any]]:
     """
     Find similar tools in Qdrant based on semantic similarity.
@@ -102,20 +127,7 @@ def find_similar_tools(query: str, limit: int = 5, similarity_threshold: float =
                 if tool_id:
                     tool_doc = tools_collection.find_one({"_id": ObjectId(tool_id)})
                     if tool_doc:
-                        tool_info = {
-                            "tool_id": str(tool_doc["_id"]),
-                            "name": tool_doc["name"],
-                            "description": tool_doc["description"],
-                            "price": tool_doc["price"],
-                            "risk_factors": tool_doc["risk_factors"],
-                            "safety_measures": tool_doc["safety_measures"],
-                            "image_link": tool_doc.get("image_link"),
-                            "amazon_link": tool_doc.get("amazon_link"),
-                            "category": tool_doc.get("category"),
-                            "similarity_score": score,
-                            "usage_count": tool_doc.get("usage_count", 0)
-                        }
-                        similar_tools.append(tool_info)
+                        similar_tools.append(_similar_tool_info(tool_doc, score))
 
         return similar_tools
 
@@ -124,6 +136,90 @@ def find_similar_tools(query: str, limit: int = 5, similarity_threshold: float =
         return []
 
 
+def _find_similar_tools_each(names: List[str], limit: int,
+                             similarity_threshold: float) -> List[List[Dict[str, Any]]]:
+    """Unbatched fallback: one find_similar_tools per name, a failure only empties that name."""
+    results = []
+    for name in names:
+        if not (name and name.strip()):
+            results.append([])
+            continue
+        try:
+            results.append(find_similar_tools(name, limit=limit, similarity_threshold=similarity_threshold))
+        except Exception as e:
+            print(f"Error finding similar tools for {name}: {e}")
+            results.append([])
+    return results
+
+
+def find_similar_tools_batch(names: List[str], limit: int = 5,
+                             similarity_threshold: float = 0.7) -> List[List[Dict[str, Any]]]:
+    """
+    Batched find_similar_tools: embeds every name in one embeddings request, runs one
+    Qdrant batch query and loads all matched tools with a single Mongo $in query.
+
+    Returns one list of similar tools per name, in the same order as `names`
+    (an empty list for blank names or when nothing matches). If the batched
+    embeddings or Qdrant call fails, falls back to one lookup per name; if the
+    Mongo load fails, the names are returned unmatched.
+    """
+    results: List[List[Dict[str, Any]]] = [[] for _ in names]
+    query_indexes = [i for i, name in enumerate(names) if name and name.strip()]
+    if not query_indexes:
+        return results
+
+    try:
+        embeddings = create_embeddings_for_texts([names[i] for i in query_indexes],
+                                                 model=settings.OPENAI_EMBEDDING_MODEL)
+        if not embeddings:
+            return results
+
+        batch_hits = search_similar_vectors_batch(
+            query_vectors=embeddings,
+            collection_name="tools",
+            limit=limit,
+            score_threshold=similarity_threshold
+        )
+    except Exception as e:
+        print(f"Batched tool search failed, searching tools one by one: {e}")
+        return _find_similar_tools_each(names, limit, similarity_threshold)
+
+    scored_ids: List[List[tuple]] = []
+    object_ids = set()
+    for hits in batch_hits:
+        scored = []
+        for result in hits:
+            score = getattr(result, "score", 0.0)
+            tool_id = (result.payload or {}).get("tool_id")
+            if score < similarity_threshold or not tool_id:
+                continue
+            try:
+                object_id = ObjectId(tool_id)
+            except Exception:
+                continue
+            scored.append((object_id, score))
+            object_ids.add(object_id)
+        scored_ids.append(scored)
+
+    if not object_ids:
+        return results
+
+    try:
+        tool_docs = {doc["_id"]: doc for doc in tools_collection.find({"_id": {"$in": list(object_ids)}})}
+    except Exception as e:
+        print(f"Error loading similar tools from Mongo: {e}")
+        return results
+
+    for name_index, scored in zip(query_indexes, scored_ids):
+        results[name_index] = [
+            _similar_tool_info(tool_docs[object_id], score)
+            for object_id, score in scored
+            if object_id in tool_docs
+        ]
+
+    return results
+
+
 def update_tool_usage(tool_id: str):
     """
     Update the usage count and last used timestamp for a tool.
@@ -137,14 +233,59 @@ def update_tool_usage(tool_id: str):
     )
 
 
+# ---------------------------------------------------------------------------
+# Project summary embedding (shared by the searches of one generation job)
+# ---------------------------------------------------------------------------
+
+def get_project_summary_vector(
+        project_id: str,
+        summary: str,
+        collection_name: str = PROJECT_SUMMARIES_COLLECTION,
+) -> Optional[List[float]]:
+    """
+    Return the query vector for a project's summary.
+
+    store_summary already embedded the summary (plus hypotheses) and upserted it
+    into `collection_name` as point uuid5(NAMESPACE_URL, f"{project_id}_0"), so that
+    vector is fetched from Qdrant. The summary is only embedded again when the point
+    is missing. Returns None if neither works.
+    """
+    point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{project_id}_0"))
+    try:
+        points = get_qdrant_client().retrieve(
+            collection_name=collection_name,
+            ids=[point_id],
+            with_payload=False,
+            with_vectors=True,
+        )
+        if points and isinstance(points[0].vector, list) and points[0].vector:
+            print(f"🔍 Reusing stored summary vector for project {project_id}")
+            return points[0].vector
+    except Exception as e:
+        print(f"⚠️ Stored summary vector unavailable for project {project_id}: {e}")
+
+    if not summary or not summary.strip():
+        return None
+    try:
+        embeddings = create_embeddings_for_texts([summary], model=settings.OPENAI_EMBEDDING_MODEL)
+    except Exception as e:
+        print(f"⚠️ Summary embedding creation failed: {e}")
+        return None
+    return embeddings[0] if embeddings else None
+
+
 # ---------------------------------------------------------------------------
 # KB (Knowledge Base) similarity search
 # ---------------------------------------------------------------------------
 
-def search_kb_by_summary(summary: str, top_k: int = 1) -> Optional[Dict[str, Any]]:
+def search_kb_by_summary(
+        summary: str,
+        top_k: int = 1,
+        query_vector: Optional[List[float]] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Search the Qdrant kb_summaries collection for the most similar KB document
-    to the given summary text.
+    to the given summary text. Pass `query_vector` to skip embedding the summary.
 
     Returns a dict with:
         score       : float  — cosine similarity (0–1)
@@ -157,19 +298,22 @@ def search_kb_by_summary(summary: str, top_k: int = 1) -> Optional[Dict[str, Any
 
     Returns None if no match is found or on any error.
     """
-    if not summary or not summary.strip():
-        return None
+    if query_vector is not None:
+        query_vec = query_vector
+    else:
+        if not summary or not summary.strip():
+            return None
 
-    try:
-        embeddings = create_embeddings_for_texts([summary], model=settings.OPENAI_EMBEDDING_MODEL)
-    except Exception as e:
-        print(f"⚠️ KB search: embedding creation failed: {e}")
-        return None
+        try:
+            embeddings = create_embeddings_for_texts([summary], model=settings.OPENAI_EMBEDDING_MODEL)
+        except Exception as e:
+            print(f"⚠️ KB search: embedding creation failed: {e}")
+            return None
 
-    if not embeddings:
-        return None
+        if not embeddings:
+            return None
 
-    query_vec = embeddings[0]
+        query_vec = embeddings[0]
 
     try:
         qclient = get_qdrant_client()
@@ -243,7 +387,12 @@ def search_kb_by_summary(summary: str, top_k: int = 1) -> Optional[Dict[str, Any
 # Project similarity search (unchanged)
 # ---------------------------------------------------------------------------
 
-def similar_by_project(project_id: str, top_k: int = 2, collection_name: str = "project_summaries"):
+def similar_by_project(
+        project_id: str,
+        top_k: int = 2,
+        collection_name: str = PROJECT_SUMMARIES_COLLECTION,
+        query_vector: Optional[List[float]] = None,
+):
     """
     RAG decision logic (strictly implements the 3 cases you specified):
       1) best similarity >= 0.90 -> copy tools & steps from matched project into new project
@@ -251,7 +400,8 @@ def similar_by_project(project_id: str, top_k: int = 2, collection_name: str = "
            tools & steps and store modified versions for the new project
       3) similarity < 0.60 -> do nothing (leave project as-is)
     The function assumes the project's summary has already been saved in Mongo (that's why
-    save_information must be called before this function).
+    save_information must be called before this function). Pass `query_vector` to skip
+    embedding the summary.
     """
     try:
         obj_id = ObjectId(project_id)
@@ -266,16 +416,19 @@ def similar_by_project(project_id: str, top_k: int = 2, collection_name: str = "
     if not summary or not str(summary).strip():
         raise HTTPException(status_code=400, detail="Project has no summary or user_description to embed")
 
-    model_name = settings.OPENAI_EMBEDDING_MODEL
-    try:
-        embeddings = create_embeddings_for_texts([summary], model=model_name)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Embedding creation failed: {str(e)}")
+    if query_vector is not None:
+        query_vec = query_vector
+    else:
+        model_name = settings.OPENAI_EMBEDDING_MODEL
+        try:
+            embeddings = create_embeddings_for_texts([summary], model=model_name)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Embedding creation failed: {str(e)}")
 
-    print(f"🔍 Created embedding for project {project_id} using model {model_name}")
-    if not embeddings:
-        raise HTTPException(status_code=500, detail="Embedding API returned no embedding")
-    query_vec = embeddings[0]
+        print(f"🔍 Created embedding for project {project_id} using model {model_name}")
+        if not embeddings:
+            raise HTTPException(status_code=500, detail="Embedding API returned no embedding")
+        query_vec = embeddings[0]
 
     print(f"🔍 Querying Qdrant for similar projects to {project_id} in collection {collection_name}")
     try:
@@ -377,3 +530,103 @@ def similar_by_project(project_id: str, top_k: int = 2, collection_name: str = "
             return None
     else:
         return None
+
+
+# ---------------------------------------------------------------------------
+# Visual DNA reuse (semantic cache over project summaries)
+# ---------------------------------------------------------------------------
+
+def _similar_project_scores(
+        project_id: str,
+        query_vector: Optional[List[float]],
+        threshold: float,
+        collection_name: str = PROJECT_SUMMARIES_COLLECTION,
+        limit: int = 5,
+) -> Dict[str, float]:
+    """
+    Other projects whose summary scores >= threshold against `query_vector`,
+    as {project_id: best score}, most similar first. Empty on any failure.
+    """
+    if not query_vector:
+        return {}
+
+    try:
+        hits = get_qdrant_client().query_points(
+            collection_name=collection_name,
+            query=query_vector,
+            limit=limit + 1,
+            score_threshold=threshold,
+            with_payload=True,
+        ).points
+    except Exception as e:
+        print(f"⚠️ Similar project lookup failed: {e}")
+        return {}
+
+    scores: Dict[str, float] = {}
+    for hit in hits:
+        candidate_id = (hit.payload or {}).get("project_id")
+        if candidate_id and candidate_id != project_id and candidate_id not in scores:
+            scores[candidate_id] = float(hit.score)
+    return scores
+
+
+def find_visual_dna_donor(
+        project_id: str,
+        query_vector: Optional[List[float]],
+        threshold: float = VISUAL_DNA_REUSE_THRESHOLD,
+        collection_name: str = PROJECT_SUMMARIES_COLLECTION,
+        limit: int = 5,
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the most similar other project (score >= threshold) that already has an
+    image_visual_dna, so its DNA and context image plan can be reused instead of
+    being generated again. Returns {"project_id", "score", "dna", "context_plan",
+    "context_plan_user_images"} or None. Never raises: a failed lookup is just a cache miss.
+    """
+    scores = _similar_project_scores(project_id, query_vector, threshold, collection_name, limit)
+    if not scores:
+        return None
+
+    try:
+        donors = project_collection.find(
+            {
+                "_id": {"$in": [ObjectId(pid) for pid in scores]},
+                "image_visual_dna": {"$ne": None},
+            },
+            {"image_visual_dna": 1, "image_context_plan": 1, "image_context_plan_user_images": 1},
+        )
+        best = max(donors, key=lambda doc: scores[str(doc["_id"])], default=None)
+    except Exception as e:
+        print(f"⚠️ Visual DNA cache lookup failed: {e}")
+        return None
+
+    if not best:
+        return None
+    return {
+        "project_id": str(best["_id"]),
+        "score": scores[str(best["_id"])],
+        "dna": best["image_visual_dna"],
+        "context_plan": best.get("image_context_plan"),
+        "context_plan_user_images": best.get("image_context_plan_user_images"),
+    }
+
+
+def find_cached_youtube_video(
+        project_id: Optional[str],
+        query_vector: Optional[List[float]],
+        threshold: float = YOUTUBE_REUSE_THRESHOLD,
+) -> Optional[Dict[str, Any]]:
+    """
+    Cached tutorial video of the most similar other project (score >= threshold),
+    as {"project_id", "score", "video_url", "expires_at"}, or None on a miss.
+    """
+    scores = _similar_project_scores(project_id, query_vector, threshold)
+    cached = get_cached_video_for_projects(list(scores))
+    if not cached:
+        return None
+    return {
+        "project_id": cached["project_id"],
+        "score": scores[cached["project_id"]],
+        "video_url": cached["video_url"],
+        "expires_at": cached["expires_at"],
+    }
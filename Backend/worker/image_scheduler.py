@@ -0,0 +1,191 @@
+"""
+Dependency-aware dispatch of step image tasks.
+
+Step images use the earlier step images as references, so a step should start
+as soon as the steps it references are finished, not after a fixed delay.
+`ImageStepScheduler.start` stores the schedule on the project document under
+`image_schedule` and sends only the steps with no dependencies; every finished
+step (complete or failed) is the completion signal that dispatches the steps it
+unblocks. A step's `released` flag is claimed with a conditional update, so it
+is sent exactly once even when its prerequisites finish concurrently.
+
+A step whose Lambda dies for good (its message ends up in the DLQ) never sends
+its signal, so `sweep_stalled` treats a released step that has not finished
+within the stall timeout as failed: its image is marked "failed" and the steps
+waiting on it are dispatched.
+
+Modes:
+- "chained" (default): step N waits for step N-1, and so for every earlier step
+  whose image it may use as a reference. Steps marked independent (their image
+  doesn't show the result of earlier steps, e.g. gathering tools) start
+  immediately and don't use prior step images; the next chained step waits for
+  them too. Without such steps the images are generated one after another.
+- "independent": every step starts immediately (no visual memory of prior steps)
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import uuid4
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+CHAINED = "chained"
+INDEPENDENT = "independent"
+DEPENDENCY_MODES = {CHAINED, INDEPENDENT}
+
+
+def build_dependencies(
+        step_ids: list[str],
+        mode: str = CHAINED,
+        independent: Optional[set[str]] = None,
+) -> dict[str, list[str]]:
+    """
+    Map each step id to the step ids that must finish before it starts. In
+    chained mode a step waits for every step since the last chained one (which
+    itself waited for everything before it); `independent` steps wait for none.
+    """
+    if mode not in DEPENDENCY_MODES:
+        raise ValueError(f"Unknown step image dependency mode: {mode}")
+    if mode == INDEPENDENT:
+        return {step_id: [] for step_id in step_ids}
+
+    independent = independent or set()
+    dependencies = {}
+    last_chained = 0
+    for i, step_id in enumerate(step_ids):
+        if step_id in independent:
+            dependencies[step_id] = []
+            continue
+        dependencies[step_id] = step_ids[last_chained:i]
+        last_chained = i
+    return dependencies
+
+
+class ImageStepScheduler:
+    """Releases queued image-step messages as the steps they depend on finish."""
+
+    def __init__(self, project_collection: Collection, sqs_client, queue_url: str):
+        self.project_collection = project_collection
+        self.sqs = sqs_client
+        self.queue_url = queue_url
+
+    def start(self, project_id: str, bodies: list[dict], mode: str = CHAINED) -> str:
+        """Store a new schedule for `bodies` (one SQS body per step) and send the ready steps."""
+        run_id = uuid4().hex
+        dependencies = build_dependencies(
+            [body["step_id"] for body in bodies],
+            mode,
+            independent={body["step_id"] for body in bodies if body.get("independent")},
+        )
+        tasks = {
+            body["step_id"]: {
+                "body": {**body, "run_id": run_id},
+                "depends_on": dependencies[body["step_id"]],
+                "released": False,
+            }
+            for body in bodies
+        }
+        now = datetime.utcnow()
+        self.project_collection.update_one(
+            {"_id": ObjectId(project_id)},
+            {"$set": {"image_schedule": {
+                "run_id": run_id,
+                "mode": mode,
+                "tasks": tasks,
+                "done": [],
+                "completed": not tasks,
+                "started_at": now,
+                "updated_at": now,
+            }}},
+        )
+        print(f"🗓️ Image schedule {run_id} ({mode}): {len(tasks)} steps")
+
+        self._release_ready(project_id, run_id, tasks, done=set())
+        return run_id
+
+    def step_finished(self, project_id: str, run_id: Optional[str], step_id: str) -> None:
+        """Record `step_id` as finished and dispatch the steps it unblocks."""
+        if not run_id:
+            return
+
+        doc = self.project_collection.find_one_and_update(
+            {"_id": ObjectId(project_id), "image_schedule.run_id": run_id},
+            {
+                "$addToSet": {"image_schedule.done": step_id},
+                "$set": {"image_schedule.updated_at": datetime.utcnow()},
+            },
+            projection={"image_schedule": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not doc:
+            print(f"⚠️ Image schedule {run_id} superseded; not dispatching after step {step_id}")
+            return
+
+        schedule = doc["image_schedule"]
+        done = set(schedule.get("done", []))
+        if set(schedule["tasks"]) <= done:
+            self.project_collection.update_one(
+                {"_id": ObjectId(project_id), "image_schedule.run_id": run_id},
+                {"$set": {"image_schedule.completed": True}},
+            )
+            return
+        self._release_ready(project_id, run_id, schedule["tasks"], done)
+
+    def sweep_stalled(self, stall_timeout_seconds: int, limit: int = 100) -> int:
+        """
+        Fail released steps that haven't finished `stall_timeout_seconds` after the
+        schedule last progressed, and dispatch what they were blocking. Returns the
+        number of steps failed.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=stall_timeout_seconds)
+        stalled = self.project_collection.find(
+            {"image_schedule.completed": False, "image_schedule.updated_at": {"$lt": cutoff}},
+            {"image_schedule": 1},
+        ).limit(limit)
+
+        failed = 0
+        for doc in stalled:
+            project_id = str(doc["_id"])
+            schedule = doc["image_schedule"]
+            done = set(schedule.get("done", []))
+            for step_id, task in schedule["tasks"].items():
+                if not task.get("released") or step_id in done:
+                    continue
+                if task.get("released_at") and task["released_at"] > cutoff:
+                    continue  # still within its own time budget
+                print(f"⏱️ Step {step_id} image of project {project_id} never finished; marking it failed")
+                self.project_collection.update_one(
+                    {
+                        "_id": doc["_id"],
+                        f"step_generation.steps.{int(step_id) - 1}.image.status": "in-progress",
+                    },
+                    {"$set": {f"step_generation.steps.{int(step_id) - 1}.image.status": "failed"}},
+                )
+                self.step_finished(project_id, schedule["run_id"], step_id)
+                failed += 1
+        return failed
+
+    def _release_ready(self, project_id: str, run_id: str, tasks: dict, done: set) -> None:
+        for step_id, task in tasks.items():
+            if task.get("released") or not set(task["depends_on"]) <= done:
+                continue
+
+            claimed = self.project_collection.update_one(
+                {
+                    "_id": ObjectId(project_id),
+                    "image_schedule.run_id": run_id,
+                    f"image_schedule.tasks.{step_id}.released": False,
+                },
+                {"$set": {
+                    f"image_schedule.tasks.{step_id}.released": True,
+                    f"image_schedule.tasks.{step_id}.released_at": datetime.utcnow(),
+                }},
+            )
+            if claimed.modified_count != 1:
+                continue  # another worker dispatched it
+
+            self.sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(task["body"]))
+            waited_for = ", ".join(task["depends_on"]) or "nothing"
+            print(f"📤 Dispatched step {step_id} image (waited for: {waited_for})")
@@ -0,0 +1,128 @@
+"""
+Stage scheduler for the generation worker.
+
+A generation job is a small dependency graph (similarity + KB search -> tools ->
+tool matching / steps -> estimation ...). GenerationPipeline runs each stage on a
+thread pool once the stages it depends on have finished, and records the timing
+of every stage on the project document under `generation_timings`.
+"""
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from bson.objectid import ObjectId
+from pymongo.collection import Collection
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class GenerationPipeline:
+    """
+    Stages submitted with `submit` run in the background; `run` executes a stage
+    on the calling thread (still timed). A stage whose dependency raised is not
+    executed and re-raises the dependency's exception. Leaving the context waits
+    for every outstanding stage, so background work never outlives the job.
+    """
+
+    def __init__(
+            self,
+            project_id: str,
+            project_collection: Optional[Collection] = None,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        self.project_id = project_id
+        self.project_collection = project_collection
+        self.timings: Dict[str, dict] = {}
+        self._futures: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"generation-{project_id}",
+        )
+        self._started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+
+    def __enter__(self) -> "GenerationPipeline":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # ─── Scheduling ───────────────────────────────────────────────────────────
+
+    def submit(
+            self,
+            name: str,
+            fn: Callable[..., Any],
+            *args,
+            depends_on: Iterable[str] = (),
+            **kwargs,
+    ) -> Future:
+        """Schedule `fn` to run in the background once `depends_on` stages complete."""
+        if name in self._futures:
+            raise ValueError(f"Stage '{name}' already submitted")
+
+        dependencies = []
+        for dependency in depends_on:
+            if dependency not in self._futures:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+            dependencies.append(self._futures[dependency])
+
+        def _run():
+            for dependency_future in dependencies:
+                dependency_future.result()
+            return self._timed(name, fn, *args, **kwargs)
+
+        future = self._executor.submit(_run)
+        self._futures[name] = future
+        return future
+
+    def run(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn` on the calling thread, recording it as a stage."""
+        return self._timed(name, fn, *args, **kwargs)
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Block until a background stage finishes and return its value."""
+        return self._futures[name].result(timeout=timeout)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._record(
+            "total",
+            self._started_at,
+            (time.perf_counter() - self._started) * 1000,
+            "complete",
+        )
+
+    # ─── Timing ───────────────────────────────────────────────────────────────
+
+    def _timed(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        status = "complete"
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            self._record(name, started_at, (time.perf_counter() - started) * 1000, status)
+
+    def _record(self, name: str, started_at: datetime, duration_ms: float, status: str) -> None:
+        entry = {
+            "started_at": started_at,
+            "duration_ms": round(duration_ms, 1),
+            "status": status,
+        }
+        self.timings[name] = entry
+        print(f"⏱️ Stage '{name}' {status} in {entry['duration_ms']:.0f} ms")
+
+        if self.project_collection is None:
+            return
+        try:
+            self.project_collection.update_one(
+                {"_id": ObjectId(self.project_id)},
+                {"$set": {f"generation_timings.{name}": entry}},
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to record timing for stage '{name}': {e}")
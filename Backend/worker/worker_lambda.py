@@ -3,48 +3,72 @@ import json
 import re
 import traceback
 from datetime import datetime
+from functools import lru_cache
 import time
 from typing import Any
 
-import boto3
 import requests
 from bson.objectid import ObjectId
 from pymongo.collection import Collection
 from pymongo.database import Database
 
-from agents.solution_generation_multi_agent.image_generation_agent.image_generation_agent import ImageGenerationAgent
 from agents.solution_generation_multi_agent.planner import ToolsAgent, EstimationAgent
-from agents.solution_generation_multi_agent.services.image_generation_agent_service import ImageGenerationAgentService
-from agents.solution_generation_multi_agent.services.steps_generation_agent_service import StepsGenerationAgentService
-from agents.solution_generation_multi_agent.steps_generation_agent.steps_generation_agent import StepsGenerationAgent
 from config.settings import get_settings
+from database.embedding_cache import get_embedding_cache_stats
+from database.llm_consumption import (
+    ROLLUP_COMPACTION_BATCH_SIZE,
+    compact_llm_consumption_rollups,
+    flush_llm_consumption,
+)
+from database.youtube_cache import (
+    YOUTUBE_SEARCH_QUOTA_COST,
+    get_cached_search,
+    get_cached_video,
+    reserve_youtube_quota,
+    store_cached_search,
+    store_cached_video,
+)
 from database.mongodb import mongodb
-from services.project_preview_image import ensure_project_preview_image
+from services.clients import get_s3_client, get_sqs_client
+from services.llm_transport import post_openai
 from helper import (
     similar_by_project,
     store_tool_in_database,
     create_and_store_tool_embeddings,
-    find_similar_tools,
+    find_similar_tools_batch,
     update_tool_usage,
     search_kb_by_summary,        # NEW — KB similarity search
+    get_project_summary_vector,
+    find_visual_dna_donor,
+    find_cached_youtube_video,
     KB_SIMILARITY_THRESHOLD,     # NEW — 0.7 constant
 )
-from database.llm_consumption import record_openai_response_usage
+from image_scheduler import ImageStepScheduler
+from pipeline import GenerationPipeline
 
 settings = get_settings()
-s3 = boto3.client("s3", region_name=settings.AWS_REGION)
-sqs = boto3.client("sqs", region_name=settings.AWS_REGION)
 database: Database = mongodb.get_database()
 project_collection: Collection = database.get_collection("Project")
 steps_collection: Collection = database.get_collection("ProjectSteps")
 tools_collection: Collection = database.get_collection("Tools")
 users_collection: Collection = database.get_collection("Users")
 
-def _get_image_service() -> ImageGenerationAgentService:
-    """Create a fresh ImageGenerationAgentService. Called per-invocation."""
+# Heavy SDKs (google-genai, PIL, LangChain, openai) are imported by the task
+# handlers that need them, not at module load: each SQS task type uses only some.
+
+@lru_cache
+def _get_image_service():
+    """Shared ImageGenerationAgentService (stateless; its clients are pooled process-wide)."""
+    from agents.solution_generation_multi_agent.image_generation_agent.image_generation_agent import (
+        ImageGenerationAgent,
+    )
+    from agents.solution_generation_multi_agent.services.image_generation_agent_service import (
+        ImageGenerationAgentService,
+    )
+
     return ImageGenerationAgentService(
         image_generation_agent=ImageGenerationAgent(),
-        s3_client=s3,
+        s3_client=get_s3_client(),
         project_collection=project_collection,
     )
 
@@ -112,24 +136,44 @@ def _append_user_profile_context(summary: str, user_profile_context: str) -> str
     return f"{summary.strip()}\n\n{user_profile_context}"
 
 
-def preflight_image_setup(project_id: str, summary: str) -> None:
+def preflight_image_setup(
+        project_id: str,
+        summary: str,
+        summary_vector: list[float] | None = None,
+) -> None:
     service = _get_image_service()
+    context_plan = None
+    context_plan_user_images = None
 
-    # 1. Visual DNA
+    # 1. Visual DNA — reused from a near-identical project when possible
     existing_dna = service.get_visual_dna(project_id)
     if existing_dna:
         print(f"✅ Visual DNA exists — domain: {existing_dna.get('domain')}")
         dna = existing_dna
     else:
-        print(f"🔍 Generating Visual DNA for project {project_id}")
-        dna = service.generate_visual_dna(summary)
-        service.save_visual_dna(project_id, dna)
-        print(f"✅ Visual DNA saved — domain: {dna.get('domain')}, "
-              f"objects: {list(dna.get('object_colors', {}).keys())}")
+        donor = find_visual_dna_donor(project_id, summary_vector)
+        if donor:
+            dna = donor["dna"]
+            context_plan = donor.get("context_plan")
+            context_plan_user_images = donor.get("context_plan_user_images")
+            service.save_visual_dna(project_id, dna, source={
+                "type": "cache",
+                "project_id": donor["project_id"],
+                "score": donor["score"],
+            })
+            print(f"♻️ Visual DNA reused from project {donor['project_id']} "
+                  f"(score {donor['score']:.3f}) — domain: {dna.get('domain')}, "
+                  f"context plan {'reused' if context_plan else 'not available'}")
+        else:
+            print(f"🔍 Generating Visual DNA for project {project_id}")
+            dna = service.generate_visual_dna(summary)
+            service.save_visual_dna(project_id, dna, source={"type": "generated"})
+            print(f"✅ Visual DNA saved — domain: {dna.get('domain')}, "
+                  f"objects: {list(dna.get('object_colors', {}).keys())}")
 
     # 2. Context images — build_context_images handles all three cases
     existing_ctx = service.get_context_images(project_id)
-    if existing_ctx and existing_ctx.objects:
+    if existing_ctx and existing_ctx.objects and existing_ctx.status == "complete":
         print(f"✅ Context images exist: {[o.name for o in existing_ctx.objects]}")
     else:
         print(f"🔍 Building context images for project {project_id}")
@@ -138,6 +182,8 @@ def preflight_image_setup(project_id: str, summary: str) -> None:
                 project_id=project_id,
                 summary_text=summary,
                 dna=dna,
+                image_plans=context_plan,
+                plan_user_image_count=context_plan_user_images,
             )
             user_count = sum(
                 1 for o in ctx_result.objects
@@ -156,11 +202,14 @@ def enqueue_image_tasks(
         steps: list[dict],
         size: str = "1536x1024",
         summary: str = "",
+        dependency_mode: str | None = None,
+        summary_vector: list[float] | None = None,
 ) -> None:
     """
     1. Run preflight (DNA + anchors) synchronously — blocks until complete.
-    2. Enqueue one SQS message per step, staggered so earlier steps
-       complete before later ones start fetching their references.
+    2. Hand the steps to the ImageStepScheduler: steps with no pending
+       dependencies are sent now, the rest as soon as the steps they
+       reference finish (see image_scheduler).
     """
     images_sqs_url = settings.AWS_SQS_URL
     if not images_sqs_url:
@@ -169,37 +218,34 @@ def enqueue_image_tasks(
 
     # ── PREFLIGHT: must complete before ANY SQS message is sent ─────────────
     if summary:
-        preflight_image_setup(project_id, summary)
+        preflight_image_setup(project_id, summary, summary_vector=summary_vector)
 
-    # ── ENQUEUE: staggered so step N-1 likely finishes before step N starts ──
+    bodies = []
     for i, step in enumerate(steps, start=1):
         sum_text = "Overall summary: " + summary + "\n"
         step_text = "CURRENT STEP: " + ", ".join(
             s for s in step.get("instructions", []) if s and s.strip()
         )
-        body = {
+        bodies.append({
             "task": "image_step",
             "project": project_id,
             "step_id": str(i),
             "step_text": step_text,
             "summary_text": sum_text,
             "size": size,
-        }
+            # Starts without waiting for (or referencing) earlier step images
+            "independent": step.get("builds_on_previous_step") is False,
+        })
         project_collection.update_one(
             {"_id": ObjectId(project_id)},
             {"$set": {f"step_generation.steps.{i - 1}.image.status": "in-progress"}}
         )
-        sqs.send_message(
-            QueueUrl=images_sqs_url,
-            MessageBody=json.dumps(body),
-            # Stagger: step1=0s, step2=15s, step3=30s...
-            # 15s gives each step time to generate + upload before next reads it
-            DelaySeconds=min((i - 1) * 15, 900),
-        )
-        print(f"📤 Enqueued step {i} with {(i-1)*15}s delay")
+
+    scheduler = ImageStepScheduler(project_collection, get_sqs_client(), images_sqs_url)
+    scheduler.start(project_id, bodies, mode=dependency_mode or settings.STEP_IMAGE_DEPENDENCY_MODE)
 
 def handle_image_step(msg: dict) -> None:
-    """Generate + upload image for a single step and persist result."""
+    """Generate + upload image for a single step, persist result and release dependent steps."""
     project_id = msg["project"]
     step_id = msg["step_id"]
     step_text = msg["step_text"]
@@ -208,39 +254,51 @@ def handle_image_step(msg: dict) -> None:
 
     service = _get_image_service()
 
-    # ── Readiness check: wait for DNA + anchors if preflight is still running ─
-    # This handles edge cases where preflight and step1 overlap
-    max_wait_secs = 60
-    waited = 0
-    while waited < max_wait_secs:
-        dna = service.get_visual_dna(project_id)
-        if dna:
-            break
-        print(f"⏳ Step {step_id} waiting for Visual DNA... ({waited}s)")
-        time.sleep(5)
-        waited += 5
-
-    if not dna:
-        print(f"⚠️ Step {step_id}: Visual DNA not ready after {max_wait_secs}s — generating fallback")
-
-    result = service.generate_step_image(
-        step_id=step_id,
-        step_text=step_text,
-        summary_text=summary_text,
-        size=size,
-        project_id=project_id,
-    )
+    # Steps are only dispatched after preflight has finished, so the DNA is
+    # normally there; generate_step_image builds a fallback if it is not.
+    if not service.get_visual_dna(project_id):
+        print(f"⚠️ Step {step_id}: Visual DNA not found — generating fallback")
+
+    try:
+        result = service.generate_step_image(
+            step_id=step_id,
+            step_text=step_text,
+            summary_text=summary_text,
+            size=size,
+            project_id=project_id,
+            use_prior_steps=not msg.get("independent"),
+        )
+        # Single write — model_dump() includes all fields: url, state_summary, etc.
+        project_collection.update_one(
+            {"_id": ObjectId(project_id)},
+            {"$set": {f"step_generation.steps.{int(step_id) - 1}.image": result.model_dump()}},
+        )
+    except Exception:
+        project_collection.update_one(
+            {"_id": ObjectId(project_id)},
+            {"$set": {f"step_generation.steps.{int(step_id) - 1}.image.status": "failed"}},
+        )
+        raise
+    finally:
+        # Completion signal, sent only once the result (or the failure) is stored,
+        # since the next step reads this one as its reference. A failed step must
+        # not stall the steps waiting on it.
+        if settings.AWS_SQS_URL:
+            ImageStepScheduler(project_collection, get_sqs_client(), settings.AWS_SQS_URL).step_finished(
+                project_id, msg.get("run_id"), step_id,
+            )
 
-    # Single write — model_dump() includes all fields: url, state_summary, etc.
-    project_collection.update_one(
-        {"_id": ObjectId(project_id)},
-        {"$set": {f"step_generation.steps.{int(step_id) - 1}.image": result.model_dump()}},
-    )
     print(f"✅ Step {step_id} image complete: {result.url}")
+    from agents.solution_generation_multi_agent.image_generation_agent.reference_cache import (
+        get_reference_image_cache_stats,
+    )
+    print(f"📊 Reference image cache: {get_reference_image_cache_stats()}")
 
 
 def handle_preview_image(msg: dict) -> None:
     """Generate + upload the project result preview image and persist result."""
+    from services.project_preview_image import ensure_project_preview_image
+
     project_id = msg["project"]
     prefer_draft = bool(msg.get("prefer_draft", True))
 
@@ -308,390 +366,581 @@ def _build_kb_knowledge_str(kb_result: dict) -> str:
 
 
 # ---------------------------------------------------------------------------
-# Lambda handler
+# Generation stages
 # ---------------------------------------------------------------------------
 
-def lambda_handler(event, context):
-    for record in event.get("Records", []):
+def _find_similar_project(
+        project_id: str,
+        query_vector: list[float] | None = None,
+) -> tuple[dict | None, dict | None]:
+    """
+    Project-level similarity. Returns (similar_result, matched_project), both None
+    when there is no usable match.
+    """
+    print("🔍 Searching for similar projects")
+    try:
+        similar_result = similar_by_project(project_id, query_vector=query_vector)
+        print(f"🔍 similar_result: {similar_result}")
+    except Exception as e:
+        print(f"⚠️ similar_by_project failed: {e}")
+        return None, None
+
+    if similar_result and isinstance(similar_result, dict) and "matches" in similar_result:
+        print("🔍 Qdrant collection missing (or no data) -> treating as no match")
+        return None, None
+
+    matched_project = None
+    if similar_result and "project_id" in similar_result and similar_result.get("best_score") is not None:
+        matched_id = similar_result["project_id"]
         try:
-            payload = json.loads(record.get("body", "{}"))
-            task = payload.get("task", "full")
+            matched_project = project_collection.find_one({"_id": ObjectId(matched_id)})
+        except Exception:
+            matched_project = None
 
-            if task == "image_step":
-                try:
-                    handle_image_step(payload)
-                except Exception as e:
-                    print(f"❌ handle_image_step failed: {e}")
-                continue
+        if not matched_project:
+            print(f"⚠️ Orphan vector: matched project {matched_id} not present in Mongo -> skipping reuse")
+            return None, None
 
-            if task == "preview_image":
-                try:
-                    handle_preview_image(payload)
-                except Exception as e:
-                    print(f"handle_preview_image failed: {e}")
-                continue
+    return similar_result, matched_project
 
-            project_id_str = payload.get("project")
-            if not project_id_str:
-                print("⚠️ Incomplete message: missing project id")
-                continue
 
-            print(f"📦 Received job for project {project_id_str}")
+def _search_kb(summary: str, query_vector: list[float] | None = None) -> dict | None:
+    print("🔍 Searching KB for similar summary")
+    try:
+        kb_result = search_kb_by_summary(summary, top_k=1, query_vector=query_vector)
+    except Exception as e:
+        print(f"⚠️ search_kb_by_summary failed: {e}")
+        return None
 
-            cursor = project_collection.find_one({"_id": ObjectId(project_id_str)})
-            if not cursor:
-                print("⚠️ Project not found in Mongo -> skipping")
-                continue
+    if kb_result:
+        print(f"🔍 KB best score={kb_result['score']:.4f} url={kb_result.get('url')}")
+    else:
+        print("🔍 No KB match returned")
+    return kb_result
 
-            gen_status = cursor.get("generation_status")
-            if gen_status == "complete":
-                print(f"⚠️ Project {project_id_str} already generated (status=complete) -> skipping")
-                continue
 
-            summary = cursor.get("summary")
-            if not summary or not isinstance(summary, str) or not summary.strip():
-                print("⚠️ Project has no valid summary → skipping RAG and generation")
-                update_project(str(cursor["_id"]), {"generation_status": "failed", "error": "Missing summary"})
-                continue
+def _build_tools_agent(
+        summary_with_user_context: str,
+        similar_result: dict | None,
+        matched_project: dict | None,
+        kb_knowledge_str: str | None,
+) -> ToolsAgent:
+    project_score = similar_result["best_score"] if similar_result else -1.0
 
-            user_profile_context = _build_user_profile_context(cursor)
-            summary_with_user_context = _append_user_profile_context(summary, user_profile_context)
-            if user_profile_context:
-                print("User profile context will be included in generation prompts")
-
-            # ------------------------------------------------------------------
-            # STEP 1 — Project-level similarity (existing logic, unchanged)
-            # ------------------------------------------------------------------
-            similar_result = None
-            if summary and summary.strip():
-                print("🔍 Searching for similar projects")
-                try:
-                    similar_result = similar_by_project(str(cursor["_id"]))
-                    print(f"🔍 similar_result: {similar_result}")
-                except Exception as e:
-                    print(f"⚠️ similar_by_project failed: {e}")
-                    similar_result = None
+    # ------------------------------------------------------------------
+    # CASE 2 — Medium project similarity -> MODIFY using matched project
+    #          + optionally inject KB knowledge into agents
+    # ------------------------------------------------------------------
+    if similar_result and 0.7 <= similar_result["best_score"] < 0.95 and matched_project:
+        print(f"🔍 CASE 2 — Modify path. Project score={similar_result['best_score']:.4f}")
 
-            if similar_result and isinstance(similar_result, dict) and "matches" in similar_result:
-                print("🔍 Qdrant collection missing (or no data) -> treating as no match")
-                similar_result = None
+        matched_tools = matched_project.get("tool_generation", {}).get("tools")
+        matched_summary = matched_project.get("summary")
+
+        try:
+            tools_agent = ToolsAgent(
+                new_summary=summary_with_user_context,
+                matched_summary=matched_summary,
+                matched_tools=matched_tools,
+                kb_knowledge=kb_knowledge_str,
+            )
+            print(f"✅ ToolsAgent initialised with matched project context"
+                  + (" + KB knowledge" if kb_knowledge_str else ""))
+            return tools_agent
+        except Exception:
+            print("⚠️ ToolsAgent init with matched context failed, falling back")
+            try:
+                return ToolsAgent(kb_knowledge=kb_knowledge_str)
+            except Exception:
+                return ToolsAgent()
+
+    # ------------------------------------------------------------------
+    # CASE 3 — No project match (or low score) -> DEFAULT generation
+    #          + optionally inject KB knowledge into agents
+    # ------------------------------------------------------------------
+    print(f"🔍 CASE 3 — No suitable project match (score={project_score:.4f}). "
+          + ("Using KB knowledge." if kb_knowledge_str else "Running default agents."))
+    try:
+        # ToolsAgent handles kb_knowledge=None gracefully
+        return ToolsAgent(kb_knowledge=kb_knowledge_str)
+    except Exception:
+        return ToolsAgent()
 
-            matched_project = None
-            if similar_result and "project_id" in similar_result and similar_result.get("best_score") is not None:
-                matched_id = similar_result["project_id"]
-                try:
-                    matched_project = project_collection.find_one({"_id": ObjectId(matched_id)})
-                except Exception:
-                    matched_project = None
-
-                if not matched_project:
-                    print(f"⚠️ Orphan vector: matched project {matched_id} not present in Mongo -> skipping reuse")
-                    similar_result = None
-                    matched_project = None
-
-            # ------------------------------------------------------------------
-            # STEP 2 — KB similarity (new logic, runs for cases 2 & 3 only)
-            # We query once here so the result is available across both branches.
-            # ------------------------------------------------------------------
-            kb_result = None
-            project_score = similar_result["best_score"] if similar_result else -1.0
-
-            # Only bother querying KB when we are NOT in the copy path (score >= 0.95)
-            if project_score < 0.95:
-                print("🔍 Searching KB for similar summary")
-                try:
-                    kb_result = search_kb_by_summary(summary, top_k=1)
-                    if kb_result:
-                        print(f"🔍 KB best score={kb_result['score']:.4f} url={kb_result.get('url')}")
-                    else:
-                        print("🔍 No KB match returned")
-                except Exception as e:
-                    print(f"⚠️ search_kb_by_summary failed: {e}")
-                    kb_result = None
-
-            # Decide whether the KB result clears the threshold
-            kb_knowledge_str = None
-            if kb_result and kb_result["score"] >= KB_SIMILARITY_THRESHOLD:
-                kb_knowledge_str = _build_kb_knowledge_str(kb_result)
-                print(f"✅ KB knowledge will be injected (score={kb_result['score']:.4f})")
-            else:
-                print("ℹ️ KB score below threshold or no KB match — agents run without KB context")
-
-            # ------------------------------------------------------------------
-            # CASE 1 — Very high project similarity -> COPY (unchanged)
-            # ------------------------------------------------------------------
-            if similar_result and similar_result["best_score"] >= 0.95 and matched_project:
-                tools_result = matched_project.get("tool_generation")
-                steps_result = matched_project.get("step_generation")
-                estimation_result = matched_project.get("estimation_generation")
-
-                if not tools_result or not steps_result:
-                    print("⚠️ Matched project missing generated tools/steps -> falling back to generation")
-                    similar_result = None
-                    matched_project = None
-                else:
-                    print(f"🔗 Copying from similar project {matched_project['_id']} "
-                          f"(score: {similar_result['best_score']})")
-                    update_project(str(cursor["_id"]), {
-                        "tool_generation": tools_result,
-                        "step_generation": steps_result,
-                        "estimation_generation": estimation_result
-                    })
-                    reset_all_steps(str(cursor["_id"]))
-                    update_project(str(cursor["_id"]), {"generation_status": "complete"})
-                    print("✅ project generation complete via RAG (copy)")
-                    continue
 
-            # ------------------------------------------------------------------
-            # CASE 2 — Medium project similarity -> MODIFY using matched project
-            #          + optionally inject KB knowledge into agents
-            # ------------------------------------------------------------------
-            tools_agent = None
-            if similar_result and 0.7 <= similar_result["best_score"] < 0.95 and matched_project:
-                print(f"🔍 CASE 2 — Modify path. Project score={similar_result['best_score']:.4f}")
+def _match_existing_tools(tools_result: dict, tools_agent: ToolsAgent) -> None:
+    """
+    FLOW 2 — Compare and enhance tools with the existing Tools collection.
+    Mutates tools_result in place (links, reuse metadata).
+    """
+    if not (tools_result and "tools" in tools_result and tools_result["tools"]):
+        return
 
-                matched_tools = matched_project.get("tool_generation", {}).get("tools") if matched_project else None
-                matched_summary = matched_project.get("summary") if matched_project else None
+    try:
+        enhanced_tools = []
+        reuse_stats = {"reused": 0, "new": 0, "errors": 0}
+
+        # One embeddings request, one Qdrant batch query and one Mongo $in for all tools
+        similar_tools_by_tool = find_similar_tools_batch(
+            [tool.get("name", "") for tool in tools_result["tools"]],
+            limit=3,
+            similarity_threshold=0.75
+        )
 
-                try:
-                    tools_agent = ToolsAgent(
-                        new_summary=summary_with_user_context,
-                        matched_summary=matched_summary,
-                        matched_tools=matched_tools,
-                        # NEW: pass KB knowledge if available
-                        kb_knowledge=kb_knowledge_str,
-                    )
-                    print(f"✅ ToolsAgent initialised with matched project context"
-                          + (" + KB knowledge" if kb_knowledge_str else ""))
-                except Exception:
-                    print("⚠️ ToolsAgent init with matched context failed, falling back")
+        for tool, similar_tools in zip(tools_result["tools"], similar_tools_by_tool):
+            try:
+                if similar_tools and similar_tools[0].get("similarity_score", 0) >= 0.8:
+                    best_match = similar_tools[0]
+                    tool["image_link"] = best_match.get("image_link")
+                    tool["amazon_link"] = best_match.get("amazon_link")
+                    tool["reused_from"] = best_match.get("tool_id")
+                    tool["similarity_score"] = best_match.get("similarity_score")
+                    update_tool_usage(best_match["tool_id"])
+                    reuse_stats["reused"] += 1
+                    print(f"   ✅ Reused image/links for: {tool.get('name')}")
+                else:
+                    reuse_stats["new"] += 1
+                    print(f"   🆕 New tool: {tool.get('name')}")
                     try:
-                        tools_agent = ToolsAgent(kb_knowledge=kb_knowledge_str)
+                        img = tools_agent._get_image_url(tool.get("name", ""))
+                        tool["image_link"] = img
                     except Exception:
-                        tools_agent = ToolsAgent()
+                        tool["image_link"] = None
+                    safe = tools_agent._sanitize_for_amazon(tool.get("name", ""))
+                    tool["amazon_link"] = f"https://www.amazon.com/s?k={safe}&tag={tools_agent.amazon_affiliate_tag}"
 
-            # ------------------------------------------------------------------
-            # CASE 3 — No project match (or low score) -> DEFAULT generation
-            #          + optionally inject KB knowledge into agents
-            # ------------------------------------------------------------------
-            else:
-                print(f"🔍 CASE 3 — No suitable project match (score={project_score:.4f}). "
-                      + ("Using KB knowledge." if kb_knowledge_str else "Running default agents."))
-                try:
-                    tools_agent = ToolsAgent(
-                        # NEW: pass KB knowledge if available; ToolsAgent handles None gracefully
-                        kb_knowledge=kb_knowledge_str,
-                    )
-                except Exception:
-                    tools_agent = ToolsAgent()
-
-            # ------------------------------------------------------------------
-            # Generate tools (LLM)
-            # ------------------------------------------------------------------
-            try:
-                tools_result = tools_agent.recommend_tools(
-                    summary=summary_with_user_context,
-                    include_json=True
-                )
-            except Exception as e:
-                print(f"❌ tools_agent.recommend_tools failed: {e}")
-                tools_result = None
+                enhanced_tools.append(tool)
 
-            if tools_result is None:
-                print("❌ LLM Generation tools failed -> skipping this record")
-                update_project(str(cursor["_id"]), {"generation_status": "failed"})
-                continue
+            except Exception as e:
+                print(f"❌ Error processing tool {tool.get('name', 'unknown')}: {e}")
+                enhanced_tools.append(tool)
+                reuse_stats["errors"] += 1
 
-            # ------------------------------------------------------------------
-            # FLOW 2 — Compare and enhance tools with existing Tools collection
-            # ------------------------------------------------------------------
-            if tools_result and "tools" in tools_result and tools_result["tools"]:
-                try:
-                    enhanced_tools = []
-                    reuse_stats = {"reused": 0, "new": 0, "errors": 0}
-
-                    for tool in tools_result["tools"]:
-                        try:
-                            similar_tools = find_similar_tools(
-                                query=tool.get("name", ""),
-                                limit=3,
-                                similarity_threshold=0.75
-                            )
-
-                            if similar_tools and similar_tools[0].get("similarity_score", 0) >= 0.8:
-                                best_match = similar_tools[0]
-                                tool["image_link"] = best_match.get("image_link")
-                                tool["amazon_link"] = best_match.get("amazon_link")
-                                tool["reused_from"] = best_match.get("tool_id")
-                                tool["similarity_score"] = best_match.get("similarity_score")
-                                update_tool_usage(best_match["tool_id"])
-                                reuse_stats["reused"] += 1
-                                print(f"   ✅ Reused image/links for: {tool.get('name')}")
-                            else:
-                                reuse_stats["new"] += 1
-                                print(f"   🆕 New tool: {tool.get('name')}")
-                                try:
-                                    img = tools_agent._get_image_url(tool.get("name", ""))
-                                    tool["image_link"] = img
-                                except Exception:
-                                    tool["image_link"] = None
-                                safe = tools_agent._sanitize_for_amazon(tool.get("name", ""))
-                                tool["amazon_link"] = f"https://www.amazon.com/s?k={safe}&tag={tools_agent.amazon_affiliate_tag}"
-
-                            enhanced_tools.append(tool)
-
-                        except Exception as e:
-                            print(f"❌ Error processing tool {tool.get('name', 'unknown')}: {e}")
-                            enhanced_tools.append(tool)
-                            reuse_stats["errors"] += 1
-
-                    tools_result["tools"] = enhanced_tools
-                    tools_result["reuse_metadata"] = reuse_stats
-                    print(f"✅ FLOW 2 completed: {reuse_stats['reused']} reused, {reuse_stats['new']} new")
+        tools_result["tools"] = enhanced_tools
+        tools_result["reuse_metadata"] = reuse_stats
+        print(f"✅ FLOW 2 completed: {reuse_stats['reused']} reused, {reuse_stats['new']} new")
 
-                except Exception as e:
-                    print(f"⚠️ FLOW 2 comparison error: {e}")
-                    tools_result.setdefault("reuse_metadata", {"error": str(e)})
+    except Exception as e:
+        print(f"⚠️ FLOW 2 comparison error: {e}")
+        tools_result.setdefault("reuse_metadata", {"error": str(e)})
 
-            tools_result["status"] = "complete"
-            update_project(str(cursor["_id"]), {"tool_generation": tools_result})
 
-            # ------------------------------------------------------------------
-            # FLOW 1 — Extract and save new tools to tools_collection
-            # ------------------------------------------------------------------
+def _persist_new_tools(tools: list[dict]) -> None:
+    """FLOW 1 — Extract and save new tools to tools_collection."""
+    try:
+        print("🔄 FLOW 1: Extracting generated tools to tools_collection")
+        saved_tools = []
+        failed_tools = []
+        for tool in tools or []:
             try:
-                print("🔄 FLOW 1: Extracting generated tools to tools_collection")
-                saved_tools = []
-                failed_tools = []
-                if tools_result and "tools" in tools_result and tools_result["tools"]:
-                    for tool in tools_result["tools"]:
-                        try:
-                            existing_tool = tools_collection.find_one({"name": tool.get("name")})
-                            if existing_tool:
-                                print(f"✅ Tool '{tool.get('name')}' already exists, skipping")
-                                continue
-                            tool_id = store_tool_in_database(tool)
-                            try:
-                                create_and_store_tool_embeddings(tool, tool_id)
-                            except Exception as ee:
-                                print(f"⚠️ Failed creating/storing embeddings for tool {tool.get('name')}: {ee}")
-                            saved_tools.append({"tool_id": tool_id, "name": tool.get("name"), "status": "saved"})
-                            print(f"✅ FLOW 1: Saved tool '{tool.get('name')}'")
-                        except Exception as e:
-                            print(f"❌ FLOW 1: Failed to save tool {tool.get('name', 'unknown')}: {e}")
-                            failed_tools.append({"tool": tool.get('name', 'unknown'), "error": str(e)})
-                print(f"✅ FLOW 1: Completed - saved {len(saved_tools)} tools")
+                existing_tool = tools_collection.find_one({"name": tool.get("name")})
+                if existing_tool:
+                    print(f"✅ Tool '{tool.get('name')}' already exists, skipping")
+                    continue
+                tool_id = store_tool_in_database(tool)
+                try:
+                    create_and_store_tool_embeddings(tool, tool_id)
+                except Exception as ee:
+                    print(f"⚠️ Failed creating/storing embeddings for tool {tool.get('name')}: {ee}")
+                saved_tools.append({"tool_id": tool_id, "name": tool.get("name"), "status": "saved"})
+                print(f"✅ FLOW 1: Saved tool '{tool.get('name')}'")
             except Exception as e:
-                print(f"⚠️ FLOW 1: Failed to extract tools: {e}")
+                print(f"❌ FLOW 1: Failed to save tool {tool.get('name', 'unknown')}: {e}")
+                failed_tools.append({"tool": tool.get('name', 'unknown'), "error": str(e)})
+        print(f"✅ FLOW 1: Completed - saved {len(saved_tools)} tools")
+    except Exception as e:
+        print(f"⚠️ FLOW 1: Failed to extract tools: {e}")
+
+
+def _generate_steps(
+        project: dict,
+        tools_data: dict,
+        summary_with_user_context: str,
+        similar_result: dict | None,
+        matched_project: dict | None,
+        kb_knowledge_str: str | None,
+) -> dict | None:
+    # Build matched-project context for steps (case 2 only)
+    matched_summary_for_steps = None
+    matched_steps_for_steps = None
+    if similar_result and 0.7 <= similar_result.get("best_score", -1) < 0.95 and matched_project:
+        matched_summary_for_steps = matched_project.get("summary")
+        matched_steps_for_steps = matched_project.get("step_generation", {}).get("steps")
+
+    from agents.solution_generation_multi_agent.services.steps_generation_agent_service import (
+        StepsGenerationAgentService,
+    )
+    from agents.solution_generation_multi_agent.steps_generation_agent.steps_generation_agent import (
+        StepsGenerationAgent,
+    )
 
-            # ------------------------------------------------------------------
-            # Steps generation — carry KB + matched-project context through
-            # ------------------------------------------------------------------
-            cursor = project_collection.find_one({"_id": ObjectId(project_id_str)})
-            update_project(str(cursor["_id"]), {"step_generation": {"status": "in progress"}})
+    steps_agent = StepsGenerationAgent()
+    steps_service = StepsGenerationAgentService(steps_agent)
+    return steps_service.generate_steps(
+        tools=tools_data,
+        summary=summary_with_user_context,
+        user_answers=project.get("user_answers") or project.get("answers"),
+        questions=project.get("questions", []),
+        matched_summary=matched_summary_for_steps,
+        matched_steps=matched_steps_for_steps,
+        kb_knowledge=kb_knowledge_str,
+    )
 
-            # Build matched-project context for steps (case 2 only)
-            matched_summary_for_steps = None
-            matched_steps_for_steps = None
-            if similar_result and 0.7 <= similar_result.get("best_score", -1) < 0.95 and matched_project:
-                matched_summary_for_steps = matched_project.get("summary")
-                matched_steps_for_steps = matched_project.get("step_generation", {}).get("steps")
 
-            try:
-                steps_agent = StepsGenerationAgent()
-                steps_service = StepsGenerationAgentService(steps_agent)
-                steps_result = steps_service.generate_steps(
-                    tools=cursor.get("tool_generation"),
-                    summary=summary_with_user_context,
-                    user_answers=cursor.get("user_answers") or cursor.get("answers"),
-                    questions=cursor.get("questions", []),
-                    matched_summary=matched_summary_for_steps,
-                    matched_steps=matched_steps_for_steps,
-                    # NEW: pass KB knowledge if available
-                    kb_knowledge=kb_knowledge_str,
-                )
-            except Exception as e:
-                print(f"❌ Steps generation failed: {e}")
-                update_project(str(cursor["_id"]), {"step_generation": {"status": "failed"}})
-                continue
+def _save_step_documents(project_id: str, steps: list[dict], youtube_url: str | None) -> None:
+    try:
+        for step in steps:
+            step_doc = {
+                "projectId": ObjectId(project_id),
+                "order": step.get("order"),
+                "stepNumber": step.get("order"),
+                "title": step.get("title", f"Step {step.get('order', 0)}"),
+                "instructions": step.get("instructions", []),
+                "description": " ".join(step.get("instructions", [])),
+                "est_time_min": step.get("est_time_min", 0),
+                "time_text": step.get("time_text", ""),
+                "tools_needed": step.get("tools_needed", []),
+                "safety_warnings": step.get("safety_warnings", []),
+                "tips": step.get("tips", []),
+                "image_url": step.get("image_url"),
+                "videoTutorialLink": youtube_url,
+                "referenceLinks": [],
+                "status": (step.get("status") or "pending").lower(),
+                "progress": 0,
+                "completed": False,
+                "createdAt": datetime.utcnow(),
+                "updatedAt": datetime.utcnow(),
+            }
+            steps_collection.insert_one(step_doc)
+        print("✅ Steps Generated and saved")
+    except Exception as e:
+        print(f"⚠️ Saving steps to DB failed: {e}")
 
-            if not steps_result:
-                print("❌ LLM Generation steps failed -> skipping")
-                update_project(str(cursor["_id"]), {"step_generation": {"status": "failed"}})
-                continue
 
-            # Persist steps
-            try:
-                youtube_url = get_youtube_link(cursor.get("summary", ""))
-                steps_result["youtube"] = youtube_url
-                update_project(str(cursor["_id"]), {"step_generation": steps_result})
-                enqueue_image_tasks(project_id_str, steps_result.get("steps", []),
-                                    size="1536x1024", summary=summary_with_user_context)
-            except Exception as e:
-                print(f"⚠️ Failed after steps generation: {e}")
+def _find_youtube_link(
+        summary: str,
+        project_id: str | None = None,
+        summary_vector: list[float] | None = None,
+) -> str | None:
+    try:
+        return get_youtube_link(summary, project_id=project_id, summary_vector=summary_vector)
+    except Exception as e:
+        print(f"⚠️ YouTube lookup failed: {e}")
+        return None
 
-            try:
-                for step in steps_result.get("steps", []):
-                    step_doc = {
-                        "projectId": ObjectId(project_id_str),
-                        "order": step.get("order"),
-                        "stepNumber": step.get("order"),
-                        "title": step.get("title", f"Step {step.get('order', 0)}"),
-                        "instructions": step.get("instructions", []),
-                        "description": " ".join(step.get("instructions", [])),
-                        "est_time_min": step.get("est_time_min", 0),
-                        "time_text": step.get("time_text", ""),
-                        "tools_needed": step.get("tools_needed", []),
-                        "safety_warnings": step.get("safety_warnings", []),
-                        "tips": step.get("tips", []),
-                        "image_url": step.get("image_url"),
-                        "videoTutorialLink": youtube_url,
-                        "referenceLinks": [],
-                        "status": (step.get("status") or "pending").lower(),
-                        "progress": 0,
-                        "completed": False,
-                        "createdAt": datetime.utcnow(),
-                        "updatedAt": datetime.utcnow(),
-                    }
-                    steps_collection.insert_one(step_doc)
-                print("✅ Steps Generated and saved")
-            except Exception as e:
-                print(f"⚠️ Saving steps to DB failed: {e}")
 
-            # ------------------------------------------------------------------
-            # Estimation generation
-            # ------------------------------------------------------------------
-            cursor = project_collection.find_one({"_id": ObjectId(project_id_str)})
-            update_project(str(cursor["_id"]), {"estimation_generation": {"status": "in progress"}})
+def _enqueue_image_tasks_safe(
+        project_id: str,
+        steps: list[dict],
+        summary: str,
+        summary_vector: list[float] | None = None,
+) -> None:
+    try:
+        enqueue_image_tasks(project_id, steps, size="1536x1024", summary=summary, summary_vector=summary_vector)
+    except Exception as e:
+        print(f"⚠️ Failed after steps generation: {e}")
+
 
-            try:
-                estimation_agent = EstimationAgent()
-                estimation_result = estimation_agent.generate_estimation(
-                    tools_data=cursor.get("tool_generation"),
-                    steps_data=cursor.get("step_generation"),
-                    summary=summary_with_user_context
-                )
-            except Exception as e:
-                print(f"❌ Estimation generation failed: {e}")
-                update_project(str(cursor["_id"]), {"estimation_generation": {"status": "failed"}})
+def _generate_estimation(tools_data: dict, steps_data: dict, summary_with_user_context: str) -> dict | None:
+    estimation_agent = EstimationAgent()
+    return estimation_agent.generate_estimation(
+        tools_data=tools_data,
+        steps_data=steps_data,
+        summary=summary_with_user_context
+    )
+
+
+def handle_full_generation(project_id_str: str) -> None:
+    """
+    Run the tools / steps / estimation generation job for one project.
+
+    Stage graph (stages on the same line run concurrently):
+
+        summary_embedding
+        similar_by_project, search_kb_by_summary, (youtube_lookup)
+        tools_generation
+        tool_matching (FLOW 2), steps_generation
+        tool_persistence (FLOW 1, background), estimation, image_enqueue, steps_persist
+
+    Each stage's timing is stored on the project under `generation_timings`.
+    """
+    cursor = project_collection.find_one({"_id": ObjectId(project_id_str)})
+    if not cursor:
+        print("⚠️ Project not found in Mongo -> skipping")
+        return
+
+    gen_status = cursor.get("generation_status")
+    if gen_status == "complete":
+        print(f"⚠️ Project {project_id_str} already generated (status=complete) -> skipping")
+        return
+
+    summary = cursor.get("summary")
+    if not summary or not isinstance(summary, str) or not summary.strip():
+        print("⚠️ Project has no valid summary → skipping RAG and generation")
+        update_project(str(cursor["_id"]), {"generation_status": "failed", "error": "Missing summary"})
+        return
+
+    user_profile_context = _build_user_profile_context(cursor)
+    summary_with_user_context = _append_user_profile_context(summary, user_profile_context)
+    if user_profile_context:
+        print("User profile context will be included in generation prompts")
+
+    with GenerationPipeline(project_id_str, project_collection) as pipeline:
+        # ------------------------------------------------------------------
+        # STEP 1 + 2 — Project similarity and KB similarity run concurrently.
+        # Both query with the summary vector store_summary already upserted,
+        # so the job does not embed the summary again.
+        # The KB search is speculative: its result is unused on the copy path.
+        # ------------------------------------------------------------------
+        summary_vector = pipeline.run("summary_embedding", get_project_summary_vector, project_id_str, summary)
+        pipeline.submit("similar_by_project", _find_similar_project, project_id_str, summary_vector)
+        pipeline.submit("search_kb_by_summary", _search_kb, summary, summary_vector)
+
+        similar_result, matched_project = pipeline.result("similar_by_project")
+        kb_result = pipeline.result("search_kb_by_summary")
+
+        # ------------------------------------------------------------------
+        # CASE 1 — Very high project similarity -> COPY
+        # ------------------------------------------------------------------
+        if similar_result and similar_result["best_score"] >= 0.95 and matched_project:
+            tools_result = matched_project.get("tool_generation")
+            steps_result = matched_project.get("step_generation")
+            estimation_result = matched_project.get("estimation_generation")
+
+            if not tools_result or not steps_result:
+                print("⚠️ Matched project missing generated tools/steps -> falling back to generation")
+                similar_result = None
+                matched_project = None
+            else:
+                print(f"🔗 Copying from similar project {matched_project['_id']} "
+                      f"(score: {similar_result['best_score']})")
+                update_project(str(cursor["_id"]), {
+                    "tool_generation": tools_result,
+                    "step_generation": steps_result,
+                    "estimation_generation": estimation_result
+                })
+                reset_all_steps(str(cursor["_id"]))
+                update_project(str(cursor["_id"]), {"generation_status": "complete"})
+                print("✅ project generation complete via RAG (copy)")
+                return
+
+        # The tutorial video only depends on the summary — look it up off the critical path
+        pipeline.submit("youtube_lookup", _find_youtube_link, summary, project_id_str, summary_vector)
+
+        # Decide whether the KB result clears the threshold
+        kb_knowledge_str = None
+        if kb_result and kb_result["score"] >= KB_SIMILARITY_THRESHOLD:
+            kb_knowledge_str = _build_kb_knowledge_str(kb_result)
+            print(f"✅ KB knowledge will be injected (score={kb_result['score']:.4f})")
+        else:
+            print("ℹ️ KB score below threshold or no KB match — agents run without KB context")
+
+        # ------------------------------------------------------------------
+        # Generate tools (LLM)
+        # ------------------------------------------------------------------
+        tools_agent = _build_tools_agent(summary_with_user_context, similar_result, matched_project, kb_knowledge_str)
+        try:
+            tools_result = pipeline.run(
+                "tools_generation",
+                tools_agent.recommend_tools,
+                summary=summary_with_user_context,
+                include_json=True,
+            )
+        except Exception as e:
+            print(f"❌ tools_agent.recommend_tools failed: {e}")
+            tools_result = None
+
+        if tools_result is None:
+            print("❌ LLM Generation tools failed -> skipping this record")
+            update_project(str(cursor["_id"]), {"generation_status": "failed"})
+            return
+
+        # ------------------------------------------------------------------
+        # FLOW 2 and steps generation run concurrently. Steps only read the
+        # tool names/descriptions/safety fields, which FLOW 2 never changes,
+        # so they get a snapshot of the LLM output.
+        # ------------------------------------------------------------------
+        tools_snapshot = {"tools": [dict(tool) for tool in tools_result.get("tools", [])]}
+        update_project(str(cursor["_id"]), {"step_generation": {"status": "in progress"}})
+
+        pipeline.submit("tool_matching", _match_existing_tools, tools_result, tools_agent)
+        pipeline.submit(
+            "steps_generation",
+            _generate_steps,
+            cursor,
+            tools_snapshot,
+            summary_with_user_context,
+            similar_result,
+            matched_project,
+            kb_knowledge_str,
+        )
+
+        pipeline.result("tool_matching")
+        tools_result["status"] = "complete"
+        update_project(str(cursor["_id"]), {"tool_generation": tools_result})
+
+        # FLOW 1 — persisting new tools is not needed by anything downstream
+        pipeline.submit("tool_persistence", _persist_new_tools, tools_result.get("tools", []))
+
+        # ------------------------------------------------------------------
+        # Steps generation — carry KB + matched-project context through
+        # ------------------------------------------------------------------
+        try:
+            steps_result = pipeline.result("steps_generation")
+        except Exception as e:
+            print(f"❌ Steps generation failed: {e}")
+            update_project(str(cursor["_id"]), {"step_generation": {"status": "failed"}})
+            return
+
+        if not steps_result:
+            print("❌ LLM Generation steps failed -> skipping")
+            update_project(str(cursor["_id"]), {"step_generation": {"status": "failed"}})
+            return
+
+        # ------------------------------------------------------------------
+        # Estimation starts as soon as steps exist, alongside image preflight
+        # ------------------------------------------------------------------
+        update_project(str(cursor["_id"]), {"estimation_generation": {"status": "in progress"}})
+        pipeline.submit("estimation", _generate_estimation, tools_result, steps_result, summary_with_user_context)
+
+        # Persist steps
+        youtube_url = pipeline.result("youtube_lookup")
+        steps_result["youtube"] = youtube_url
+        update_project(str(cursor["_id"]), {"step_generation": steps_result})
+
+        pipeline.submit("steps_persist", _save_step_documents, project_id_str, steps_result.get("steps", []),
+                        youtube_url)
+        pipeline.run("image_enqueue", _enqueue_image_tasks_safe, project_id_str, steps_result.get("steps", []),
+                     summary_with_user_context, summary_vector)
+
+        # ------------------------------------------------------------------
+        # Estimation generation
+        # ------------------------------------------------------------------
+        try:
+            estimation_result = pipeline.result("estimation")
+        except Exception as e:
+            print(f"❌ Estimation generation failed: {e}")
+            update_project(str(cursor["_id"]), {"estimation_generation": {"status": "failed"}})
+            return
+
+        if not estimation_result:
+            print("❌ Estimation generation returned None -> skipping")
+            update_project(str(cursor["_id"]), {"estimation_generation": {"status": "failed"}})
+            return
+
+        estimation_result["status"] = "complete"
+        update_project(str(cursor["_id"]), {"estimation_generation": estimation_result})
+        update_project(str(cursor["_id"]), {"generation_status": "complete"})
+        print(f"✅ project generation complete for {project_id_str}")
+        print(f"📊 Embedding cache: {get_embedding_cache_stats()}")
+        print(f"📊 Mongo pool: {mongodb.get_pool_metrics()['sync']}")
+
+
+# ---------------------------------------------------------------------------
+# Lambda handler
+# ---------------------------------------------------------------------------
+
+_last_stall_sweep = 0.0
+# Lambda's maximum, until the first invocation reports the configured timeout
+_lambda_timeout_seconds = 900
+
+
+def step_image_stall_timeout() -> int:
+    if settings.STEP_IMAGE_STALL_TIMEOUT_SECONDS:
+        return settings.STEP_IMAGE_STALL_TIMEOUT_SECONDS
+    return _lambda_timeout_seconds * settings.STEP_IMAGE_MAX_ATTEMPTS
+
+
+def sweep_stalled_image_steps(force: bool = False) -> None:
+    """
+    Release the steps blocked behind a step image that never finished (its Lambda
+    crashed or timed out and the message went to the DLQ). Runs on the scheduled
+    event and, at most once per STEP_IMAGE_SWEEP_INTERVAL_SECONDS, on regular ones.
+    """
+    global _last_stall_sweep
+    if not settings.AWS_SQS_URL:
+        return
+    now = time.time()
+    if not force and now - _last_stall_sweep < settings.STEP_IMAGE_SWEEP_INTERVAL_SECONDS:
+        return
+    _last_stall_sweep = now
+    try:
+        failed = ImageStepScheduler(project_collection, get_sqs_client(), settings.AWS_SQS_URL).sweep_stalled(
+            step_image_stall_timeout(),
+        )
+        if failed:
+            print(f"⏱️ Failed {failed} stalled step image(s)")
+    except Exception as e:
+        print(f"⚠️ Stalled step image sweep failed: {e}")
+
+
+def compact_consumption_rollups(drain: bool = False) -> None:
+    """
+    Add pending LLM consumption rows (API and worker) to the rollups: one batch
+    after a regular invocation, every pending row on the scheduled one.
+    """
+    try:
+        total = 0
+        while True:
+            rolled_up = compact_llm_consumption_rollups()
+            total += rolled_up
+            if not drain or rolled_up < ROLLUP_COMPACTION_BATCH_SIZE:
+                break
+        if total:
+            print(f"📊 Rolled up {total} LLM consumption rows")
+    except Exception as e:
+        print(f"⚠️ LLM consumption rollup compaction failed: {e}")
+
+
+def lambda_handler(event, context):
+    # The EventBridge schedule (source "aws.events", no Records) runs the
+    # maintenance below every few minutes; see .github/workflows/backend_worker_*.yml
+    global _lambda_timeout_seconds
+    if context is not None:
+        # Remaining time at entry is the function's configured timeout (rounded up)
+        _lambda_timeout_seconds = -(-context.get_remaining_time_in_millis() // 1000)
+    scheduled = event.get("source") == "aws.events"
+    try:
+        sweep_stalled_image_steps(force=scheduled)
+        _process_records(event)
+    finally:
+        # The Lambda environment is frozen after returning, so nothing may stay buffered
+        flush_llm_consumption()
+        compact_consumption_rollups(drain=scheduled)
+    return None
+
+
+def _process_records(event) -> None:
+    for record in event.get("Records", []):
+        try:
+            payload = json.loads(record.get("body", "{}"))
+            task = payload.get("task", "full")
+
+            if task == "image_step":
+                try:
+                    handle_image_step(payload)
+                except Exception as e:
+                    print(f"❌ handle_image_step failed: {e}")
                 continue
 
-            if not estimation_result:
-                print("❌ Estimation generation returned None -> skipping")
-                update_project(str(cursor["_id"]), {"estimation_generation": {"status": "failed"}})
+            if task == "preview_image":
+                try:
+                    handle_preview_image(payload)
+                except Exception as e:
+                    print(f"handle_preview_image failed: {e}")
+                continue
+
+            project_id_str = payload.get("project")
+            if not project_id_str:
+                print("⚠️ Incomplete message: missing project id")
                 continue
 
-            estimation_result["status"] = "complete"
-            update_project(str(cursor["_id"]), {"estimation_generation": estimation_result})
-            update_project(str(cursor["_id"]), {"generation_status": "complete"})
-            print(f"✅ project generation complete for {project_id_str}")
+            print(f"📦 Received job for project {project_id_str}")
+            handle_full_generation(project_id_str)
 
         except Exception as e:
             traceback.print_exc()
             continue
 
-    return None
-
 
 def update_project(project_id: str, update_data: dict):
     result = project_collection.update_one(
@@ -717,49 +966,22 @@ def clean_and_parse_json(raw_str: str):
         raise ValueError(f"Invalid JSON format: {e}")
 
 
-def get_youtube_link(summary, project_id: str | None = None, user_id: str | None = None):
-    youtube_key = settings.YOUTUBE_API_KEY
-    openai_key = settings.OPENAI_API_KEY
+def _search_youtube(query: str) -> list[dict] | None:
+    """YouTube search results for `query` (cached); None when the daily quota budget is spent."""
+    videos = get_cached_search(query)
+    if videos is not None:
+        print(f"🎬 YouTube search cache hit: {query}")
+        return videos
 
-    payload = {
-        "model": "gpt-5-mini",  # or the model you prefer
-        "messages": [
-            {"role": "system", "content": (
-                "You are a summarization agent for youtube searches"
-                "Return one line in based of the text provided to search the most helpfull video"
-                "Provide just a sentence max 8 words for youtube search, DONT INCLUNDE MEASURES"
-            )},
-            {"role": "user", "content": json.dumps({
-                "description": summary
-            })}
-        ],
-        "max_completion_tokens": 1500,
-        "reasoning_effort": "low",
-        "verbosity": "low",
-    }
-    r = requests.post(
-        "https://api.openai.com/v1/chat/completions",
-        headers={"Authorization": f"Bearer {openai_key}"},
-        json=payload, timeout=30
-    )
-    r.raise_for_status()
-    data = r.json()
-    record_openai_response_usage(
-        data,
-        model=payload["model"],
-        operation="youtube_search_query_generation",
-        project_id=project_id,
-        user_id=user_id,
-        endpoint="/v1/chat/completions",
-    )
-    content = data["choices"][0]["message"]["content"]
-    print(content)
+    if not reserve_youtube_quota(YOUTUBE_SEARCH_QUOTA_COST):
+        print(f"⚠️ YouTube quota budget spent, skipping search: {query}")
+        return None
 
     url = "https://www.googleapis.com/youtube/v3/search"
     params = {
-        "key": youtube_key,
+        "key": settings.YOUTUBE_API_KEY,
         "part": "snippet",
-        "q": content,
+        "q": query,
         "type": "video",
         "maxResults": 8,
         "videoEmbeddable": "true",
@@ -777,6 +999,62 @@ def get_youtube_link(summary, project_id: str | None = None, user_id: str | None
         "channelTitle": it["snippet"].get("channelTitle", ""),
     } for it in items]
     print(r.json())
+    if videos:
+        store_cached_search(query, videos)
+    return videos
+
+
+def get_youtube_link(
+        summary,
+        project_id: str | None = None,
+        user_id: str | None = None,
+        summary_vector: list[float] | None = None,
+):
+    # Level one: same summary, or a near-identical project's summary -> its video
+    cached = get_cached_video(summary)
+    if cached:
+        print("🎬 YouTube video cache hit (summary)")
+        return cached["video_url"]
+    neighbour = find_cached_youtube_video(project_id, summary_vector)
+    if neighbour:
+        print(f"🎬 YouTube video cache hit (project {neighbour['project_id']}, score {neighbour['score']:.4f})")
+        # Keeps the donor's expiry, so a video is never cached past its original TTL
+        store_cached_video(
+            summary, neighbour["video_url"], project_id=project_id, source="neighbour",
+            expires_at=neighbour["expires_at"],
+        )
+        return neighbour["video_url"]
+
+    payload = {
+        "model": "gpt-5-mini",  # or the model you prefer
+        "messages": [
+            {"role": "system", "content": (
+                "You are a summarization agent for youtube searches"
+                "Return one line in based of the text provided to search the most helpfull video"
+                "Provide just a sentence max 8 words for youtube search, DONT INCLUNDE MEASURES"
+            )},
+            {"role": "user", "content": json.dumps({
+                "description": summary
+            })}
+        ],
+        "max_completion_tokens": 1500,
+        "reasoning_effort": "low",
+        "verbosity": "low",
+    }
+    data = post_openai(
+        "/chat/completions",
+        payload,
+        operation="youtube_search_query_generation",
+        project_id=project_id,
+        user_id=user_id,
+    )
+    query = data["choices"][0]["message"]["content"].strip()
+    print(query)
+
+    # Level two: search query -> YouTube results
+    videos = _search_youtube(query)
+    if not videos:
+        return None
 
     payload = {
         "model": "gpt-5-mini",  # or the model you prefer
@@ -798,22 +1076,14 @@ def get_youtube_link(summary, project_id: str | None = None, user_id: str | None
         "max_completion_tokens": 2500,
         "reasoning_effort": "low",
     }
-    r = requests.post(
-        "https://api.openai.com/v1/chat/completions",
-        headers={"Authorization": f"Bearer {openai_key}"},
-        json=payload, timeout=30
-    )
-    r.raise_for_status()
-    data = r.json()
-    record_openai_response_usage(
-        data,
-        model=payload["model"],
+    data = post_openai(
+        "/chat/completions",
+        payload,
         operation="youtube_video_selection",
         project_id=project_id,
         user_id=user_id,
-        endpoint="/v1/chat/completions",
     )
-    print(r.json())
+    print(data)
     content = data["choices"][0]["message"]["content"]
     verdict = clean_and_parse_json(content)
     best_id = verdict.get("best_videoId")
@@ -821,4 +1091,6 @@ def get_youtube_link(summary, project_id: str | None = None, user_id: str | None
     if not best:
         # fallback to top candidate
         best = videos[0]
-    return f"https://www.youtube.com/embed/{best['videoId']}"
+    video_url = f"https://www.youtube.com/embed/{best['videoId']}"
+    store_cached_video(summary, video_url, project_id=project_id, query=query)
+    return video_url